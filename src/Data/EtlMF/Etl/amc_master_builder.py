@@ -10,7 +10,7 @@ import logging
 import pandas as pd
 from pathlib import Path
 from sqlalchemy import text
-from typing import Optional
+from typing import Dict, Iterable, Optional, Sequence
 
 from Etl.utils import engine
 
@@ -22,6 +22,19 @@ class AmcMasterBuilder:
     Manages AMC master data extraction, matching, and approval workflow
     """
     
+    # Single-statement approval of every high-confidence pending match
+    APPROVE_SQL = """
+        UPDATE amc_staging
+        SET 
+            status = 'APPROVED',
+            reviewed_by = 'system',
+            reviewed_at = now()
+        WHERE status = 'PENDING'
+          AND suggested_amc_id IS NOT NULL
+          AND match_confidence >= :threshold
+        RETURNING id
+    """
+    
     def __init__(self):
         self.engine = engine
     
@@ -31,10 +44,12 @@ class AmcMasterBuilder:
     
     def build_amc_master(self, auto_approve_threshold: float = 0.85):
         """
-        Complete AMC master build workflow:
+        Complete AMC master build workflow (set-based, one transaction):
         1. Extract from raw sources
-        2. Match to existing master
-        3. Auto-generate new AMCs
+        2. Match all pending staging rows to existing master
+           (joins against the precomputed amc_master_lookup)
+        3. Auto-approve high-confidence matches (single UPDATE)
+        4. Auto-generate new AMCs for the rest
         """
         logger.info("🚀 Starting AMC master build...")
         
@@ -43,21 +58,44 @@ class AmcMasterBuilder:
             logger.info("📤 Extracting AMCs from raw sources...")
             conn.execute(text("CALL sp_extract_amcs_from_raw()"))
             
-            # Step 2: Match
+            # Step 2: Match (refreshes amc_master_lookup first)
             logger.info("🔗 Matching to existing master...")
             conn.execute(text("CALL sp_match_staging_to_master()"))
+            self._log_match_breakdown(conn)
+            
+            # Step 3: Approve
+            approved = conn.execute(
+                text(self.APPROVE_SQL), {"threshold": auto_approve_threshold}
+            ).rowcount
+            logger.info(f"✓ Auto-approved {approved} matches (confidence >= {auto_approve_threshold})")
             
-            # Step 3: Generate
+            # Step 4: Generate (nothing left to approve; creates the new AMCs)
             logger.info("🏗️  Generating master data...")
             conn.execute(text(
                 "CALL sp_generate_amc_master(:threshold)"
             ), {"threshold": auto_approve_threshold})
+            
+            # New AMCs must be matchable by the next run / review
+            conn.execute(text("CALL sp_refresh_amc_master_lookup()"))
         
         logger.info("✅ AMC master build complete!")
         
         # Return summary
         return self.get_build_summary()
     
+    def _log_match_breakdown(self, conn):
+        """Log how the pending staging rows were matched"""
+        rows = conn.execute(text("""
+            SELECT match_type, COUNT(*) AS n
+            FROM amc_staging
+            WHERE status = 'PENDING'
+            GROUP BY match_type
+            ORDER BY n DESC
+        """)).fetchall()
+        
+        if rows:
+            logger.info("📊 Match types: " + ", ".join(f"{r.match_type}={r.n}" for r in rows))
+    
     def extract_from_raw(self):
         """Extract AMCs from raw tables only (incremental update)"""
         logger.info("📤 Extracting AMCs from raw sources...")
@@ -168,17 +206,7 @@ class AmcMasterBuilder:
         logger.info(f"🔄 Bulk approving matches with confidence >= {threshold}")
         
         with self.engine.begin() as conn:
-            result = conn.execute(text("""
-                UPDATE amc_staging
-                SET 
-                    status = 'APPROVED',
-                    reviewed_by = 'system',
-                    reviewed_at = now()
-                WHERE status = 'PENDING'
-                  AND suggested_amc_id IS NOT NULL
-                  AND match_confidence >= :threshold
-                RETURNING id
-            """), {"threshold": threshold})
+            result = conn.execute(text(self.APPROVE_SQL), {"threshold": threshold})
             
             count = result.rowcount
         
@@ -255,6 +283,50 @@ class AmcMasterBuilder:
         logger.info(f"✅ Updated {success_count} codes, {error_count} errors")
         return {"success": success_count, "errors": error_count}
     
+    # ========================================================
+    # CODE RESOLUTION (amc_code_map)
+    # ========================================================
+    
+    def resolve_amc_codes(
+        self,
+        codes: Iterable[str],
+        sources: Sequence[str] = ("cams", "kfin")
+    ) -> Dict[str, str]:
+        """
+        Resolve many source AMC codes to amc_id with one join against
+        amc_code_map (primary-key probes, no per-code round trips).
+        
+        Returns {code as given: amc_id} for the codes that resolved.
+        """
+        by_key = {}
+        for code in codes:
+            if code is None or pd.isna(code):
+                continue
+            key = str(code).strip().upper()
+            if key:
+                by_key.setdefault(key, []).append(code)
+        
+        if not by_key:
+            return {}
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT DISTINCT ON (q.code) q.code, cm.amc_id
+                FROM unnest(CAST(:codes AS TEXT[])) AS q(code)
+                JOIN amc_code_map cm
+                  ON cm.code = q.code
+                 AND cm.source = ANY(CAST(:sources AS TEXT[]))
+                ORDER BY q.code, array_position(CAST(:sources AS TEXT[]), cm.source)
+            """), {"codes": list(by_key), "sources": list(sources)}).fetchall()
+        
+        resolved = {}
+        for key, amc_id in rows:
+            for code in by_key[key]:
+                resolved[code] = str(amc_id)
+        
+        logger.info(f"🔑 Resolved {len(rows)}/{len(by_key)} AMC codes")
+        return resolved
+    
     # ========================================================
     # INTEGRATION WITH ETL PIPELINE
     # ========================================================
@@ -7,34 +7,70 @@ Crawls individual AMC websites to download statutory documents:
 - AUM/AAUM data
 - Fact sheets
 
-Uses Playwright for JavaScript-heavy sites.
+Link discovery is static-HTML-first: the page is fetched over the pooled
+HTTP session and its anchors are read with lxml; Playwright is launched only
+for pages whose server-rendered DOM has no matching document link (the
+method used is recorded per page in crawl_step_timings). AMCs are crawled
+concurrently. Documents are fetched with conditional GETs (see
+http_fetcher.py), so an unchanged document costs one 304.
 """
 
 import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
+import lxml.html
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 from sqlalchemy import create_engine, text
-import requests
+
+from Etl.http_fetcher import HttpFetcher, FetchResult, FETCH_FAILED, FETCH_NOT_MODIFIED
 
 logger = logging.getLogger("mf.etl.amc_crawler")
 
+DOCUMENT_FILE_EXTENSIONS = ('.pdf', '.xlsx', '.xls', '.csv', '.zip')
+
+# How a page's document links were found
+DISCOVERY_STATIC = 'STATIC'
+DISCOVERY_BROWSER = 'BROWSER'
+
+# Defaults for phase3.amc_crawl.website_crawler_workers / max_browser_fallbacks
+DEFAULT_WEBSITE_WORKERS = 3
+DEFAULT_BROWSER_FALLBACKS = 2
+
 
 class AmcWebsiteCrawler:
     """
     Intelligent crawler for AMC websites to find and download statutory documents.
     """
     
-    def __init__(self, db_url: str, download_base_dir: Path):
+    DISCOVERY_INSERT_SQL = """
+        INSERT INTO crawl_step_timings (
+            amc_name, doc_type, action, description,
+            duration_ms, status, recorded_at
+        ) VALUES (
+            :amc_name, :doc_type, :action, :description,
+            :duration_ms, :status, now()
+        )
+    """
+    
+    def __init__(self, db_url: str, download_base_dir: Path,
+                 http_fetcher: Optional[HttpFetcher] = None,
+                 max_concurrent_amcs: int = DEFAULT_WEBSITE_WORKERS,
+                 max_browser_fallbacks: int = DEFAULT_BROWSER_FALLBACKS):
         self.db_url = db_url
         self.engine = create_engine(db_url, pool_pre_ping=True)
         self.download_base_dir = Path(download_base_dir)
         self.download_base_dir.mkdir(parents=True, exist_ok=True)
         
+        # Pooled session + persisted ETag / Last-Modified validators
+        self.http_fetcher = http_fetcher or HttpFetcher(self.download_base_dir / ".http_cache")
+        
         # Search patterns for different document types
         self.patterns = {
             'PORTFOLIO': [
@@ -61,6 +97,34 @@ class AmcWebsiteCrawler:
                 r'monthly.*fact'
             ]
         }
+        # One alternation per doc type, compiled once
+        self.compiled_patterns = {
+            doc_type: re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+            for doc_type, patterns in self.patterns.items()
+        }
+        
+        # AMCs crawled at once (pages of one AMC stay sequential)
+        self.max_concurrent_amcs = max(1, max_concurrent_amcs)
+        # Chromium fallbacks running at once (each worker thread launches its own)
+        self.max_browser_fallbacks = max(1, max_browser_fallbacks)
+        self._browser_slots = threading.BoundedSemaphore(self.max_browser_fallbacks)
+        
+        # Discovery method per crawled page
+        self.page_discoveries: List[Dict] = []
+        self._discovery_lock = threading.Lock()
+        self._discovery_table_ok = True
+    
+    @classmethod
+    def from_settings(cls, settings: Dict, db_url: str, download_base_dir: Path) -> "AmcWebsiteCrawler":
+        """Crawler sized from phase3.amc_crawl (website_crawler_workers / max_browser_fallbacks)."""
+        crawl_cfg = settings.get('phase3', {}).get('amc_crawl', {})
+        return cls(
+            db_url=db_url,
+            download_base_dir=download_base_dir,
+            http_fetcher=HttpFetcher.from_settings(settings),
+            max_concurrent_amcs=crawl_cfg.get('website_crawler_workers', DEFAULT_WEBSITE_WORKERS),
+            max_browser_fallbacks=crawl_cfg.get('max_browser_fallbacks', DEFAULT_BROWSER_FALLBACKS)
+        )
     
     def get_pending_amcs(self) -> List[Dict]:
         """
@@ -83,87 +147,182 @@ class AmcWebsiteCrawler:
             )
             return [dict(row._mapping) for row in result.fetchall()]
     
-    def find_documents_on_page(self, page_url: str, doc_type: str) -> List[Dict]:
+    # ------------------------------------------------------------------
+    # Link discovery
+    # ------------------------------------------------------------------
+    
+    def _static_anchors(self, page_url: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        (href, link text) of every anchor in the server-rendered HTML, hrefs
+        made absolute; None when the URL does not serve an HTML page.
+        """
+        response = self.http_fetcher.session.get(page_url, timeout=30)
+        response.raise_for_status()
+        
+        content_type = response.headers.get('Content-Type', '').lower()
+        if content_type and 'html' not in content_type:
+            return None
+        
+        doc = lxml.html.fromstring(response.content)
+        base_url = response.url
+        base = doc.find('.//base[@href]')
+        if base is not None:
+            base_url = urljoin(base_url, base.get('href'))
+        
+        return [
+            (urljoin(base_url, a.get('href').strip()), ' '.join(a.text_content().split()))
+            for a in doc.iter('a') if a.get('href')
+        ]
+    
+    def _browser_anchors(self, page_url: str) -> List[Tuple[str, str]]:
+        """(href, link text) of every anchor after JavaScript rendering (Playwright)."""
+        anchors = []
+        with self._browser_slots:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                try:
+                    context = browser.new_context()
+                    page = context.new_page()
+                    
+                    page.goto(page_url, wait_until="networkidle", timeout=60000)
+                    
+                    # Wait for dynamic content
+                    page.wait_for_timeout(3000)
+                    
+                    for link in page.query_selector_all('a[href]'):
+                        try:
+                            href = link.get_attribute('href')
+                            if href:
+                                anchors.append((urljoin(page.url, href), link.inner_text().strip()))
+                        except Exception as e:
+                            logger.debug(f"Error processing link: {e}")
+                finally:
+                    browser.close()
+        return anchors
+    
+    def _match_documents(self, anchors: List[Tuple[str, str]], doc_type: str) -> List[Dict]:
+        """Anchors whose text matches the doc type's patterns and point at a file."""
+        pattern = self.compiled_patterns.get(doc_type)
+        if pattern is None:
+            return []
+        
+        found_docs = []
+        seen = set()
+        for full_url, link_text in anchors:
+            text = link_text.lower()
+            if not pattern.search(text):
+                continue
+            
+            # Check if it's a downloadable file
+            file_ext = Path(urlparse(full_url).path).suffix.lower()
+            if file_ext not in DOCUMENT_FILE_EXTENSIONS:
+                # Might be a link to another page with documents
+                continue
+            
+            if full_url in seen:
+                continue
+            seen.add(full_url)
+            
+            found_docs.append({
+                'url': full_url,
+                'title': text,
+                'file_type': file_ext[1:],  # Remove dot
+                # Extract date from text or URL if possible
+                'doc_date': self.extract_date_from_text(text + ' ' + full_url)
+            })
+            
+            logger.debug(f"✓ Found: {text[:50]}... ({file_ext})")
+        
+        return found_docs
+    
+    def _record_discovery(self, amc_name: Optional[str], page_url: str, doc_type: str,
+                          method: str, found: int, seconds: float, status: str):
+        """Keep the page's discovery method for the summary and write it to crawl_step_timings."""
+        with self._discovery_lock:
+            self.page_discoveries.append({
+                'amc_name': amc_name, 'page_url': page_url, 'doc_type': doc_type,
+                'method': method, 'found': found, 'seconds': seconds, 'status': status
+            })
+            if not self._discovery_table_ok:
+                return
+        
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(self.DISCOVERY_INSERT_SQL), {
+                    'amc_name': amc_name,
+                    'doc_type': doc_type,
+                    'action': f"discover_{method.lower()}",
+                    'description': f"{page_url} ({found} found)",
+                    'duration_ms': int(seconds * 1000),
+                    'status': status
+                })
+        except Exception as e:
+            # Table missing (schema not redeployed) - keep crawling, log once
+            logger.warning(f"⚠️  Could not record page discovery (non-critical): {e}")
+            self._discovery_table_ok = False
+    
+    def find_documents_on_page(self, page_url: str, doc_type: str,
+                               amc_name: Optional[str] = None,
+                               anchor_cache: Optional[Dict] = None) -> List[Dict]:
         """
         Find downloadable documents on a webpage using pattern matching.
         
+        The static HTML is tried first; the browser only runs when it yields
+        no candidate for this doc type.
+        
         Args:
             page_url: URL to crawl
             doc_type: PORTFOLIO / TER / AUM / FACTSHEET
+            amc_name: AMC the page belongs to (for the discovery record)
+            anchor_cache: {(method, page_url): anchors} shared by the doc
+                types of one AMC, so a page is fetched / rendered only once
             
         Returns:
             List of found documents with URLs and metadata
         """
         logger.info(f"🔍 Searching {doc_type} documents at {page_url}")
         
+        anchor_cache = {} if anchor_cache is None else anchor_cache
         found_docs = []
         
+        # 1. Server-rendered HTML over the pooled session
+        started = time.perf_counter()
+        key = (DISCOVERY_STATIC, page_url)
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context()
-                page = context.new_page()
-                
-                page.goto(page_url, wait_until="networkidle", timeout=60000)
-                
-                # Wait for dynamic content
-                page.wait_for_timeout(3000)
-                
-                # Get all links on the page
-                links = page.query_selector_all('a[href]')
-                
-                for link in links:
-                    try:
-                        href = link.get_attribute('href')
-                        text = link.inner_text().strip().lower()
-                        
-                        if not href:
-                            continue
-                        
-                        # Make absolute URL
-                        full_url = urljoin(page_url, href)
-                        
-                        # Check if link matches document type patterns
-                        matches = False
-                        for pattern in self.patterns.get(doc_type, []):
-                            if re.search(pattern, text, re.IGNORECASE):
-                                matches = True
-                                break
-                        
-                        if not matches:
-                            continue
-                        
-                        # Check if it's a downloadable file
-                        file_ext = Path(urlparse(full_url).path).suffix.lower()
-                        if file_ext not in ['.pdf', '.xlsx', '.xls', '.csv', '.zip']:
-                            # Might be a link to another page with documents
-                            # Add for recursive crawl
-                            continue
-                        
-                        # Extract date from text or URL if possible
-                        doc_date = self.extract_date_from_text(text + ' ' + full_url)
-                        
-                        found_docs.append({
-                            'url': full_url,
-                            'title': text,
-                            'file_type': file_ext[1:],  # Remove dot
-                            'doc_date': doc_date
-                        })
-                        
-                        logger.debug(f"✓ Found: {text[:50]}... ({file_ext})")
-                    
-                    except Exception as e:
-                        logger.debug(f"Error processing link: {e}")
-                        continue
-                
-                browser.close()
+            if key not in anchor_cache:
+                anchor_cache[key] = self._static_anchors(page_url)
+            if anchor_cache[key]:
+                found_docs = self._match_documents(anchor_cache[key], doc_type)
+        except Exception as e:
+            anchor_cache[key] = None
+            logger.debug(f"Static fetch of {page_url} failed: {e}")
+        
+        if found_docs:
+            self._record_discovery(amc_name, page_url, doc_type, DISCOVERY_STATIC,
+                                   len(found_docs), time.perf_counter() - started, 'OK')
+            logger.info(f"✅ Found {len(found_docs)} {doc_type} documents (static HTML)")
+            return found_docs
         
+        # 2. No candidates in the static DOM - render with the browser
+        started = time.perf_counter()
+        key = (DISCOVERY_BROWSER, page_url)
+        status = 'OK'
+        try:
+            if key not in anchor_cache:
+                anchor_cache[key] = self._browser_anchors(page_url)
+            found_docs = self._match_documents(anchor_cache[key], doc_type)
         except PlaywrightTimeout:
+            status = 'FAILED'
+            anchor_cache[key] = []
             logger.warning(f"⏱ Timeout loading {page_url}")
         except Exception as e:
+            status = 'FAILED'
+            anchor_cache[key] = []
             logger.error(f"❌ Error crawling {page_url}: {e}")
         
-        logger.info(f"✅ Found {len(found_docs)} {doc_type} documents")
+        self._record_discovery(amc_name, page_url, doc_type, DISCOVERY_BROWSER,
+                               len(found_docs), time.perf_counter() - started, status)
+        logger.info(f"✅ Found {len(found_docs)} {doc_type} documents (browser)")
         return found_docs
     
     def extract_date_from_text(self, text: str) -> Optional[str]:
@@ -210,42 +369,36 @@ class AmcWebsiteCrawler:
         
         return None
     
+    def fetch_document(self, url: str, amc_id: str, doc_type: str) -> FetchResult:
+        """
+        Conditional GET of a document into the AMC's folder.
+        
+        Returns:
+            FetchResult: DOWNLOADED (new/changed file), NOT_MODIFIED (304,
+            local copy is current) or FAILED
+        """
+        # Create AMC-specific folder
+        amc_dir = self.download_base_dir / "statutory" / str(amc_id) / doc_type.lower()
+        
+        # Generate filename
+        filename = Path(urlparse(url).path).name
+        if not filename or len(filename) < 3:
+            filename = f"{doc_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        
+        logger.info(f"⬇️  Downloading {url}")
+        return self.http_fetcher.fetch(url, amc_dir, filename=filename)
+    
     def download_document(self, url: str, amc_id: str, doc_type: str) -> Optional[Path]:
         """
         Download document from URL and save locally.
         
         Returns:
-            Path to downloaded file or None if failed
+            Path to the local file (freshly downloaded or still current) or None if failed
         """
-        try:
-            # Create AMC-specific folder
-            amc_dir = self.download_base_dir / "statutory" / str(amc_id) / doc_type.lower()
-            amc_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Generate filename
-            filename = Path(urlparse(url).path).name
-            if not filename or len(filename) < 3:
-                filename = f"{doc_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            
-            filepath = amc_dir / filename
-            
-            logger.info(f"⬇️  Downloading {url}")
-            
-            response = requests.get(url, timeout=120, stream=True)
-            response.raise_for_status()
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            file_size_kb = filepath.stat().st_size // 1024
-            logger.info(f"✅ Downloaded {file_size_kb} KB → {filepath.name}")
-            
-            return filepath
-        
-        except Exception as e:
-            logger.error(f"❌ Download failed for {url}: {e}")
+        result = self.fetch_document(url, amc_id, doc_type)
+        if result.status == FETCH_FAILED:
             return None
+        return result.path
     
     def track_download_in_db(self, amc_id: str, scheme_id: Optional[str],
                              doc_type: str, frequency: Optional[str],
@@ -319,19 +472,25 @@ class AmcWebsiteCrawler:
             for doc_type in ['TER', 'AUM', 'FACTSHEET']:
                 urls_to_crawl.append((doc_type, None, amc_info['base_website_url']))
         
-        # Crawl each URL
+        # Crawl each URL (a page shared by several doc types is fetched once)
+        anchor_cache = {}
         for doc_type, frequency, url in urls_to_crawl:
             if not url:
                 continue
             
             try:
-                found_docs = self.find_documents_on_page(url, doc_type)
+                found_docs = self.find_documents_on_page(url, doc_type, amc_name, anchor_cache)
                 
                 for doc in found_docs:
-                    # Download document
-                    local_path = self.download_document(doc['url'], amc_id, doc_type)
+                    # Download document (conditional GET)
+                    result = self.fetch_document(doc['url'], amc_id, doc_type)
+                    
+                    if result.status == FETCH_NOT_MODIFIED:
+                        # Already downloaded and tracked - nothing new to parse
+                        continue
                     
                     # Track in database
+                    local_path = result.path
                     status = 'DOWNLOADED' if local_path else 'FAILED'
                     self.track_download_in_db(
                         amc_id=amc_id,
@@ -375,13 +534,35 @@ class AmcWebsiteCrawler:
         if limit:
             pending_amcs = pending_amcs[:limit]
         
-        logger.info(f"📋 Found {len(pending_amcs)} AMCs to crawl")
+        logger.info(f"📋 Found {len(pending_amcs)} AMCs to crawl "
+                    f"({self.max_concurrent_amcs} at a time)")
         
-        for i, amc_info in enumerate(pending_amcs, 1):
-            logger.info(f"[{i}/{len(pending_amcs)}] Processing {amc_info['amc_name']}")
-            self.crawl_amc(amc_info)
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_amcs) as executor:
+            futures = {executor.submit(self.crawl_amc, amc_info): amc_info
+                       for amc_info in pending_amcs}
+            
+            for i, future in enumerate(as_completed(futures), 1):
+                amc_name = futures[future]['amc_name']
+                try:
+                    future.result()
+                    logger.info(f"[{i}/{len(pending_amcs)}] Finished {amc_name}")
+                except Exception as e:
+                    logger.error(f"❌ [{i}/{len(pending_amcs)}] Crawl failed for {amc_name}: {e}")
         
+        logger.info(f"🔎 Link discovery: {self.discovery_summary()}")
+        logger.info(f"⚡ HTTP: {self.http_fetcher.summary()}")
         logger.info("🎉 AMC crawler completed!")
+    
+    def discovery_summary(self) -> str:
+        """One-line count of pages per discovery method."""
+        static = [d for d in self.page_discoveries if d['method'] == DISCOVERY_STATIC]
+        browser = [d for d in self.page_discoveries if d['method'] == DISCOVERY_BROWSER]
+        browser_seconds = sum(d['seconds'] for d in browser)
+        return (
+            f"{len(static)} page(s) from static HTML | "
+            f"{len(browser)} browser fallback(s) ({browser_seconds:.0f}s) | "
+            f"{sum(1 for d in browser if d['status'] == 'FAILED')} failed"
+        )
 
 
 def main():
@@ -394,10 +575,7 @@ def main():
     
     download_dir = Path(settings['paths']['data_root']) / 'downloads'
     
-    crawler = AmcWebsiteCrawler(
-        db_url=str(engine.url),
-        download_base_dir=download_dir
-    )
+    crawler = AmcWebsiteCrawler.from_settings(settings, str(engine.url), download_dir)
     
     # Crawl first 5 AMCs as test
     crawler.run(limit=5)
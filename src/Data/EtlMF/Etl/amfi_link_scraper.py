@@ -231,7 +231,7 @@ class AmfiLinkScraper:
         """
         Match scraped AMC name to amc_master.amc_id using fuzzy matching.
         """
-        with self.engine.connect() as conn:
+        with self.engine.begin() as conn:
             # Try exact match first
             result = conn.execute(
                 text("SELECT amc_id FROM amc_master WHERE lower(amc_full_name) = lower(:name)"),
@@ -241,14 +241,17 @@ class AmfiLinkScraper:
             if result:
                 return str(result[0])
             
-            # Try fuzzy match using pg_trgm
+            # Try fuzzy match using pg_trgm: `%` and `<->` can use the GIN
+            # trigram index on lower(amc_full_name). The `%` cut-off is SET LOCAL:
+            # it ends with this transaction instead of staying on the pooled connection
+            conn.execute(text("SET LOCAL pg_trgm.similarity_threshold = 0.5"))
             result = conn.execute(
                 text("""
                     SELECT amc_id, amc_full_name, 
                            similarity(lower(amc_full_name), lower(:name)) AS sim
                     FROM amc_master
-                    WHERE similarity(lower(amc_full_name), lower(:name)) > 0.5
-                    ORDER BY sim DESC
+                    WHERE lower(amc_full_name) % lower(:name)
+                    ORDER BY lower(amc_full_name) <-> lower(:name)
                     LIMIT 1
                 """),
                 {"name": amc_name}
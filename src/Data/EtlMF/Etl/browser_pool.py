@@ -0,0 +1,368 @@
+# Etl/browser_pool.py
+"""
+Pooled Headless Browser
+-----------------------
+Launches Chromium once and hands out a fresh, isolated BrowserContext per
+crawl job (cookies, storage and downloads are never shared between jobs).
+
+- Resource blocking : images, fonts, media and analytics/tracker hosts are
+                      aborted at the context's router, so pages settle faster
+- Recycling         : the browser is relaunched after `recycle_after` jobs
+                      (Chromium leaks memory over long crawls) and whenever it
+                      disconnects / crashes mid-job
+- Cold-start stats  : each launch is timed; jobs served by an already running
+                      browser count as cold starts avoided
+
+BrowserPool is the sync API version (one job at a time); AsyncBrowserPool
+serves concurrent jobs from the async API and retires a recycled browser
+only once its in-flight jobs have finished.
+
+Download paths (download.path()) live in the context's temp dir and are
+removed when the context closes - move files before leaving the block.
+
+Usage:
+    with BrowserPool(headless=True, recycle_after=25) as pool:
+        with pool.context() as context:
+            page = context.new_page()
+            ...
+        logger.info(pool.summary())
+
+    async with AsyncBrowserPool(headless=True) as pool:
+        async with pool.context() as context:
+            page = await context.new_page()
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from playwright.sync_api import sync_playwright, BrowserContext, Route
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger("mf.etl.browser_pool")
+
+BLOCKED_RESOURCE_TYPES = ['image', 'font', 'media']
+
+BLOCKED_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'hotjar.com',
+    'clarity.ms',
+    'mixpanel.com',
+    'segment.io',
+    'newrelic.com',
+    'nr-data.net',
+]
+
+
+class _PoolBase:
+    """Configuration, request blocking and statistics shared by both pools."""
+
+    def __init__(self, headless: bool = True, recycle_after: int = 25,
+                 blocked_resource_types: Optional[List[str]] = None,
+                 blocked_domains: Optional[List[str]] = None,
+                 user_agent: Optional[str] = None,
+                 timeout_ms: int = 60000):
+        self.headless = headless
+        self.recycle_after = max(1, recycle_after)
+        self.blocked_resource_types = set(
+            BLOCKED_RESOURCE_TYPES if blocked_resource_types is None else blocked_resource_types
+        )
+        # Configured hosts extend the built-in tracker list rather than replace it
+        self.blocked_domains = tuple(dict.fromkeys(BLOCKED_DOMAINS + list(blocked_domains or [])))
+        self.user_agent = user_agent
+        self.timeout_ms = timeout_ms
+
+        # Statistics
+        self.jobs = 0
+        self.launches = 0
+        self.launch_seconds = 0.0
+        self.recycles = 0
+        self.crashes = 0
+        self.blocked_requests = 0
+
+    @classmethod
+    def from_settings(cls, settings: Dict):
+        """Pool configured from settings['phase3']['amc_crawl']."""
+        crawl_cfg = settings.get('phase3', {}).get('amc_crawl', {})
+        return cls(
+            headless=crawl_cfg.get('headless_browser', True),
+            recycle_after=crawl_cfg.get('browser_recycle_after_jobs', 25),
+            blocked_resource_types=crawl_cfg.get('blocked_resource_types'),
+            blocked_domains=crawl_cfg.get('blocked_domains'),
+            user_agent=crawl_cfg.get('user_agent'),
+            timeout_ms=crawl_cfg.get('timeout_seconds', 60) * 1000
+        )
+
+    def _context_kwargs(self, accept_downloads: bool) -> Dict:
+        context_kwargs = {'accept_downloads': accept_downloads}
+        if self.user_agent:
+            context_kwargs['user_agent'] = self.user_agent
+        return context_kwargs
+
+    def _blocks_requests(self) -> bool:
+        return bool(self.blocked_resource_types or self.blocked_domains)
+
+    def _is_blocked(self, request) -> bool:
+        """Heavy resource type or analytics/tracker host."""
+        host = urlparse(request.url).hostname or ""
+        if (request.resource_type in self.blocked_resource_types
+                or any(host == d or host.endswith("." + d) for d in self.blocked_domains)):
+            self.blocked_requests += 1
+            return True
+        return False
+
+    def _record_launch(self, elapsed: float):
+        self.launches += 1
+        self.launch_seconds += elapsed
+        logger.info(f"🚀 Browser launched in {elapsed:.1f}s (launch #{self.launches})")
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+
+    def cold_start_seconds_saved(self) -> float:
+        """Jobs that reused a running browser x average measured launch time."""
+        if not self.launches:
+            return 0.0
+        return max(0, self.jobs - self.launches) * (self.launch_seconds / self.launches)
+
+    def summary(self) -> str:
+        """One-line pool summary for the crawl log."""
+        return (
+            f"{self.jobs} jobs on {self.launches} browser launch(es) "
+            f"({self.recycles} recycled, {self.crashes} crashed) | "
+            f"cold-start time saved ~{self.cold_start_seconds_saved():.0f}s | "
+            f"{self.blocked_requests} requests blocked"
+        )
+
+
+class BrowserPool(_PoolBase):
+    """
+    One long-lived Chromium, one new context per job (sync API).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._playwright = None
+        self._browser = None
+        self._jobs_on_browser = 0
+        self._crashed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Browser lifecycle
+    # ------------------------------------------------------------------
+
+    def _launch(self):
+        """Start Playwright (first time only) and a new Chromium, timed."""
+        started = time.perf_counter()
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self._browser.on("disconnected", self._on_disconnected)
+        self._record_launch(time.perf_counter() - started)
+        self._jobs_on_browser = 0
+        self._crashed = False
+
+    def _on_disconnected(self, browser):
+        self._crashed = True
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.debug(f"Browser close failed: {e}")
+            self._browser = None
+
+    def _ensure_browser(self):
+        """Running browser for the next job: launch, recycle or replace a crashed one."""
+        if self._browser is not None and (self._crashed or not self._browser.is_connected()):
+            logger.warning("⚠️  Browser crashed/disconnected - relaunching")
+            self.crashes += 1
+            self._close_browser()
+        elif self._browser is not None and self._jobs_on_browser >= self.recycle_after:
+            logger.info(f"♻️  Recycling browser after {self._jobs_on_browser} jobs")
+            self.recycles += 1
+            self._close_browser()
+
+        if self._browser is None:
+            self._launch()
+
+    def close(self):
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Playwright stop failed: {e}")
+            self._playwright = None
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def _route(self, route: Route):
+        """Abort heavy / tracking requests, pass everything else through."""
+        if self._is_blocked(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    @contextmanager
+    def context(self, accept_downloads: bool = True) -> Iterator[BrowserContext]:
+        """Isolated BrowserContext for one job; closed (and the browser checked) on exit."""
+        self._ensure_browser()
+        self.jobs += 1
+        self._jobs_on_browser += 1
+
+        context = self._browser.new_context(**self._context_kwargs(accept_downloads))
+        context.set_default_timeout(self.timeout_ms)
+        if self._blocks_requests():
+            context.route("**/*", self._route)
+
+        try:
+            yield context
+        finally:
+            try:
+                context.close()
+            except Exception as e:
+                # A context that cannot be closed means the browser is gone
+                logger.debug(f"Context close failed: {e}")
+                self._crashed = True
+
+
+class AsyncBrowserPool(_PoolBase):
+    """
+    One long-lived Chromium shared by concurrent jobs (async API).
+
+    A browser due for recycling stops taking new jobs and is closed when its
+    last in-flight job releases it; a crashed browser is replaced at once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._playwright = None
+        self._browser = None
+        self._jobs_on_browser = 0
+        self._disconnected = set()
+        self._in_flight: Dict[object, int] = {}
+        self._retired = set()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # Browser lifecycle
+    # ------------------------------------------------------------------
+
+    async def _launch(self):
+        started = time.perf_counter()
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=self.headless)
+        browser.on("disconnected", self._disconnected.add)
+        self._record_launch(time.perf_counter() - started)
+
+        self._browser = browser
+        self._jobs_on_browser = 0
+        self._in_flight[browser] = 0
+
+    async def _close_browser(self, browser):
+        self._in_flight.pop(browser, None)
+        self._retired.discard(browser)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"Browser close failed: {e}")
+
+    async def _acquire(self):
+        """Browser for the next job (launched, recycled or replaced as needed)."""
+        async with self._lock:
+            browser = self._browser
+            if browser is not None and (browser in self._disconnected or not browser.is_connected()):
+                logger.warning("⚠️  Browser crashed/disconnected - relaunching")
+                self.crashes += 1
+                self._browser = None
+                await self._close_browser(browser)
+            elif browser is not None and self._jobs_on_browser >= self.recycle_after:
+                logger.info(f"♻️  Recycling browser after {self._jobs_on_browser} jobs")
+                self.recycles += 1
+                self._browser = None
+                if self._in_flight.get(browser):
+                    self._retired.add(browser)
+                else:
+                    await self._close_browser(browser)
+
+            if self._browser is None:
+                await self._launch()
+
+            self.jobs += 1
+            self._jobs_on_browser += 1
+            self._in_flight[self._browser] += 1
+            return self._browser
+
+    async def _release(self, browser):
+        async with self._lock:
+            if browser not in self._in_flight:
+                return
+            self._in_flight[browser] -= 1
+            if browser in self._retired and self._in_flight[browser] == 0:
+                await self._close_browser(browser)
+
+    async def close(self):
+        for browser in list(self._in_flight):
+            await self._close_browser(browser)
+        self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Playwright stop failed: {e}")
+            self._playwright = None
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    async def _route(self, route):
+        if self._is_blocked(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @asynccontextmanager
+    async def context(self, accept_downloads: bool = True) -> AsyncIterator:
+        """Isolated BrowserContext for one job; closed and released on exit."""
+        browser = await self._acquire()
+        try:
+            context = await browser.new_context(**self._context_kwargs(accept_downloads))
+            context.set_default_timeout(self.timeout_ms)
+            if self._blocks_requests():
+                await context.route("**/*", self._route)
+
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Context close failed: {e}")
+                    self._disconnected.add(browser)
+        finally:
+            await self._release(browser)
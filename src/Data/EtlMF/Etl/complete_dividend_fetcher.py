@@ -16,11 +16,10 @@ Handles TWO dividend data sources:
 import logging
 from pathlib import Path
 from typing import List, Optional, Dict
-import pandas as pd
-from dbfread import DBF
 
 from Etl.utils import ensure_dir
 from Etl.unzip_utils import extract_zip
+from Etl.dbf_schema_registry import get_dbf_registry
 from Etl.gmail_dividend_fetcher import GmailDividendFetcher  # FIXED: Changed import
 
 logger = logging.getLogger("mf.etl.complete_dividend_fetcher")
@@ -54,6 +53,9 @@ class CompleteDividendFetcher:
                               "C:/Data_MF/downloads/dividend"))
         ensure_dir(self.output_dir)
         
+        # DBF layouts (compiled once per process)
+        self.dbf_registry = get_dbf_registry()
+        
         # Initialize Gmail fetcher for daily dividends
         self.gmail_fetcher = GmailDividendFetcher(config, paths)  # FIXED: Use correct class
         
@@ -123,7 +125,8 @@ class CompleteDividendFetcher:
     
     def _convert_cams_dividend_dbf_to_csv(self, dbf_path: Path) -> Optional[Path]:
         """
-        Convert CAMS dividend DBF to CSV
+        Convert CAMS dividend DBF to CSV using the 'cams_dividend' registry
+        layout (Config/dbf_layouts.yaml)
         
         Expected fields:
         - product_code
@@ -138,72 +141,10 @@ class CompleteDividendFetcher:
         try:
             logger.info(f"🔄 Converting CAMS Dividend DBF: {dbf_path.name}")
             
-            table = DBF(str(dbf_path), encoding='latin1', char_decode_errors='ignore')
-            records = list(table)
-            
-            if not records:
-                logger.warning(f"⚠️  Empty DBF file: {dbf_path.name}")
+            df = self.dbf_registry.read_dbf(dbf_path, 'cams_dividend')
+            if df is None:
                 return None
             
-            df = pd.DataFrame(records)
-            logger.info(f"📋 Columns in {dbf_path.name}: {list(df.columns)}")
-            
-            # Normalize column names
-            df.columns = [col.upper().strip() for col in df.columns]
-            
-            # Column mapping (adjust based on actual DBF structure)
-            column_mapping = {
-                'PRODCODE': 'product_code',
-                'PCODE': 'product_code',
-    
-                # DBF truncates to 10 chars!
-                'SCHEME_NAM': 'scheme_name',  # Was SCHEMENAME
-                'SCHNAME': 'scheme_name',
-                'NAME': 'scheme_name',
-    
-                'DIVI_BONUS': 'dividend_bonus_flag',  # Truncated
-                'DIVFLAG': 'dividend_bonus_flag',
-                'FLAG': 'dividend_bonus_flag',
-                'TYPE': 'dividend_bonus_flag',
-    
-                'EX_DIV_DAT': 'ex_dividend_date',  # Truncated
-                'EXDIVDATE': 'ex_dividend_date',
-                'EXDATE': 'ex_dividend_date',
-    
-                 'RECORD_DAT': 'record_date',  # Truncated
-                 'RECDATE': 'record_date',
-                 'RECORDDATE': 'record_date',
-    
-                 'DIV_RATE_P': 'dividend_rate_per_unit',  # Truncated
-                 'DIVRATE': 'dividend_rate_per_unit',
-                 'RATE': 'dividend_rate_per_unit',
-    
-                 'BONUS_RATI': 'bonus_ratio',  # Truncated
-                 'BONUSRATIO': 'bonus_ratio',
-                 'RATIO': 'bonus_ratio',
-    
-                 'CORP_DIV_R': 'corp_div_rate',  # Truncated
-                 'CORPDIV': 'corp_div_rate',
-                 'CORPRATE': 'corp_div_rate',
-    
-                  'ISIN': 'isin',
-                  'ISIN_NO': 'isin',
-            }
-            
-            df.rename(columns=column_mapping, inplace=True)
-            
-            # Convert dates
-            date_cols = ['ex_dividend_date', 'record_date']
-            for col in date_cols:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-            
-            # Convert numeric
-            numeric_cols = ['dividend_rate_per_unit', 'corp_div_rate']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
             # Save CSV
             csv_path = self.output_dir / f"cams_dividend_hist_{dbf_path.stem}.csv"
             df.to_csv(csv_path, index=False)
@@ -282,7 +223,8 @@ class CompleteDividendFetcher:
     
     def _convert_kfin_dividend_dbf_to_csv(self, dbf_path: Path) -> Optional[Path]:
         """
-        Convert KFIN dividend DBF to CSV
+        Convert KFIN dividend DBF to CSV using the 'kfin_dividend' registry
+        layout (Config/dbf_layouts.yaml)
         
         Expected fields:
         - fund (AMC)
@@ -301,52 +243,10 @@ class CompleteDividendFetcher:
         try:
             logger.info(f"🔄 Converting KFIN Dividend DBF: {dbf_path.name}")
             
-            table = DBF(str(dbf_path), encoding='latin1', char_decode_errors='ignore')
-            records = list(table)
-            
-            if not records:
-                logger.warning(f"⚠️  Empty DBF file: {dbf_path.name}")
+            df = self.dbf_registry.read_dbf(dbf_path, 'kfin_dividend')
+            if df is None:
                 return None
             
-            df = pd.DataFrame(records)
-            logger.info(f"📋 Columns in {dbf_path.name}: {list(df.columns)}")
-            
-            # Normalize column names
-            df.columns = [col.upper().strip() for col in df.columns]
-            
-            # Column mapping
-            column_mapping = {
-                'FUND': 'fund',
-                'SCHEME': 'scheme',
-                'PLN': 'pln',
-                'PLAN': 'pln',
-                'FUNDDESC': 'funddesc',
-                'DESC': 'funddesc',
-                'FCODE': 'fcode',
-                'DIVDATE': 'div_date',
-                'DIV_DATE': 'div_date',
-                'NDAY': 'nday',
-                'DRATE': 'drate',
-                'RATE': 'drate',
-                'DNAV': 'dnav',
-                'STATUS': 'status',
-                'ISIN': 'isin',
-                'SCHEMEISIN': 'isin',
-                'REINVDT': 'reinvdt',
-            }
-            
-            df.rename(columns=column_mapping, inplace=True)
-            
-            # Convert dates
-            if 'div_date' in df.columns:
-                df['div_date'] = pd.to_datetime(df['div_date'], errors='coerce')
-            
-            # Convert numeric
-            numeric_cols = ['nday', 'drate', 'dnav']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
             # Save CSV
             csv_path = self.output_dir / f"kfin_dividend_hist_{dbf_path.stem}.csv"
             df.to_csv(csv_path, index=False)
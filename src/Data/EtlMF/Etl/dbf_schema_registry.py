@@ -0,0 +1,228 @@
+# Etl/dbf_schema_registry.py
+"""
+DBF Schema Registry
+-------------------
+Declarative layouts for the CAMS / KFIN historical NAV and dividend DBF files.
+
+Layouts live in Config/dbf_layouts.yaml and are compiled once per process.
+Each layout is bound to a DBF header (field names + field types) into a
+DbfConversionPlan that:
+- rejects unknown layouts from the header alone, before any record is decoded
+- builds the frame with target column names in a single construction pass
+- decodes date / numeric columns with one vectorized call per column
+- reports coercion failures on required columns
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from dbfread import DBF
+
+from Etl.utils import load_yaml_config
+
+logger = logging.getLogger("mf.etl.dbf_registry")
+
+# Etl/  -> parent -> EtlMF/
+DBF_LAYOUTS_PATH = Path(__file__).parent.parent / "Config" / "dbf_layouts.yaml"
+
+# dbfread already returns Python dates / numbers for these DBF field types
+_NATIVE_DATE_TYPES = {'D', 'T', '@'}
+_NATIVE_NUMERIC_TYPES = {'N', 'F', 'I', 'B', 'Y', 'O', '+'}
+
+_VALID_TYPES = {'str', 'date', 'numeric'}
+
+
+def _record_values(items):
+    """dbfread recfactory: keep field values only (names come from the plan)."""
+    return [value for _, value in items]
+
+
+class DbfConversionPlan:
+    """
+    A layout bound to one concrete DBF header.
+    Built once per distinct header and reused for every file sharing it.
+    """
+
+    def __init__(self, layout_name: str, output_columns: List[str],
+                 decoders: List[Tuple[str, str, Optional[str], bool]],
+                 required: List[str], missing_required: List[str]):
+        self.layout_name = layout_name
+        self.output_columns = output_columns
+        # (column, type, format, already_native)
+        self.decoders = decoders
+        self.required = required
+        self.missing_required = missing_required
+
+    @property
+    def is_known(self) -> bool:
+        return not self.missing_required
+
+    def decode(self, records: List[list]) -> pd.DataFrame:
+        """Build the frame with final column names and decode typed columns."""
+        df = pd.DataFrame.from_records(records, columns=self.output_columns)
+
+        for col, col_type, fmt, native in self.decoders:
+            if col_type == 'date':
+                if native or not fmt:
+                    df[col] = pd.to_datetime(df[col], errors='coerce')
+                else:
+                    df[col] = pd.to_datetime(df[col], format=fmt, errors='coerce')
+            elif col_type == 'numeric':
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        return df
+
+    def validate(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Count null values left in required columns after decoding."""
+        if not self.required or df.empty:
+            return {}
+        null_counts = df[self.required].isna().sum()
+        return {col: int(n) for col, n in null_counts.items() if n}
+
+
+class DbfLayout:
+    """
+    Compiled form of one YAML layout: alias lookup + per-target decode spec.
+    """
+
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.targets: List[str] = []
+        self.types: Dict[str, str] = {}
+        self.formats: Dict[str, Optional[str]] = {}
+        self.required: List[str] = []
+
+        # UPPERCASE alias -> (target, priority)
+        self.alias_lookup: Dict[str, Tuple[str, int]] = {}
+
+        for target, col_spec in (spec.get('columns') or {}).items():
+            col_type = col_spec.get('type', 'str')
+            if col_type not in _VALID_TYPES:
+                raise ValueError(f"Layout '{name}': unknown type '{col_type}' for {target}")
+
+            self.targets.append(target)
+            self.types[target] = col_type
+            self.formats[target] = col_spec.get('format')
+            if col_spec.get('required'):
+                self.required.append(target)
+
+            for priority, alias in enumerate(col_spec.get('aliases') or [target]):
+                alias = str(alias).upper().strip()
+                # First layout entry wins if an alias is (mistakenly) listed twice
+                self.alias_lookup.setdefault(alias, (target, priority))
+
+        self._plans: Dict[Tuple, DbfConversionPlan] = {}
+
+    def bind(self, field_names: List[str], field_types: List[str]) -> DbfConversionPlan:
+        """Bind this layout to a DBF header; cached per distinct header."""
+        key = (tuple(field_names), tuple(field_types))
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._compile(field_names, field_types)
+            self._plans[key] = plan
+        return plan
+
+    def _compile(self, field_names: List[str], field_types: List[str]) -> DbfConversionPlan:
+        normalized = [str(name).upper().strip() for name in field_names]
+
+        # Pick the highest-priority alias present for every target
+        chosen: Dict[str, Tuple[int, int]] = {}
+        for idx, field in enumerate(normalized):
+            hit = self.alias_lookup.get(field)
+            if not hit:
+                continue
+            target, priority = hit
+            if target not in chosen or priority < chosen[target][0]:
+                chosen[target] = (priority, idx)
+
+        # Unmapped fields keep their normalized (UPPERCASE) name
+        output_columns = list(normalized)
+        for target, (_, idx) in chosen.items():
+            output_columns[idx] = target
+
+        decoders = []
+        for target, (_, idx) in chosen.items():
+            col_type = self.types[target]
+            if col_type == 'str':
+                continue
+            native_types = _NATIVE_DATE_TYPES if col_type == 'date' else _NATIVE_NUMERIC_TYPES
+            decoders.append((target, col_type, self.formats[target],
+                             field_types[idx] in native_types))
+
+        missing = [t for t in self.required if t not in chosen]
+
+        return DbfConversionPlan(
+            layout_name=self.name,
+            output_columns=output_columns,
+            decoders=decoders,
+            required=[t for t in self.required if t in chosen],
+            missing_required=missing
+        )
+
+
+class DbfSchemaRegistry:
+    """
+    Registry of compiled DBF layouts, loaded from YAML.
+    """
+
+    def __init__(self, layouts_path: Path = DBF_LAYOUTS_PATH):
+        raw = load_yaml_config(layouts_path)
+        self.layouts: Dict[str, DbfLayout] = {
+            name: DbfLayout(name, spec) for name, spec in raw.items()
+        }
+        logger.info(f"📐 Loaded {len(self.layouts)} DBF layouts from {Path(layouts_path).name}")
+
+    def get_layout(self, name: str) -> DbfLayout:
+        if name not in self.layouts:
+            raise KeyError(f"DBF layout not registered: {name}")
+        return self.layouts[name]
+
+    def read_dbf(self, dbf_path: Path, layout_name: str) -> Optional[pd.DataFrame]:
+        """
+        Read a DBF file through its layout's conversion plan.
+
+        Returns None for empty files and for headers the layout does not
+        recognise; in the latter case no record is decoded.
+        """
+        layout = self.get_layout(layout_name)
+
+        # Header is parsed on construction; records are only read on iteration
+        table = DBF(str(dbf_path), encoding='latin1', char_decode_errors='ignore',
+                    recfactory=_record_values)
+        field_types = [field.type for field in table.fields]
+
+        logger.info(f"📋 Actual DBF columns: {table.field_names}")
+
+        plan = layout.bind(table.field_names, field_types)
+        if not plan.is_known:
+            logger.error(f"❌ Unknown {layout_name} layout in {Path(dbf_path).name}, "
+                         f"missing required columns: {plan.missing_required}")
+            logger.error(f"   Header fields: {table.field_names}")
+            return None
+
+        records = list(table)
+        if not records:
+            logger.warning(f"⚠️  Empty DBF file: {Path(dbf_path).name}")
+            return None
+
+        df = plan.decode(records)
+
+        invalid = plan.validate(df)
+        if invalid:
+            logger.warning(f"⚠️  Unparseable values in required columns of "
+                           f"{Path(dbf_path).name}: {invalid}")
+
+        return df
+
+
+_registry: Optional[DbfSchemaRegistry] = None
+
+
+def get_dbf_registry() -> DbfSchemaRegistry:
+    """Process-wide registry (layouts compiled on first use)."""
+    global _registry
+    if _registry is None:
+        _registry = DbfSchemaRegistry()
+    return _registry
@@ -0,0 +1,196 @@
+# Etl/download_store.py
+"""
+Content-Addressed Download Store
+--------------------------------
+Keeps every crawled document once, keyed by its SHA-256, and exposes it in
+the human-readable downloads layout through hard links.
+
+- ingest()  : hashes an incoming file; new content moves into the object
+              store and gets a link at downloads/<doc_type>/<amc>/...; known
+              content is dropped and the existing link is returned, so a
+              re-crawl of an unchanged document adds no file (and, via the
+              download tracking, no parse work)
+- index     : URL -> hashes seen and hash -> object / links, in one JSON file
+              written atomically
+
+Hard links need the store and the downloads layout on the same volume (the
+default store lives under downloads_dir); where linking is not possible the
+file is copied instead.
+
+Layout:
+    <store_dir>/objects/<sha[:2]>/<sha><ext>
+    <store_dir>/index.json
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from Etl.parse_cache import file_sha256
+
+logger = logging.getLogger("mf.etl.download_store")
+
+# Hashes remembered per URL (a page URL can yield several documents per crawl)
+MAX_HASHES_PER_URL = 24
+
+
+class StoredDocument:
+    """Outcome of one ingest()."""
+
+    def __init__(self, sha256: str, path: Path, is_new: bool, size_bytes: int):
+        self.sha256 = sha256
+        self.path = path
+        self.is_new = is_new
+        self.size_bytes = size_bytes
+
+
+class DownloadStore:
+    """
+    SHA-256 object store + URL index; safe to share between threads.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self.objects_dir = self.store_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.store_dir / "index.json"
+
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+        # Statistics
+        self.new_documents = 0
+        self.unchanged = 0
+        self.bytes_deduplicated = 0
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> "DownloadStore":
+        """Store under paths.download_store_dir (default: <downloads_dir>/_store)."""
+        paths = settings['paths']
+        return cls(paths.get('download_store_dir', Path(paths['downloads_dir']) / '_store'))
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict:
+        index = {'urls': {}, 'hashes': {}}
+        if not self.index_path.exists():
+            return index
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as fh:
+                index.update(json.load(fh))
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable download index {self.index_path.name}: {e}")
+        return index
+
+    def _save_index(self):
+        """Write the index via temp file + rename (caller holds the lock)."""
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(self._index, fh, indent=1, default=str)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not write download index: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _remember_url(self, url: Optional[str], sha256: str):
+        if not url:
+            return
+        entry = self._index['urls'].setdefault(url, {'hashes': []})
+        if sha256 in entry['hashes']:
+            entry['hashes'].remove(sha256)
+        entry['hashes'].append(sha256)
+        del entry['hashes'][:-MAX_HASHES_PER_URL]
+        entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+
+    def hashes_for_url(self, url: str) -> List[str]:
+        """Hashes fetched from a URL, oldest first."""
+        with self._lock:
+            return list(self._index['urls'].get(url, {}).get('hashes', []))
+
+    def is_known(self, sha256: str) -> bool:
+        with self._lock:
+            entry = self._index['hashes'].get(sha256)
+        return bool(entry) and Path(entry['object']).exists()
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _link(source: Path, dest: Path):
+        """Hard link dest -> source; copy when the filesystem cannot link."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, dest)
+        except OSError:
+            shutil.copy2(source, dest)
+
+    def ingest(self, file_path: Path, dest_path: Path, url: Optional[str] = None) -> StoredDocument:
+        """
+        Store an incoming file by content and expose it at dest_path.
+
+        Args:
+            file_path: Freshly downloaded file (moved or deleted by this call)
+            dest_path: Human-readable location used when the content is new
+            url: Source URL for the URL -> hash index
+
+        Returns:
+            StoredDocument; is_new is False when the content was already stored
+            (path is then the existing human-readable link)
+        """
+        file_path = Path(file_path)
+        sha256 = file_sha256(file_path)
+        size = file_path.stat().st_size
+
+        with self._lock:
+            entry = self._index['hashes'].get(sha256)
+            if entry and Path(entry['object']).exists():
+                file_path.unlink()
+                links = [Path(p) for p in entry['links'] if Path(p).exists()]
+                if not links:
+                    # Human-readable copy was cleaned up - restore it
+                    self._link(Path(entry['object']), dest_path)
+                    links = [dest_path]
+                entry['links'] = [str(p) for p in links]
+                entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+                self._remember_url(url, sha256)
+                self._save_index()
+
+                self.unchanged += 1
+                self.bytes_deduplicated += size
+                return StoredDocument(sha256, links[0], is_new=False, size_bytes=size)
+
+            object_path = self.objects_dir / sha256[:2] / f"{sha256}{file_path.suffix.lower()}"
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(file_path), str(object_path))
+            self._link(object_path, dest_path)
+
+            now = datetime.now().isoformat(timespec='seconds')
+            self._index['hashes'][sha256] = {
+                'object': str(object_path),
+                'links': [str(dest_path)],
+                'size_bytes': size,
+                'first_seen': now,
+                'last_seen': now
+            }
+            self._remember_url(url, sha256)
+            self._save_index()
+
+        self.new_documents += 1
+        return StoredDocument(sha256, dest_path, is_new=True, size_bytes=size)
+
+    def summary(self) -> str:
+        """One-line store summary for run logs."""
+        return (
+            f"{self.new_documents} new document(s) | {self.unchanged} unchanged by hash "
+            f"({self.bytes_deduplicated / (1024 * 1024):.1f} MB not stored again)"
+        )
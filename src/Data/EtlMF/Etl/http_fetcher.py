@@ -0,0 +1,314 @@
+# Etl/http_fetcher.py
+"""
+HTTP Document Fetcher
+---------------------
+Plain-HTTP fast path for direct document links (PDF / XLSX / XLS / CSV / ZIP),
+so a link that is already a file never needs a browser session.
+
+- probe()  : HEAD (falls back to a 1-byte range GET when HEAD is refused) to
+             find out whether a URL resolves to a file or to an HTML page
+- fetch()  : conditional GET through one pooled requests.Session (keep-alive,
+             gzip) with If-None-Match / If-Modified-Since from the validator
+             cache; an unchanged document costs a single 304
+- validators (ETag, Last-Modified, local path) persist in one JSON file, and
+  are only sent while the file they describe still exists on disk
+
+Usage:
+    fetcher = HttpFetcher(cache_dir)
+    probe = fetcher.probe(url)
+    if probe and probe['is_file']:
+        result = fetcher.fetch(probe['url'], dest_dir)
+        if result.status == FETCH_NOT_MODIFIED:
+            ...
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("mf.etl.http_fetcher")
+
+FETCH_DOWNLOADED = 'DOWNLOADED'
+FETCH_NOT_MODIFIED = 'NOT_MODIFIED'
+FETCH_FAILED = 'FAILED'
+
+DOCUMENT_EXTENSIONS = {'.pdf', '.xlsx', '.xls', '.xlsm', '.csv', '.zip'}
+
+CONTENT_TYPE_EXTENSIONS = {
+    'application/pdf': '.pdf',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
+    'application/vnd.ms-excel': '.xls',
+    'application/vnd.ms-excel.sheet.macroenabled.12': '.xlsm',
+    'text/csv': '.csv',
+    'application/zip': '.zip',
+    'application/x-zip-compressed': '.zip',
+}
+
+_FILENAME = re.compile(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', re.IGNORECASE)
+
+_CHUNK = 64 * 1024
+
+
+class FetchResult:
+    """Outcome of one conditional GET."""
+
+    def __init__(self, url: str, status: str, path: Optional[Path] = None,
+                 size_bytes: int = 0, error: Optional[str] = None):
+        self.url = url
+        self.status = status
+        self.path = path
+        self.size_bytes = size_bytes
+        self.error = error
+
+
+class HttpFetcher:
+    """
+    Pooled session + persisted validator cache; safe to share between threads.
+    """
+
+    def __init__(self, cache_dir: Path, user_agent: Optional[str] = None,
+                 timeout: int = 120, pool_size: int = 10):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_path = self.cache_dir / "validators.json"
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=1,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('HEAD', 'GET'))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+
+        self._lock = threading.Lock()
+        self._validators: Dict[str, Dict] = self._load_validators()
+
+        # Statistics
+        self.probes = 0
+        self.downloads = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.bytes_downloaded = 0
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> "HttpFetcher":
+        """Fetcher configured from settings (paths.http_cache_dir, phase3.amc_crawl)."""
+        crawl_cfg = settings.get('phase3', {}).get('amc_crawl', {})
+        cache_dir = settings['paths'].get(
+            'http_cache_dir', Path(settings['paths']['data_root']) / 'cache' / 'http'
+        )
+        return cls(
+            cache_dir,
+            user_agent=crawl_cfg.get('user_agent'),
+            timeout=crawl_cfg.get('download_timeout', 120),
+            pool_size=settings.get('performance', {}).get('connection_pool_size', 10)
+        )
+
+    # ------------------------------------------------------------------
+    # Validator cache
+    # ------------------------------------------------------------------
+
+    def _load_validators(self) -> Dict[str, Dict]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable validator cache {self.cache_path.name}: {e}")
+            return {}
+
+    def _save_validators(self):
+        """Write the cache via temp file + rename (caller holds the lock)."""
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(self._validators, fh, indent=1, default=str)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not write validator cache: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for a URL whose file we still have."""
+        with self._lock:
+            entry = self._validators.get(url)
+        if not entry or not entry.get('path') or not Path(entry['path']).exists():
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def cached_path(self, url: str) -> Optional[Path]:
+        """Local file last fetched for a URL, if it still exists."""
+        with self._lock:
+            entry = self._validators.get(url)
+        if entry and entry.get('path') and Path(entry['path']).exists():
+            return Path(entry['path'])
+        return None
+
+    def remember_path(self, url: str, path: Path):
+        """Point a URL's validators at the file's final location (after moving it)."""
+        with self._lock:
+            if url in self._validators:
+                self._validators[url]['path'] = str(path)
+                self._save_validators()
+
+    # ------------------------------------------------------------------
+    # Probe / fetch
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _file_extension(url: str, response: requests.Response) -> Optional[str]:
+        """Document extension from Content-Disposition, URL path or Content-Type."""
+        match = _FILENAME.search(response.headers.get('Content-Disposition', ''))
+        if match:
+            suffix = Path(unquote(match.group(1))).suffix.lower()
+            if suffix in DOCUMENT_EXTENSIONS:
+                return suffix
+
+        suffix = Path(urlparse(url).path).suffix.lower()
+        if suffix in DOCUMENT_EXTENSIONS:
+            return suffix
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        return CONTENT_TYPE_EXTENSIONS.get(content_type)
+
+    def probe(self, url: str) -> Optional[Dict]:
+        """
+        Resolve a URL without downloading it.
+
+        Returns:
+            {'url': final URL after redirects, 'is_file', 'extension',
+             'content_type'} or None when the server could not be reached
+        """
+        self.probes += 1
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=30)
+            if response.status_code >= 400:
+                # Many servers refuse HEAD - ask for the first byte instead
+                response = self.session.get(url, headers={'Range': 'bytes=0-0'},
+                                            allow_redirects=True, stream=True, timeout=30)
+                response.close()
+            if response.status_code >= 400:
+                logger.debug(f"Probe {url}: HTTP {response.status_code}")
+                return None
+        except requests.RequestException as e:
+            logger.debug(f"Probe {url} failed: {e}")
+            return None
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        extension = self._file_extension(response.url, response)
+        is_file = extension is not None and content_type != 'text/html'
+
+        return {
+            'url': response.url,
+            'is_file': is_file,
+            'extension': extension,
+            'content_type': content_type
+        }
+
+    def fetch(self, url: str, dest_dir: Path, filename: Optional[str] = None,
+              method: str = 'GET', data: Optional[str] = None,
+              headers: Optional[Dict[str, str]] = None,
+              require_document: bool = False) -> FetchResult:
+        """
+        Conditional GET (or replayed POST) of a document into dest_dir.
+
+        A 304 returns FETCH_NOT_MODIFIED with the previously fetched path and
+        writes nothing; a 200 streams to dest_dir/filename (default: URL file
+        name) and stores the new validators (GET only).
+
+        require_document: treat an HTML / JSON answer (error or login page)
+        as FETCH_FAILED instead of saving it
+        """
+        conditional = method.upper() == 'GET'
+        request_headers = dict(headers or {})
+        if conditional:
+            request_headers.update(self._conditional_headers(url))
+        try:
+            response = self.session.request(method, url, data=data, headers=request_headers,
+                                            stream=True, timeout=self.timeout)
+
+            if response.status_code == 304:
+                response.close()
+                self.not_modified += 1
+                logger.info(f"♻️  Not modified: {url}")
+                return FetchResult(url, FETCH_NOT_MODIFIED, path=self.cached_path(url))
+
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if require_document and (content_type == 'text/html' or content_type.endswith('json')):
+                response.close()
+                raise ValueError(f"Expected a document, got {content_type}")
+
+            if not filename:
+                filename = Path(unquote(urlparse(response.url).path)).name
+                if Path(filename).suffix.lower() not in DOCUMENT_EXTENSIONS:
+                    extension = self._file_extension(response.url, response) or '.bin'
+                    filename = f"document_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+
+            dest_dir = Path(dest_dir)
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            dest_path = dest_dir / filename
+            tmp_path = dest_path.with_suffix(dest_path.suffix + ".part")
+
+            size = 0
+            with open(tmp_path, 'wb') as fh:
+                for chunk in response.iter_content(chunk_size=_CHUNK):
+                    fh.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, dest_path)
+
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"❌ Download failed for {url}: {e}")
+            return FetchResult(url, FETCH_FAILED, error=str(e))
+
+        self.downloads += 1
+        self.bytes_downloaded += size
+
+        etag = response.headers.get('ETag') if conditional else None
+        last_modified = response.headers.get('Last-Modified') if conditional else None
+        with self._lock:
+            if etag or last_modified:
+                self._validators[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'path': str(dest_path),
+                    'fetched_at': datetime.now().isoformat(timespec='seconds')
+                }
+            else:
+                # No validators - every run re-downloads this URL
+                self._validators.pop(url, None)
+            self._save_validators()
+
+        logger.info(f"✅ Downloaded {size // 1024} KB → {dest_path.name}")
+        return FetchResult(url, FETCH_DOWNLOADED, path=dest_path, size_bytes=size)
+
+    def summary(self) -> str:
+        """One-line fetch summary for run logs."""
+        return (
+            f"{self.probes} probed | {self.downloads} downloaded "
+            f"({self.bytes_downloaded / (1024 * 1024):.1f} MB) | "
+            f"{self.not_modified} not modified (304) | {self.failures} failed"
+        )
@@ -0,0 +1,252 @@
+# Etl/isolated_pool.py
+"""
+Isolated Worker Pool
+--------------------
+Runs tasks in long-lived worker subprocesses, one task per worker at a time,
+under a per-task wall-clock budget and a per-worker RSS budget.
+
+Unlike ProcessPoolExecutor, a single stuck or runaway task can be killed:
+the supervisor polls every busy worker, terminates the process that went
+over budget, reports the task as TIMEOUT / MEMORY and replaces the worker,
+so the rest of the batch keeps going.
+
+Task functions, initializers and results must be picklable (module-level
+functions; workers are spawned on Windows).
+
+Usage:
+    with IsolatedWorkerPool(_parse_in_worker, workers=4, time_budget=120,
+                            rss_budget_mb=2048, initializer=_init_worker,
+                            initargs=(db_url,)) as pool:
+        for outcome in pool.imap_unordered(docs):
+            if outcome.status == TASK_OK:
+                ...
+"""
+
+import logging
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import psutil
+
+logger = logging.getLogger("mf.etl.isolated_pool")
+
+TASK_OK = 'OK'
+TASK_ERROR = 'ERROR'        # task raised inside the worker
+TASK_TIMEOUT = 'TIMEOUT'    # wall-clock budget exceeded, worker killed
+TASK_MEMORY = 'MEMORY'      # RSS budget exceeded, worker killed
+TASK_CRASHED = 'CRASHED'    # worker died on its own
+
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+def _worker_main(conn, func: Callable, initializer: Optional[Callable], initargs: tuple):
+    """Worker loop: receive a task, send back ('ok', result) or ('error', message)."""
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        try:
+            conn.send(('ok', func(item)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class TaskOutcome:
+    """Result of one task plus how it ended and what it cost."""
+
+    def __init__(self, item, status: str, result=None, error: Optional[str] = None,
+                 elapsed: float = 0.0, peak_rss_mb: float = 0.0):
+        self.item = item
+        self.status = status
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+        self.peak_rss_mb = peak_rss_mb
+
+
+class _Worker:
+    """One worker subprocess and the task it is currently running."""
+
+    def __init__(self, ctx, func: Callable, initializer: Optional[Callable], initargs: tuple):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, func, initializer, initargs),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self._ps = psutil.Process(self.process.pid)
+
+        self.item = None
+        self.started = 0.0
+        self.peak_rss_mb = 0.0
+
+    def submit(self, item):
+        self.item = item
+        self.started = time.monotonic()
+        self.peak_rss_mb = 0.0
+        self.conn.send(item)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def sample_rss_mb(self) -> float:
+        try:
+            rss_mb = self._ps.memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return self.peak_rss_mb
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+        return rss_mb
+
+    def outcome(self, status: str, result=None, error: Optional[str] = None) -> TaskOutcome:
+        outcome = TaskOutcome(self.item, status, result=result, error=error,
+                              elapsed=self.elapsed(), peak_rss_mb=self.peak_rss_mb)
+        self.item = None
+        return outcome
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(5)
+        self.kill()
+
+
+class IsolatedWorkerPool:
+    """
+    Supervised pool of worker subprocesses with per-task budgets.
+    """
+
+    def __init__(self, func: Callable, workers: int = 1,
+                 time_budget: Optional[float] = None,
+                 rss_budget_mb: Optional[float] = None,
+                 initializer: Optional[Callable] = None, initargs: tuple = (),
+                 poll_interval: float = 0.5):
+        self.func = func
+        self.workers = max(1, workers)
+        self.time_budget = time_budget
+        self.rss_budget_mb = rss_budget_mb
+        self.initializer = initializer
+        self.initargs = initargs
+        self.poll_interval = poll_interval
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle: List[_Worker] = []
+        self.workers_replaced = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        for worker in self._idle:
+            worker.stop()
+        self._idle = []
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.func, self.initializer, self.initargs)
+
+    def run_one(self, item) -> TaskOutcome:
+        """Run a single task in an isolated worker (worker is kept for the next call)."""
+        return next(self.imap_unordered([item]))
+
+    def imap_unordered(self, items: Iterable) -> Iterator[TaskOutcome]:
+        """Yield one TaskOutcome per item, in completion order."""
+        pending = deque(items)
+        busy: Dict[int, _Worker] = {}
+
+        try:
+            while pending or busy:
+                while pending and len(busy) < self.workers:
+                    worker = self._idle.pop() if self._idle else self._spawn()
+                    worker.submit(pending.popleft())
+                    busy[id(worker.conn)] = worker
+
+                ready = wait([w.conn for w in busy.values()], timeout=self.poll_interval)
+
+                for conn in ready:
+                    worker = busy.pop(id(conn))
+                    try:
+                        kind, payload = conn.recv()
+                    except (EOFError, OSError) as e:
+                        exitcode = worker.process.exitcode
+                        yield worker.outcome(TASK_CRASHED, error=f"Worker died (exit code {exitcode}): {e}")
+                        self._replace(worker)
+                        continue
+
+                    self._idle.append(worker)
+                    if kind == 'ok':
+                        yield worker.outcome(TASK_OK, result=payload)
+                    else:
+                        yield worker.outcome(TASK_ERROR, error=payload)
+
+                for key, worker in list(busy.items()):
+                    outcome = self._check_budgets(worker)
+                    if outcome is not None:
+                        del busy[key]
+                        yield outcome
+        finally:
+            # Abandoned mid-batch (consumer stopped iterating): don't leave tasks running
+            for worker in busy.values():
+                worker.kill()
+
+    def _check_budgets(self, worker: _Worker) -> Optional[TaskOutcome]:
+        """Kill a busy worker that is over budget or dead; None while it is fine."""
+        if not worker.process.is_alive():
+            outcome = worker.outcome(TASK_CRASHED,
+                                     error=f"Worker died (exit code {worker.process.exitcode})")
+        elif self.time_budget and worker.elapsed() > self.time_budget:
+            outcome = worker.outcome(TASK_TIMEOUT,
+                                     error=f"Wall-clock budget of {self.time_budget:.0f}s exceeded")
+        elif self.rss_budget_mb and worker.sample_rss_mb() > self.rss_budget_mb:
+            outcome = worker.outcome(TASK_MEMORY,
+                                     error=f"RSS budget of {self.rss_budget_mb:.0f} MB exceeded "
+                                           f"({worker.peak_rss_mb:.0f} MB)")
+        else:
+            return None
+
+        logger.warning(f"⏱️  Killing worker pid {worker.process.pid}: {outcome.error}")
+        self._replace(worker)
+        return outcome
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        self.workers_replaced += 1
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[str, float]:
+    """p50/p90/p95/p99/max of per-task latencies (seconds); {} when empty."""
+    if not latencies:
+        return {}
+    values = np.asarray(latencies, dtype=float)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in LATENCY_PERCENTILES}
+    summary['max'] = float(values.max())
+    return summary
+
+
+def format_latency_percentiles(latencies: List[float]) -> str:
+    """One-line latency summary for run logs."""
+    summary = latency_percentiles(latencies)
+    if not summary:
+        return "n/a"
+    return " | ".join(f"{name} {value:.1f}s" for name, value in summary.items())
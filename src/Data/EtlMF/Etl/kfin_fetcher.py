@@ -1,7 +1,6 @@
 ﻿import logging
 from pathlib import Path
 from playwright.sync_api import sync_playwright, TimeoutError
-from time import sleep
 from datetime import datetime
 
 logger = logging.getLogger("mf.etl.kfin")
@@ -44,8 +43,11 @@ class KfinFetcher:
                 page.goto(self.base_url, wait_until="domcontentloaded", timeout=60000)
                 logger.info("✅ Page loaded successfully")
                 
-                # Wait for page to be fully interactive
-                sleep(3)
+                # Wait for page to be fully interactive (network idle, capped)
+                try:
+                    page.wait_for_load_state("networkidle", timeout=10000)
+                except TimeoutError:
+                    logger.info("⏳ Network not idle after 10s - continuing")
                 
                 # Click "Information Center" dropdown from top navigation
                 logger.info("🧭 Clicking 'Information Center' menu...")
@@ -61,7 +63,6 @@ class KfinFetcher:
                     try:
                         logger.info(f"Trying selector: {selector}")
                         page.click(selector, timeout=10000)
-                        sleep(2)  # Wait for dropdown to appear
                         clicked_info_center = True
                         logger.info("✅ Clicked 'Information Center'")
                         break
@@ -76,18 +77,15 @@ class KfinFetcher:
                     logger.info(f"📸 Screenshot saved: {screenshot_path}")
                     return None
                 
-                # Wait for dropdown to be visible
-                logger.info("⏳ Waiting for dropdown menu to appear...")
-                sleep(2)
-                
                 # Now click on "Scheme Information" - this triggers direct download
                 logger.info("⬇️  Clicking 'Scheme Information' to start download...")
                 
                 # Wait for the dropdown menu to be fully visible and interactive
+                # (clicks below auto-wait for the item to stop animating)
+                logger.info("⏳ Waiting for dropdown menu to appear...")
                 try:
-                    page.wait_for_selector(".MuiMenu-root", state="visible", timeout=5000)
+                    page.wait_for_selector(".MuiMenu-root", state="visible", timeout=10000)
                     logger.info("✅ Dropdown menu is visible")
-                    sleep(1)  # Allow animations to complete
                 except TimeoutError:
                     logger.warning("⚠️  Menu visibility timeout - proceeding anyway")
                 
@@ -5,7 +5,7 @@ from pathlib import Path
 import pandas as pd
 from sqlalchemy import text
 
-from Etl.utils import engine, DOWNLOADS_DIR, ARCHIVE_DIR
+from Etl.utils import engine, settings, DOWNLOADS_DIR, ARCHIVE_DIR
 from Etl.excel_to_postgres import (
     safe_read_excel,
     load_dataframe_to_table,
@@ -13,6 +13,8 @@ from Etl.excel_to_postgres import (
 )
 from Etl.archive_utils import archive_file
 from Etl.cleaner import is_valid_isin
+from Etl.amc_master_builder import AmcMasterBuilder
+from Etl.scheme_mapper import SchemeMappingEngine
 
 logger = logging.getLogger("mf.etl.loader")
 
@@ -151,6 +153,11 @@ class EtlOrchestrator:
         """
 
         df = pd.read_sql(sql, engine)
+
+        # Candidates whose code is already mapped (one join via amc_code_map)
+        resolved = AmcMasterBuilder().resolve_amc_codes(df["amc_code"])
+        df["amc_id"] = df["amc_code"].map(resolved)
+
         out = Path("amc_master_candidates.csv")
         df.to_csv(out, index=False)
 
@@ -168,7 +175,13 @@ class EtlOrchestrator:
             conn.execute(text("CALL sp_refresh_kfin_scheme_master()"))
             conn.execute(text("CALL sp_refresh_amfi_scheme()"))
             conn.execute(text("CALL sp_refresh_rta_combined_scheme_master()"))
-            conn.execute(text("CALL sp_refresh_scheme_mapping()"))
+            etl_cfg = settings.get("etl", {})
+            if etl_cfg.get("scheme_mapping_engine", "sql") == "python":
+                # Same mapping rules, streamed and matched in memory, written via COPY
+                # (check with `python -m Etl.scheme_mapper parity` before switching)
+                SchemeMappingEngine().run(conn)
+            else:
+                conn.execute(text("CALL sp_refresh_scheme_mapping()"))
             conn.execute(text("CALL sp_refresh_scheme_master_final()"))
 
         logger.info("✅ SQL ETL pipeline completed.")
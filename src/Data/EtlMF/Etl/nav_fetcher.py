@@ -16,10 +16,10 @@ from datetime import datetime
 from typing import List, Optional
 import requests
 import pandas as pd
-from dbfread import DBF
 
 from Etl.utils import ensure_dir, build_retry, settings
 from Etl.unzip_utils import extract_zip
+from Etl.dbf_schema_registry import get_dbf_registry
 
 logger = logging.getLogger("mf.etl.nav_fetcher")
 
@@ -48,6 +48,9 @@ class NavFetcher:
         # AMFI daily NAV URL
         self.amfi_nav_url = config.get("amfi_nav_url", 
                                        "https://portal.amfiindia.com/spages/NAVAll.txt")
+        
+        # DBF layouts (compiled once per process)
+        self.dbf_registry = get_dbf_registry()
     
     # ================================================================
     # CAMS HISTORICAL NAV (ZIP → DBF → CSV)
@@ -103,7 +106,8 @@ class NavFetcher:
     
     def _convert_cams_dbf_to_csv(self, dbf_path: Path) -> Optional[Path]:
         """
-        Convert CAMS DBF file to CSV with proper column mapping
+        Convert CAMS DBF file to CSV using the 'cams_nav' registry layout
+        (Config/dbf_layouts.yaml)
         
         ACTUAL CAMS NAV COLUMNS (from your CSV):
         - product_code
@@ -119,88 +123,11 @@ class NavFetcher:
         try:
             logger.info(f"🔄 Converting CAMS DBF: {dbf_path.name}")
             
-            # Read DBF
-            table = DBF(str(dbf_path), encoding='latin1', char_decode_errors='ignore')
-            records = list(table)
-            
-            if not records:
-                logger.warning(f"⚠️  Empty DBF file: {dbf_path.name}")
+            # Rename + typed decode in one pass; unknown headers rejected up front
+            df = self.dbf_registry.read_dbf(dbf_path, 'cams_nav')
+            if df is None:
                 return None
             
-            df = pd.DataFrame(records)
-            
-            # Log actual columns for debugging
-            logger.info(f"📋 Actual DBF columns: {list(df.columns)}")
-            
-            # Normalize to uppercase for mapping
-            df.columns = [col.upper().strip() for col in df.columns]
-            
-            # FIXED: Column mapping based on ACTUAL CAMS format
-            column_mapping = {
-                # Product identification
-                'PRODCODE': 'product_code',
-                'PRODUCT_CODE': 'product_code',
-                'PCODE': 'product_code',
-                'CODE': 'product_code',
-                
-                'PRODNAME': 'product_name',
-                'PRODUCT_NAME': 'product_name',
-                'PNAME': 'product_name',
-                'NAME': 'product_name',
-                
-                # Date - UPPERCASE in CAMS!
-                'NAV_DATE': 'nav_date',  # This is the actual column name
-                'NAVDATE': 'nav_date',
-                'DATE': 'nav_date',
-                
-                # NAV Value - UPPERCASE in CAMS!
-                'NAV_VALUE': 'nav_value',  # This is the actual column name
-                'NAV': 'nav_value',
-                'NAVVALUE': 'nav_value',
-                
-                # Dividend fields
-                'DIV_PERUNI': 'dividend_per_unit',
-                'DIVUNIT': 'dividend_per_unit',
-                'DIVIDEND': 'dividend_per_unit',
-                
-                'CORPDIVRAT': 'corp_div_rate',
-                'CORPDIV': 'corp_div_rate',
-                'CORPRATE': 'corp_div_rate',
-                
-                # Scheme info
-                'SCHEME_TYP': 'scheme_type',
-                'SCHTYPE': 'scheme_type',
-                'TYPE': 'scheme_type',
-                
-                # ISIN
-                'ISIN_NO': 'isin_no',
-                'ISIN': 'isin_no',
-                
-                # Swing NAV (new field)
-                'SWING_NAV': 'swing_nav',
-            }
-            
-            # Apply mapping
-            df.rename(columns=column_mapping, inplace=True)
-            
-            # Verify required columns exist
-            required_cols = ['nav_date', 'nav_value', 'isin_no']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            
-            if missing_cols:
-                logger.error(f"❌ Missing required columns in {dbf_path.name}: {missing_cols}")
-                logger.error(f"   Available columns after mapping: {list(df.columns)}")
-                return None
-            
-            # Convert date format (mm/dd/yyyy → yyyy-mm-dd)
-            df['nav_date'] = pd.to_datetime(df['nav_date'], errors='coerce')
-            
-            # Convert numeric fields
-            numeric_cols = ['nav_value', 'dividend_per_unit', 'corp_div_rate', 'swing_nav']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
             # Save as CSV
             csv_path = self.output_dir / f"cams_nav_{dbf_path.stem}.csv"
             df.to_csv(csv_path, index=False)
@@ -266,7 +193,8 @@ class NavFetcher:
     
     def _convert_kfin_dbf_to_csv(self, dbf_path: Path) -> Optional[Path]:
         """
-        Convert KFIN DBF file to CSV with proper column mapping
+        Convert KFIN DBF file to CSV using the 'kfin_nav' registry layout
+        (Config/dbf_layouts.yaml)
         
         ACTUAL KFIN NAV COLUMNS (from your data):
         - fund (AMC code)
@@ -284,60 +212,11 @@ class NavFetcher:
         try:
             logger.info(f"🔄 Converting KFIN DBF: {dbf_path.name}")
             
-            # Read DBF
-            table = DBF(str(dbf_path), encoding='latin1', char_decode_errors='ignore')
-            records = list(table)
-            
-            if not records:
-                logger.warning(f"⚠️  Empty DBF file: {dbf_path.name}")
+            # Rename + typed decode in one pass; unknown headers rejected up front
+            df = self.dbf_registry.read_dbf(dbf_path, 'kfin_nav')
+            if df is None:
                 return None
             
-            df = pd.DataFrame(records)
-            
-            # Log actual columns
-            logger.info(f"📋 Actual DBF columns: {list(df.columns)}")
-            
-            # KFIN columns are lowercase - normalize to uppercase for consistent mapping
-            df.columns = [col.upper().strip() for col in df.columns]
-            
-            # FIXED: Column mapping based on ACTUAL KFIN format
-            column_mapping = {
-                'FUND': 'fund',
-                'SCHEME': 'scheme',
-                'FUNDDESC': 'funddesc',
-                'FCODE': 'fcode',
-                'NAVDATE': 'navdate',  # Already correct
-                'NAV': 'nav',          # Already correct
-                'PPOP': 'ppop',        # Purchase price
-                'RPOP': 'rpop',        # Redemption price
-                'CRDATE': 'crdate',
-                'CRTIME': 'crtime',
-                'SCHEMEISIN': 'schemeisin',
-                'ISIN': 'schemeisin',
-            }
-            
-            df.rename(columns=column_mapping, inplace=True)
-            
-            # Verify required columns
-            required_cols = ['navdate', 'nav', 'schemeisin']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            
-            if missing_cols:
-                logger.error(f"❌ Missing required columns in {dbf_path.name}: {missing_cols}")
-                logger.error(f"   Available columns after mapping: {list(df.columns)}")
-                return None
-            
-            # Convert date format
-            df['navdate'] = pd.to_datetime(df['navdate'], errors='coerce')
-            if 'crdate' in df.columns:
-                df['crdate'] = pd.to_datetime(df['crdate'], errors='coerce')
-            
-            # Convert numeric fields
-            numeric_cols = ['nav', 'ppop', 'rpop']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
             # Save as CSV
             csv_path = self.output_dir / f"kfin_nav_{dbf_path.stem}.csv"
             df.to_csv(csv_path, index=False)
@@ -0,0 +1,74 @@
+# Etl/parse_cache.py
+"""
+Parse Result Cache
+------------------
+On-disk cache of document parse results keyed by
+(file SHA-256, parser version, doc_type).
+
+Each entry stores the raw extracted tables, the detected SEBI format and the
+validation result, plus the extracted records. A re-run over an unchanged
+file is served from the cache; bumping a parser version only invalidates
+entries of the doc_type it belongs to.
+
+Layout:
+    <cache_dir>/<sha[:2]>/<sha>_<doc_type>_v<version>.json
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("mf.etl.parse_cache")
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 hex digest of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    File-per-entry JSON cache; safe to share between worker processes.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, sha256: str, doc_type: str, version: str) -> Path:
+        return self.cache_dir / sha256[:2] / f"{sha256}_{doc_type}_v{version}.json"
+
+    def get(self, sha256: str, doc_type: str, version: str) -> Optional[Dict]:
+        path = self._entry_path(sha256, doc_type, version)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable cache entry {path.name}: {e}")
+            return None
+
+    def put(self, sha256: str, doc_type: str, version: str, entry: Dict):
+        path = self._entry_path(sha256, doc_type, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(entry, fh, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not write cache entry {path.name}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
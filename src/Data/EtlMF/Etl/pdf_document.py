@@ -0,0 +1,305 @@
+# Etl/pdf_document.py
+"""
+PDF Document Cache
+------------------
+Opens a PDF once (pdfplumber) and lazily caches per-page text and tables,
+so format detection, table extraction and TER/SID parsing can share one
+parsed document instead of re-opening and re-parsing every page.
+
+If pdfplumber cannot open the file, text falls back to PyPDF2 (no tables).
+
+Full-page tables keep their geometry (bbox, column x-positions), so a
+caller can learn a table template; region_tables() then extracts a cropped
+region with explicit column boundaries instead of full detection.
+
+An optional time budget is enforced between pages: once the deadline has
+passed, the next page access raises TimeoutError.
+
+Page targeting (target_pages) finds the pages worth extracting without
+running layout analysis: outline/bookmark entries whose title matches a
+keyword, and for keywords without an outline match, a scan over the
+literal strings of each page's raw content stream. Pages whose text is
+only reachable through hex strings / CID fonts are not found by the scan;
+callers fall back to their full page range when nothing is targeted.
+
+Usage:
+    with PdfDocument(pdf_path, time_budget=120) as doc:
+        text = doc.text()
+        tables = doc.tables()
+"""
+
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import PSLiteral
+from pdfminer.utils import decode_text
+from PyPDF2 import PdfReader
+
+logger = logging.getLogger("mf.etl.pdf_document")
+
+# Literal strings "(...)" of a content stream (Tj / TJ operands)
+_LITERAL_STRING = re.compile(rb'\((?:[^()\\]|\\.)*\)')
+_WHITESPACE = re.compile(rb'\s+')
+
+
+def _compact_keyword(keyword: str) -> bytes:
+    """Lowercased, whitespace-free keyword (TJ kerning drops the spaces)."""
+    return re.sub(r'\s+', '', keyword.lower()).encode('latin-1', 'ignore')
+
+
+class PdfDocument:
+    """
+    Single-open, lazily-parsed view over one PDF file.
+    """
+
+    def __init__(self, pdf_path: Path, time_budget: Optional[float] = None):
+        self.pdf_path = Path(pdf_path)
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        self._reader = None
+        try:
+            self._pdf = pdfplumber.open(str(self.pdf_path))
+        except Exception as e:
+            logger.debug(f"pdfplumber could not open {self.pdf_path.name}, using PyPDF2: {e}")
+            self._pdf = None
+            self._reader = PdfReader(str(self.pdf_path))
+        self._text_cache: Dict[int, str] = {}
+        self._table_cache: Dict[int, List[list]] = {}
+        # (bbox, column x-positions) of every table in _table_cache, same order
+        self._geometry_cache: Dict[int, List[Tuple[tuple, List[float]]]] = {}
+        self._region_cache: Dict[tuple, List[list]] = {}
+        self._stream_cache: Dict[int, bytes] = {}
+        self._outline: Optional[List[Tuple[str, int]]] = None
+        # How the last target_pages() call found its pages: outline / content_stream / None
+        self.targeting_method: Optional[str] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    @property
+    def page_count(self) -> int:
+        if self._pdf is None:
+            return len(self._reader.pages)
+        return len(self._pdf.pages)
+
+    def _check_budget(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError(f"Time budget exceeded while parsing {self.pdf_path.name}")
+
+    def _page_numbers(self, pages: Optional[Iterable[int]]) -> List[int]:
+        if pages is None:
+            return list(range(self.page_count))
+        return [p for p in pages if 0 <= p < self.page_count]
+
+    # -------------------------------------------------------------------------
+    # TEXT
+    # -------------------------------------------------------------------------
+
+    def page_text(self, page_no: int) -> str:
+        """Text of one page (0-based), extracted at most once."""
+        if page_no not in self._text_cache:
+            self._check_budget()
+            try:
+                if self._pdf is None:
+                    page_text = self._reader.pages[page_no].extract_text()
+                else:
+                    page_text = self._pdf.pages[page_no].extract_text()
+                self._text_cache[page_no] = page_text or ""
+            except Exception as e:
+                logger.debug(f"Text extraction failed on page {page_no + 1} of {self.pdf_path.name}: {e}")
+                self._text_cache[page_no] = ""
+        return self._text_cache[page_no]
+
+    def text(self, pages: Optional[Iterable[int]] = None) -> str:
+        """Joined text of the given pages (all pages by default)."""
+        parts = [self.page_text(p) for p in self._page_numbers(pages)]
+        return "\n".join(t for t in parts if t)
+
+    # -------------------------------------------------------------------------
+    # TABLES
+    # -------------------------------------------------------------------------
+
+    def page_tables(self, page_no: int) -> List[list]:
+        """Raw tables (list of rows) of one page (0-based), extracted at most once."""
+        if page_no not in self._table_cache:
+            self._check_budget()
+            self._table_cache[page_no] = []
+            self._geometry_cache[page_no] = []
+            if self._pdf is None:
+                return self._table_cache[page_no]
+            try:
+                # Same detection as page.extract_tables(), keeping each table's geometry
+                found = self._pdf.pages[page_no].find_tables()
+                self._table_cache[page_no] = [table.extract() for table in found]
+                self._geometry_cache[page_no] = [
+                    (tuple(table.bbox), self._column_positions(table)) for table in found
+                ]
+            except Exception as e:
+                logger.debug(f"Table extraction failed on page {page_no + 1} of {self.pdf_path.name}: {e}")
+                self._table_cache[page_no] = []
+                self._geometry_cache[page_no] = []
+        return self._table_cache[page_no]
+
+    def tables(self, pages: Optional[Iterable[int]] = None) -> List[list]:
+        """Raw tables of the given pages (all pages by default), in page order."""
+        tables = []
+        for p in self._page_numbers(pages):
+            tables.extend(self.page_tables(p))
+        return tables
+
+    def table_geometry(self, page_no: int) -> List[Tuple[tuple, List[float]]]:
+        """(bbox, column x-positions) of each table page_tables() returned for a page."""
+        self.page_tables(page_no)
+        return self._geometry_cache.get(page_no, [])
+
+    @staticmethod
+    def _column_positions(table) -> List[float]:
+        """Column boundaries of a detected table: every cell's left edge plus the right edge."""
+        xs = {round(cell[0], 2) for cell in table.cells}
+        xs.add(round(table.bbox[2], 2))
+        return sorted(xs)
+
+    def region_tables(self, page_no: int, bbox: Tuple[float, float, float, float],
+                      columns: List[float]) -> List[list]:
+        """
+        Raw tables of one page cropped to `bbox`, with the column boundaries
+        given explicitly (only row lines are detected). Cached per region.
+        """
+        key = (page_no, tuple(bbox), tuple(columns))
+        if key not in self._region_cache:
+            self._check_budget()
+            self._region_cache[key] = []
+            if self._pdf is None:
+                return self._region_cache[key]
+            try:
+                page = self._pdf.pages[page_no]
+                # Clip to the page; crop() rejects boxes reaching outside it
+                x0, top, x1, bottom = bbox
+                px0, ptop, px1, pbottom = page.bbox
+                region = page.crop((max(x0, px0), max(top, ptop), min(x1, px1), min(bottom, pbottom)))
+                self._region_cache[key] = region.extract_tables({
+                    'vertical_strategy': 'explicit',
+                    'explicit_vertical_lines': list(columns),
+                    'horizontal_strategy': 'lines',
+                }) or []
+            except Exception as e:
+                logger.debug(f"Region table extraction failed on page {page_no + 1} of {self.pdf_path.name}: {e}")
+        return self._region_cache[key]
+
+    def extracted_tables(self) -> Dict[int, List[list]]:
+        """
+        Tables extracted so far, keyed by page (0-based); nothing is parsed here.
+        Full-page tables take precedence over region tables of the same page.
+        """
+        tables = {}
+        for (page_no, _bbox, _columns), page_tables in self._region_cache.items():
+            tables.setdefault(page_no, []).extend(page_tables)
+        tables.update(self._table_cache)
+        return tables
+
+    # -------------------------------------------------------------------------
+    # PAGE TARGETING
+    # -------------------------------------------------------------------------
+
+    def target_pages(self, keywords: Iterable[str], follow: int = 0) -> List[int]:
+        """
+        Pages (0-based, sorted) likely to contain any of `keywords`
+        (case-insensitive), found without text extraction.
+
+        A keyword matching outline titles targets each destination page plus
+        `follow` following pages; keywords with no outline match are looked
+        up in the raw content streams instead. Returns [] when nothing is found.
+        """
+        keywords = [k.lower() for k in keywords]
+        self.targeting_method = None
+        if self._pdf is None or not keywords:
+            return []
+
+        outline = self._outline_entries()
+        pages = set()
+        unmatched = []
+        for keyword in keywords:
+            hits = [page_no for title, page_no in outline if keyword in title]
+            for page_no in hits:
+                pages.update(range(page_no, min(page_no + follow + 1, self.page_count)))
+            if not hits:
+                unmatched.append(_compact_keyword(keyword))
+
+        methods = ['outline'] if pages else []
+        if unmatched:
+            scanned = [p for p in range(self.page_count)
+                       if any(k in self._page_stream_text(p) for k in unmatched)]
+            if scanned:
+                pages.update(scanned)
+                methods.append('content_stream')
+
+        self.targeting_method = '+'.join(methods) or None
+        return sorted(pages)
+
+    def _outline_entries(self) -> List[Tuple[str, int]]:
+        """(lowercased title, page) of every resolvable outline entry, read once."""
+        if self._outline is not None:
+            return self._outline
+
+        self._outline = []
+        try:
+            outlines = list(self._pdf.doc.get_outlines())
+        except Exception:
+            # PDFNoOutlines, or an outline tree too broken to walk
+            return self._outline
+
+        page_index = {page.page_obj.pageid: i for i, page in enumerate(self._pdf.pages)}
+        for _level, title, dest, action, _se in outlines:
+            page_no = self._resolve_outline_page(dest, action, page_index)
+            if title is None or page_no is None:
+                continue
+            if isinstance(title, bytes):
+                title = decode_text(title)
+            self._outline.append((str(title).lower(), page_no))
+
+        return self._outline
+
+    def _resolve_outline_page(self, dest, action, page_index: Dict[int, int]) -> Optional[int]:
+        """Page of an outline destination (explicit, named, or GoTo action)."""
+        try:
+            if dest is None and action is not None:
+                action = resolve1(action)
+                if isinstance(action, dict):
+                    dest = action.get('D')
+            dest = resolve1(dest)
+            if isinstance(dest, (str, bytes, PSLiteral)):
+                name = dest.name if isinstance(dest, PSLiteral) else dest
+                dest = resolve1(self._pdf.doc.get_dest(name))
+            if isinstance(dest, dict):
+                dest = resolve1(dest.get('D'))
+            if isinstance(dest, list) and dest:
+                return page_index.get(getattr(dest[0], 'objid', None))
+        except Exception as e:
+            logger.debug(f"Unresolvable outline destination in {self.pdf_path.name}: {e}")
+        return None
+
+    def _page_stream_text(self, page_no: int) -> bytes:
+        """Lowercased, whitespace-free literal strings of one page's content stream."""
+        if page_no not in self._stream_cache:
+            self._check_budget()
+            parts = []
+            try:
+                for stream in self._pdf.pages[page_no].page_obj.contents:
+                    data = resolve1(stream).get_data()
+                    parts.extend(m[1:-1] for m in _LITERAL_STRING.findall(data))
+            except Exception as e:
+                logger.debug(f"Content stream scan failed on page {page_no + 1} of {self.pdf_path.name}: {e}")
+            self._stream_cache[page_no] = _WHITESPACE.sub(b'', b''.join(parts)).lower()
+        return self._stream_cache[page_no]
@@ -7,15 +7,21 @@ Handles: Portfolio Statements, AAUM Reports, TER Disclosures
 Based on real samples from Aditya Birla Sun Life and SEBI-compliant formats.
 """
 
+import io
+import itertools
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 import re
 from sqlalchemy import create_engine, text
 import logging
 
+from Etl.workbook_reader import iter_workbook_sheets
+
 logger = logging.getLogger("mf.etl.real_world_parser")
 
 
@@ -30,8 +36,18 @@ class PortfolioStatementParser:
     - Footer: Sub-totals, Grand Total, Notes
     """
     
-    def __init__(self, db_url: str):
-        self.engine = create_engine(db_url, pool_pre_ping=True)
+    # Row markers, matched on the first column (header: on the joined row)
+    HEADER_PATTERN = r'name\s+of\s+(?:the\s+)?instrument'
+    HEADER_SCAN_ROWS = 50
+    LISTED_PATTERN = r'listed|awaiting\s+listing'
+    UNLISTED_PATTERN = r'unlisted'
+    TOTAL_PATTERN = r'total|sub-total|grand\s+total|^\^'
+    RATING_PATTERN = r'^[A-D]{1,3}[+-]?$|^AAA|^AA|^A$'
+    
+    def __init__(self, db_url: Optional[str]):
+        self.db_url = db_url
+        # Sheet workers only parse, so they are built without an engine
+        self.engine = create_engine(db_url, pool_pre_ping=True) if db_url else None
         self.section_keywords = {
             'EQUITY': ['equity', 'equity & equity related', 'shares'],
             'DEBT': ['debt', 'bonds', 'debentures'],
@@ -40,30 +56,88 @@ class PortfolioStatementParser:
         }
     
     def parse_portfolio_csv(self, file_path: Path, scheme_id: Optional[str] = None) -> Dict:
-        """Main entry point for portfolio parsing."""
+        """Main entry point for portfolio parsing (first sheet only, see parse_portfolio_workbook)."""
         logger.info(f"📊 Parsing portfolio from {file_path}")
         
-        # Auto-detect encoding
-        encodings = ['utf-8', 'cp1252', 'latin1', 'iso-8859-1']
-        df = None
+        try:
+            sheet_name, df = next(iter_workbook_sheets(file_path, header=0))
+        except StopIteration:
+            logger.error(f"No sheets in {file_path}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to read {file_path}: {e}")
+            return None
         
-        for encoding in encodings:
-            try:
-                if file_path.suffix.lower() == '.csv':
-                    df = pd.read_csv(file_path, encoding=encoding, dtype=str)
+        return self.parse_portfolio_frame(df, file_path, sheet_name)
+    
+    @staticmethod
+    @contextmanager
+    def sheet_pool(workers: int) -> Iterator[Optional[ProcessPoolExecutor]]:
+        """
+        Process pool for parse_portfolio_workbook, opened once per run by the
+        caller and shared by every workbook; yields None when workers <= 1.
+        """
+        if workers <= 1:
+            yield None
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sheet_worker) as pool:
+            yield pool
+    
+    def parse_portfolio_workbook(self, file_path: Path,
+                                 pool: Optional[ProcessPoolExecutor] = None) -> List[Dict]:
+        """
+        Parse every sheet of a (consolidated) portfolio workbook, one result
+        per scheme sheet. The workbook is opened once and streamed sheet by
+        sheet; with a pool (see sheet_pool) multi-sheet workbooks are parsed
+        in the worker processes, single-sheet ones inline. A sheet that fails
+        is logged and skipped, and sheets without holdings (index, notes,
+        disclaimers) are dropped.
+        """
+        logger.info(f"📊 Parsing portfolio workbook {file_path}")
+        
+        results = []
+        futures = []
+        
+        try:
+            sheets = iter_workbook_sheets(file_path, header=0)
+            
+            # Peek at two sheets: a worker round trip only pays off for several
+            head = list(itertools.islice(sheets, 2))
+            inline = pool is None or len(head) < 2
+            
+            for name, df in itertools.chain(head, sheets):
+                if inline:
+                    results.append(self._parse_sheet(df, file_path, name))
                 else:
-                    df = pd.read_excel(file_path, dtype=str)
-                break
-            except UnicodeDecodeError:
-                continue
+                    # Sheets are submitted while the next one is still being read
+                    futures.append((name, pool.submit(_parse_sheet_in_worker, df, str(file_path), name)))
+        
+        except Exception as e:
+            # Sheets read before the failure are still parsed
+            logger.error(f"Failed to read {file_path}: {e}")
+        
+        for name, future in futures:
+            try:
+                results.append(future.result())
             except Exception as e:
-                logger.error(f"Failed to read {file_path}: {e}")
-                return None
+                logger.error(f"Failed to parse sheet '{name}' of {Path(file_path).name}: {e}")
         
-        if df is None:
-            logger.error(f"Could not read file with any encoding")
+        results = [r for r in results if r and r['holdings']]
+        logger.info(f"✅ {len(results)} scheme sheets with holdings in {Path(file_path).name}")
+        return results
+    
+    def _parse_sheet(self, df: pd.DataFrame, file_path: Path, sheet_name: str) -> Optional[Dict]:
+        """parse_portfolio_frame for one workbook sheet; a bad sheet doesn't stop the others."""
+        try:
+            return self.parse_portfolio_frame(df, file_path, sheet_name)
+        except Exception as e:
+            logger.error(f"Failed to parse sheet '{sheet_name}' of {Path(file_path).name}: {e}")
             return None
-        
+    
+    def parse_portfolio_frame(self, df: pd.DataFrame, file_path: Path,
+                              sheet_name: Optional[str] = None) -> Dict:
+        """Parse one sheet (header row promoted to columns) into a portfolio result."""
         # Extract metadata
         scheme_info = self.extract_scheme_metadata(df)
         
@@ -77,6 +151,8 @@ class PortfolioStatementParser:
             'scheme_info': scheme_info,
             'holdings': holdings,
             'validation': validation,
+            'source_file': str(file_path),
+            'sheet_name': sheet_name,
             'summary': {
                 'total_holdings': len(holdings),
                 'total_market_value_lakhs': sum(h.get('market_value', 0) or 0 for h in holdings),
@@ -138,24 +214,26 @@ class PortfolioStatementParser:
         return metadata
     
     def extract_holdings(self, df: pd.DataFrame, scheme_info: Dict) -> List[Dict]:
-        """Extract security holdings with section tracking."""
+        """
+        Extract security holdings with section tracking.
+        
+        Rows are classified with vectorized masks on the first column:
+        section headers set the asset class and listed/unlisted rows the
+        sub-category (both forward-filled), totals and notes are dropped in
+        one filter and nothing after the grand total is read.
+        """
         holdings = []
         
         # Find header row
-        header_row_idx = None
-        for idx, row in df.iterrows():
-            row_str = ' '.join(row.fillna('').astype(str).values)
-            if re.search(r'name\s+of\s+(the\s+)?instrument', row_str, re.IGNORECASE):
-                header_row_idx = idx
-                break
+        header_pos = self._find_header_row(df)
         
-        if header_row_idx is None:
+        if header_pos is None:
             logger.error("❌ Could not find 'Name of the Instrument' header")
             return holdings
         
         # Set column names
-        df.columns = df.iloc[header_row_idx].fillna('').values
-        data_start = header_row_idx + 1
+        df.columns = df.iloc[header_pos].fillna('').values
+        body = df.iloc[header_pos + 1:]
         
         # Map columns
         col_map = self._map_columns(df.columns)
@@ -164,46 +242,128 @@ class PortfolioStatementParser:
             logger.error("❌ Could not identify security name column")
             return holdings
         
+        first_col = body.iloc[:, 0].fillna('').astype(str).str.strip()
+        first_lower = first_col.str.lower()
+        
+        # Skip empty rows
+        non_empty = (first_col != '') & (first_col != 'nan')
+        
+        # Detect section changes (first matching asset class wins)
+        class_masks = [
+            first_lower.str.contains('|'.join(re.escape(kw) for kw in keywords), regex=True).to_numpy()
+            for keywords in self.section_keywords.values()
+        ]
+        section_class = pd.Series(
+            np.select(class_masks, list(self.section_keywords.keys()), default=None),
+            index=body.index, dtype=object
+        )
+        is_section = non_empty & section_class.notna()
+        
+        # Detect sub-categories (checked in the same order as the section chain)
+        remaining = non_empty & ~is_section
+        is_listed = remaining & first_col.str.contains(self.LISTED_PATTERN, case=False, regex=True)
+        is_unlisted = remaining & ~is_listed & first_col.str.contains(self.UNLISTED_PATTERN, case=False, regex=True)
+        
+        # Totals and notes
+        remaining = remaining & ~is_listed & ~is_unlisted
+        is_total = remaining & first_col.str.contains(self.TOTAL_PATTERN, case=False, regex=True)
+        
         # Track current section
-        current_asset_class = None
-        current_sub_category = None
+        asset_class = section_class.where(is_section).ffill()
+        sub_category = pd.Series(
+            np.select([is_listed.to_numpy(), is_unlisted.to_numpy()], ['LISTED', 'UNLISTED'], default=None),
+            index=body.index, dtype=object
+        ).ffill()
         
-        for idx in range(data_start, len(df)):
-            row = df.iloc[idx]
-            first_col = str(row.iloc[0]).strip()
-            
-            # Skip empty rows
-            if not first_col or first_col == 'nan':
-                continue
-            
-            # Detect section changes
-            detected_class = self._detect_asset_class(first_col)
-            if detected_class:
-                current_asset_class = detected_class
-                continue
-            
-            # Detect sub-categories
-            if re.search(r'listed|awaiting\s+listing', first_col, re.IGNORECASE):
-                current_sub_category = 'LISTED'
-                continue
-            elif re.search(r'unlisted', first_col, re.IGNORECASE):
-                current_sub_category = 'UNLISTED'
-                continue
-            
-            # Skip totals and notes
-            if re.search(r'total|sub-total|grand\s+total|^\^', first_col, re.IGNORECASE):
-                if 'grand total' in first_col.lower():
-                    break  # Stop at grand total
-                continue
-            
+        is_holding = (remaining & ~is_total).to_numpy(copy=True)
+        
+        # Stop at grand total
+        grand_total = (is_total & first_lower.str.contains('grand total', regex=False)).to_numpy()
+        if grand_total.any():
+            is_holding[np.argmax(grand_total):] = False
+        
+        if not is_holding.any():
+            return holdings
+        
+        rows = body[is_holding]
+        fields = self._holding_fields(rows, col_map)
+        
+        asset_classes = asset_class[is_holding].to_numpy()
+        sub_categories = sub_category[is_holding].to_numpy()
+        
+        for record, cls, sub in zip(fields.to_dict('records'), asset_classes, sub_categories):
             # Parse holding
-            holding = self._parse_holding_row(row, col_map, current_asset_class, current_sub_category)
+            holding = {
+                'asset_class': cls if pd.notna(cls) else None,
+                'listing_status': sub if pd.notna(sub) else None
+            }
+            # NaN != NaN: drop values that failed validation / conversion
+            holding.update({key: value for key, value in record.items() if value == value})
             
-            if holding and holding.get('security_name'):
+            if holding.get('security_name'):
                 holdings.append(holding)
         
         return holdings
     
+    def _find_header_row(self, df: pd.DataFrame) -> Optional[int]:
+        """Position of the first row whose joined text names the instrument column."""
+        # The header is almost always near the top; only join the rest if it isn't
+        for rows in (slice(0, self.HEADER_SCAN_ROWS), slice(self.HEADER_SCAN_ROWS, None)):
+            cells = df.iloc[rows].fillna('').astype(str)
+            if cells.empty:
+                continue
+            row_text = cells.iloc[:, 0]
+            if cells.shape[1] > 1:
+                row_text = row_text.str.cat([cells.iloc[:, i] for i in range(1, cells.shape[1])], sep=' ')
+            hits = np.flatnonzero(row_text.str.contains(self.HEADER_PATTERN, case=False, regex=True).to_numpy())
+            if len(hits):
+                return int(hits[0]) + (rows.start or 0)
+        return None
+    
+    def _holding_fields(self, rows: pd.DataFrame, col_map: Dict) -> pd.DataFrame:
+        """
+        Column-wise equivalent of _parse_holding_row for all holding rows:
+        one cleaning pass and one numeric conversion per column. Values that
+        fail validation or conversion are left as NaN.
+        """
+        def column(field: str) -> pd.Series:
+            values = rows[col_map[field]]
+            if isinstance(values, pd.DataFrame):
+                # Duplicate header label: use the last one, like the column map
+                values = values.iloc[:, -1]
+            return values.fillna('').astype(str).str.strip()
+        
+        def present(values: pd.Series) -> pd.Series:
+            return (values != '') & (values != 'nan')
+        
+        fields = {}
+        
+        # Security name
+        name = column('security_name')
+        fields['security_name'] = name.where(present(name))
+        
+        # ISIN validation
+        if col_map['isin']:
+            isin = column('isin').str.upper()
+            fields['isin_code'] = isin.where((isin.str.len() == 12) & isin.str.startswith('IN'))
+        
+        # Industry/Rating
+        if col_map['industry']:
+            industry = column('industry')
+            has_industry = present(industry)
+            fields['industry_sector'] = industry.where(has_industry)
+            fields['rating'] = industry.where(has_industry & industry.str.match(self.RATING_PATTERN))
+        
+        # Quantity / Market Value in Lakhs (remove commas), Percentage (remove %)
+        for field, target, strip_char in (('quantity', 'quantity', ','),
+                                          ('market_value', 'market_value', ','),
+                                          ('percentage', 'portfolio_percentage', '%')):
+            if col_map[field]:
+                cleaned = column(field).str.replace(strip_char, '', regex=False).str.strip()
+                fields[target] = pd.to_numeric(cleaned, errors='coerce').astype(float)
+        
+        return pd.DataFrame(fields, index=rows.index)
+    
     def _map_columns(self, columns: pd.Index) -> Dict:
         """Map DataFrame columns to standard fields."""
         col_map = {
@@ -333,20 +493,169 @@ class PortfolioStatementParser:
         
         return validation
     
-    def save_to_database(self, portfolio_data: Dict, scheme_id: str):
-        """Save parsed portfolio to database."""
+    def save_to_database(self, portfolio_data: Dict, scheme_id: str, bulk: bool = True):
+        """
+        Save parsed portfolio to database.
+        
+        The bulk path COPYs all holdings in one statement and diverts rows that
+        would violate portfolio_holdings_raw constraints to
+        portfolio_holdings_raw_rejects; bulk=False inserts row by row.
+        """
         if not portfolio_data or not portfolio_data.get('holdings'):
             logger.warning("No data to save")
             return
         
         scheme_info = portfolio_data['scheme_info']
-        holdings = portfolio_data['holdings']
         as_of_date = scheme_info.get('as_of_date')
         
         if not as_of_date:
             logger.error("Missing as_of_date - cannot save")
             return
         
+        if bulk:
+            try:
+                self._save_bulk(portfolio_data, scheme_id, as_of_date)
+                return
+            except Exception as e:
+                logger.error(f"Bulk COPY failed, falling back to row inserts: {e}")
+        
+        self._save_row_by_row(portfolio_data, scheme_id, as_of_date)
+    
+    # -------------------------------------------------------------------------
+    # BULK COPY
+    # -------------------------------------------------------------------------
+    
+    # portfolio_holdings_raw columns written by the bulk path, in COPY order
+    BULK_COLUMNS = [
+        'scheme_id', 'as_of_date',
+        'security_name', 'isin_code',
+        'security_type', 'asset_class', 'listing_status',
+        'industry_sector', 'rating',
+        'quantity', 'market_value', 'portfolio_percentage',
+        'extraction_confidence', 'source_file'
+    ]
+    
+    # Staging mirrors portfolio_holdings_raw without its constraints, so COPY
+    # itself never fails on a bad row
+    STAGE_DDL = """
+        CREATE TEMP TABLE portfolio_holdings_stage (
+            row_no INTEGER,
+            scheme_id TEXT,
+            as_of_date DATE,
+            security_name TEXT,
+            isin_code TEXT,
+            security_type TEXT,
+            asset_class TEXT,
+            listing_status TEXT,
+            industry_sector TEXT,
+            rating TEXT,
+            quantity NUMERIC,
+            market_value NUMERIC,
+            portfolio_percentage NUMERIC,
+            extraction_confidence NUMERIC,
+            source_file TEXT,
+            reject_reason TEXT
+        ) ON COMMIT DROP
+    """
+    
+    # First violated constraint of portfolio_holdings_raw, if any
+    STAGE_CLASSIFY_SQL = """
+        UPDATE portfolio_holdings_stage
+        SET reject_reason = CASE
+            WHEN security_name IS NULL THEN 'security_name is null'
+            WHEN as_of_date IS NULL THEN 'as_of_date is null'
+            WHEN length(isin_code) > 12 THEN 'isin_code longer than 12'
+            WHEN abs(quantity) >= 1e16 THEN 'quantity exceeds NUMERIC(20,4)'
+            WHEN abs(market_value) >= 1e18 THEN 'market_value exceeds NUMERIC(20,2)'
+            WHEN abs(portfolio_percentage) >= 1e4 THEN 'portfolio_percentage exceeds NUMERIC(10,6)'
+        END
+    """
+    
+    STAGE_INSERT_SQL = """
+        INSERT INTO portfolio_holdings_raw (
+            scheme_id, as_of_date,
+            security_name, isin_code,
+            security_type, asset_class, listing_status,
+            industry_sector, rating,
+            quantity, market_value, portfolio_percentage,
+            extraction_confidence, source_file, created_at
+        )
+        SELECT scheme_id, as_of_date,
+               security_name, isin_code,
+               security_type, asset_class, listing_status,
+               industry_sector, rating,
+               quantity, market_value, portfolio_percentage,
+               extraction_confidence, source_file, now()
+        FROM portfolio_holdings_stage
+        WHERE reject_reason IS NULL
+        ORDER BY row_no
+    """
+    
+    STAGE_REJECT_SQL = """
+        INSERT INTO portfolio_holdings_raw_rejects (
+            scheme_id, as_of_date, source_file, row_no, reject_reason, raw_data
+        )
+        SELECT scheme_id, as_of_date, source_file, row_no, reject_reason,
+               to_jsonb(s) - 'reject_reason'
+        FROM portfolio_holdings_stage s
+        WHERE reject_reason IS NOT NULL
+    """
+    
+    def _holdings_frame(self, portfolio_data: Dict, scheme_id: str, as_of_date) -> pd.DataFrame:
+        """Typed frame of all holdings in BULK_COLUMNS order (plus row_no)."""
+        frame = pd.DataFrame.from_records(
+            portfolio_data['holdings'],
+            columns=['security_name', 'isin_code', 'asset_class', 'listing_status',
+                     'industry_sector', 'rating', 'quantity', 'market_value',
+                     'portfolio_percentage']
+        )
+        
+        frame['scheme_id'] = scheme_id
+        frame['as_of_date'] = as_of_date
+        frame['security_type'] = frame['asset_class']
+        frame['extraction_confidence'] = 0.95
+        frame['source_file'] = str(portfolio_data.get('source_file', ''))
+        
+        for col in ('quantity', 'market_value', 'portfolio_percentage'):
+            # inf is not a valid NUMERIC on older servers; store it as NULL
+            frame[col] = pd.to_numeric(frame[col], errors='coerce').replace([np.inf, -np.inf], np.nan)
+        
+        frame = frame[self.BULK_COLUMNS]
+        frame.insert(0, 'row_no', np.arange(1, len(frame) + 1))
+        return frame
+    
+    def _save_bulk(self, portfolio_data: Dict, scheme_id: str, as_of_date):
+        """COPY all holdings into a staging table, then insert / divert them set-wise."""
+        frame = self._holdings_frame(portfolio_data, scheme_id, as_of_date)
+        
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        
+        columns = ', '.join(['row_no'] + self.BULK_COLUMNS)
+        
+        with self.engine.begin() as conn:
+            conn.execute(text(self.STAGE_DDL))
+            
+            cursor = conn.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY portfolio_holdings_stage ({columns}) FROM STDIN WITH CSV", buffer
+                )
+            finally:
+                cursor.close()
+            
+            conn.execute(text(self.STAGE_CLASSIFY_SQL))
+            saved_count = conn.execute(text(self.STAGE_INSERT_SQL)).rowcount
+            rejected_count = conn.execute(text(self.STAGE_REJECT_SQL)).rowcount
+        
+        logger.info(f"💾 Saved {saved_count}/{len(frame)} holdings to database (COPY)")
+        if rejected_count:
+            logger.warning(f"⚠️  {rejected_count} holdings diverted to portfolio_holdings_raw_rejects")
+    
+    def _save_row_by_row(self, portfolio_data: Dict, scheme_id: str, as_of_date):
+        """One INSERT per holding."""
+        holdings = portfolio_data['holdings']
         saved_count = 0
         
         with self.engine.begin() as conn:
@@ -398,51 +707,62 @@ class AaumReportParser:
     Parses Monthly AAUM reports in SEBI grid format.
     
     Format: Multi-level grid with T30/B30, Direct/Distributor, Investor categories.
+    Grid columns 1-60: three distribution channels of 20 columns each, every
+    channel split into T30 (first 10) and B30 (next 10) investor buckets;
+    the last column holds the scheme's grand total.
     """
     
+    GRID_COLUMNS = 60
+    CHANNELS = ('DIRECT', 'ASSOCIATE_DISTRIBUTOR', 'NON_ASSOCIATE_DISTRIBUTOR')
+    CITY_CLASSES = ('T30', 'B30')
+    BUCKETS = 10
+    
     def __init__(self, db_url: str):
         self.engine = create_engine(db_url, pool_pre_ping=True)
     
     def parse_aaum_csv(self, file_path: Path) -> Dict:
-        """Parse AAUM report."""
+        """
+        Parse AAUM report. Every sheet holding a 'Scheme Category' grid is
+        parsed (workbook opened once); schemes and breakdowns are combined.
+        """
         logger.info(f"📊 Parsing AAUM from {file_path}")
         
-        # Read with auto-encoding
-        df = self._read_file(file_path)
-        if df is None:
-            return None
+        header_info = None
+        schemes_data = []
+        breakdowns = []
         
-        # Extract metadata
-        header_info = self.extract_aaum_header(df)
+        try:
+            for sheet_name, df in iter_workbook_sheets(file_path):
+                if df.empty:
+                    continue
+                
+                # Extract metadata (first sheet)
+                if header_info is None:
+                    header_info = self.extract_aaum_header(df)
+                
+                # Parse grid (numeric block decoded once for totals and breakdown)
+                grid = self._decode_aaum_grid(df)
+                if grid is None:
+                    continue
+                
+                schemes_data.extend(self._scheme_totals(grid))
+                breakdowns.append(self._breakdown_frame(grid).assign(sheet_name=sheet_name))
         
-        # Parse grid
-        schemes_data = self.parse_aaum_grid(df)
+        except Exception as e:
+            logger.error(f"Failed to read: {e}")
+            return None
+        
+        if header_info is None:
+            return None
         
         logger.info(f"✅ Extracted {len(schemes_data)} schemes")
         
         return {
             'header_info': header_info,
-            'schemes': schemes_data
+            'schemes': schemes_data,
+            'breakdown': pd.concat(breakdowns, ignore_index=True) if breakdowns else self._breakdown_frame(None)
         }
     
-    def _read_file(self, file_path: Path) -> Optional[pd.DataFrame]:
-        """Read file with encoding fallback."""
-        encodings = ['utf-8', 'cp1252', 'latin1']
-        
-        for encoding in encodings:
-            try:
-                if file_path.suffix.lower() == '.csv':
-                    return pd.read_csv(file_path, encoding=encoding, dtype=str, header=None)
-                else:
-                    return pd.read_excel(file_path, dtype=str, header=None)
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                logger.error(f"Failed to read: {e}")
-                return None
-        
-        return None
-    
     def extract_aaum_header(self, df: pd.DataFrame) -> Dict:
         """Extract AMC name and date."""
         header = {}
@@ -473,96 +793,136 @@ class AaumReportParser:
         return header
     
     def parse_aaum_grid(self, df: pd.DataFrame) -> List[Dict]:
-        """Parse SEBI grid structure."""
-        schemes = []
+        """
+        Parse SEBI grid structure into per-scheme totals.
         
-        # Find data start
-        data_start_idx = None
-        for idx, row in df.iterrows():
-            if 'Scheme Category' in str(row.iloc[0]):
-                data_start_idx = idx
-                break
+        The 60-column numeric block is decoded once into a float matrix;
+        channel and T30/B30 totals are slice sums over it.
+        """
+        return self._scheme_totals(self._decode_aaum_grid(df))
+    
+    def parse_aaum_breakdown(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Full long-format AAUM breakdown: one row per scheme and grid cell with
+        its distribution channel, T30/B30 city class and investor bucket
+        (bucket label taken from the grid's sub-header row when present).
+        """
+        return self._breakdown_frame(self._decode_aaum_grid(df))
+    
+    def _scheme_totals(self, grid: Optional[Tuple]) -> List[Dict]:
+        """Per-scheme channel and T30/B30 totals from a decoded grid."""
+        if grid is None:
+            return []
         
-        if data_start_idx is None:
-            logger.warning("Could not find 'Scheme Category' row")
-            return schemes
+        rows, categories, matrix, grand_totals, _labels = grid
         
-        # Parse rows
-        current_category = None
+        # (scheme, channel, city class, bucket)
+        cube = matrix.reshape(len(rows), len(self.CHANNELS), len(self.CITY_CLASSES), self.BUCKETS)
+        channel_totals = cube.sum(axis=(2, 3))
+        city_totals = cube.sum(axis=(1, 3))
         
-        for idx in range(data_start_idx + 2, len(df)):
-            row = df.iloc[idx]
-            first_col = str(row.iloc[0]).strip()
-            
-            if not first_col or first_col == 'nan':
-                continue
-            
-            # Category markers
-            if re.match(r'^[A-Z]$|^\([ivx]+\)$', first_col):
-                current_category = first_col
-                continue
-            
-            # Skip totals
-            if 'total' in first_col.lower():
-                continue
-            
-            # Parse scheme row
-            scheme_data = self._parse_aaum_scheme_row(row, current_category)
-            if scheme_data:
-                schemes.append(scheme_data)
+        schemes = []
+        for i, (scheme_name, category) in enumerate(zip(rows, categories)):
+            schemes.append({
+                'scheme_name': scheme_name,
+                'category': category,
+                'total_aum_crores': float(grand_totals[i]),
+                'direct_plan_aum': float(channel_totals[i, 0]),
+                'associate_distributor_aum': float(channel_totals[i, 1]),
+                'non_associate_distributor_aum': float(channel_totals[i, 2]),
+                't30_cities_aum': float(city_totals[i, 0]),
+                'b30_cities_aum': float(city_totals[i, 1])
+            })
         
         return schemes
     
-    def _parse_aaum_scheme_row(self, row: pd.Series, category: str) -> Optional[Dict]:
-        """Parse single AAUM scheme row."""
-        scheme_name = str(row.iloc[0]).strip()
+    def _breakdown_frame(self, grid: Optional[Tuple]) -> pd.DataFrame:
+        """Long-format frame of every grid cell from a decoded grid."""
+        columns = ['scheme_name', 'category', 'channel', 'city_class',
+                   'bucket', 'bucket_label', 'grid_column', 'aum']
+        if grid is None:
+            return pd.DataFrame(columns=columns)
+        
+        rows, categories, matrix, _grand_totals, labels = grid
+        n_rows, n_cols = matrix.shape
+        
+        # Grid column j (1-based) -> channel / city class / bucket
+        offsets = np.arange(n_cols)
+        channel_idx = offsets // (len(self.CITY_CLASSES) * self.BUCKETS)
+        city_idx = (offsets // self.BUCKETS) % len(self.CITY_CLASSES)
+        
+        return pd.DataFrame({
+            'scheme_name': np.repeat(np.asarray(rows, dtype=object), n_cols),
+            'category': np.repeat(np.asarray(categories, dtype=object), n_cols),
+            'channel': np.tile(np.asarray(self.CHANNELS, dtype=object)[channel_idx], n_rows),
+            'city_class': np.tile(np.asarray(self.CITY_CLASSES, dtype=object)[city_idx], n_rows),
+            'bucket': np.tile(offsets % self.BUCKETS + 1, n_rows),
+            'bucket_label': np.tile(np.asarray(labels, dtype=object), n_rows),
+            'grid_column': np.tile(offsets + 1, n_rows),
+            'aum': matrix.ravel()
+        }, columns=columns)
+    
+    def _decode_aaum_grid(self, df: pd.DataFrame) -> Optional[Tuple[List[str], List[Optional[str]], np.ndarray, np.ndarray, List[str]]]:
+        """
+        Locate scheme rows and decode the numeric grid once.
         
-        if not scheme_name or scheme_name == 'nan':
+        Returns:
+            (scheme_names, categories, matrix[n, 60], grand_totals[n], bucket_labels[60])
+            or None when the grid header is missing or has no sub-header row below it.
+        """
+        first_col = df.iloc[:, 0].fillna('').astype(str).str.strip()
+        
+        # Find data start
+        header_hits = np.flatnonzero(first_col.str.contains('Scheme Category', regex=False).to_numpy())
+        if not len(header_hits):
+            logger.warning("Could not find 'Scheme Category' row")
+            return None
+        data_start = header_hits[0]
+        if data_start + 1 >= len(df):
+            logger.warning("'Scheme Category' row has no bucket sub-header below it")
             return None
         
-        # Grand total (last column)
-        try:
-            grand_total = float(str(row.iloc[-1]).replace(',', ''))
-        except:
-            grand_total = 0
-        
-        # Simplified breakup (full implementation would parse all 60 columns)
-        scheme_data = {
-            'scheme_name': scheme_name,
-            'category': category,
-            'total_aum_crores': grand_total,
-            'direct_plan_aum': self._sum_columns(row, 1, 20),
-            'associate_distributor_aum': self._sum_columns(row, 21, 40),
-            'non_associate_distributor_aum': self._sum_columns(row, 41, 60),
-            't30_cities_aum': self._sum_t30(row),
-            'b30_cities_aum': self._sum_b30(row)
-        }
+        body_first = first_col.iloc[data_start + 2:]
+        non_empty = (body_first != '') & (body_first != 'nan')
+        
+        # Category markers (forward-filled onto the scheme rows below them)
+        is_category = non_empty & body_first.str.match(r'^[A-Z]$|^\([ivx]+\)$')
+        categories = body_first.where(is_category).ffill()
+        
+        # Skip totals
+        is_scheme = (non_empty & ~is_category
+                     & ~body_first.str.lower().str.contains('total', regex=False)).to_numpy()
+        
+        body = df.iloc[data_start + 2:][is_scheme]
+        names = body_first[is_scheme].tolist()
+        categories = [c if isinstance(c, str) else None for c in categories[is_scheme]]
         
-        return scheme_data
+        matrix = self._numeric_matrix(body.iloc[:, 1:self.GRID_COLUMNS + 1], width=self.GRID_COLUMNS)
+        grand_totals = self._numeric_matrix(body.iloc[:, -1:])[:, 0]
+        
+        # Bucket labels from the sub-header row right above the data
+        label_cells = df.iloc[data_start + 1, 1:self.GRID_COLUMNS + 1].fillna('').astype(str).str.strip().tolist()
+        labels = [label_cells[j] if j < len(label_cells) and label_cells[j] not in ('', 'nan')
+                  else f"bucket_{j % self.BUCKETS + 1}"
+                  for j in range(self.GRID_COLUMNS)]
+        
+        return names, categories, matrix, grand_totals, labels
     
-    def _sum_columns(self, row: pd.Series, start: int, end: int) -> float:
-        """Sum column range."""
-        total = 0
-        for i in range(start, min(end + 1, len(row))):
-            try:
-                val = str(row.iloc[i]).replace(',', '').strip()
-                if val and val != 'nan':
-                    total += float(val)
-            except:
-                pass
-        return total
-    
-    def _sum_t30(self, row: pd.Series) -> float:
-        """Sum T30 columns."""
-        return (self._sum_columns(row, 1, 10) + 
-                self._sum_columns(row, 21, 30) + 
-                self._sum_columns(row, 41, 50))
-    
-    def _sum_b30(self, row: pd.Series) -> float:
-        """Sum B30 columns."""
-        return (self._sum_columns(row, 11, 20) + 
-                self._sum_columns(row, 31, 40) + 
-                self._sum_columns(row, 51, 60))
+    def _numeric_matrix(self, block: pd.DataFrame, width: Optional[int] = None) -> np.ndarray:
+        """
+        Decode a block of grid cells into floats in one vectorized pass:
+        thousands separators removed, unparseable / empty cells -> 0.
+        Blocks narrower than `width` are zero-padded on the right.
+        """
+        n_rows, n_cols = block.shape
+        cells = pd.Series(block.to_numpy(dtype=object).ravel())
+        cleaned = cells.fillna('').astype(str).str.replace(',', '', regex=False).str.strip()
+        values = pd.to_numeric(cleaned, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        matrix = values.reshape(n_rows, n_cols)
+        
+        if width and n_cols < width:
+            matrix = np.pad(matrix, ((0, 0), (0, width - n_cols)))
+        return matrix
 
 
 class ExpenseRatioParser:
@@ -685,3 +1045,24 @@ def process_all_files(portfolio_file: Path, aaum_file: Path, ter_file: Path,
     
     logger.info("🎉 All files processed")
     return results
+
+
+# -------------------------------------------------------------------------
+# SHEET WORKERS
+# -------------------------------------------------------------------------
+
+_sheet_parser: Optional[PortfolioStatementParser] = None
+
+
+def _init_sheet_worker():
+    """Pool initializer: each worker process gets its own (engine-less) parser."""
+    global _sheet_parser
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+    )
+    _sheet_parser = PortfolioStatementParser(None)
+
+
+def _parse_sheet_in_worker(df: pd.DataFrame, file_path: str, sheet_name: str) -> Optional[Dict]:
+    return _sheet_parser._parse_sheet(df, Path(file_path), sheet_name)
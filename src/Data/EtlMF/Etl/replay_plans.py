@@ -0,0 +1,320 @@
+# Etl/replay_plans.py
+"""
+Record-and-Replay Crawl Plans
+-----------------------------
+During a successful browser crawl, captures the request that actually
+produced each download and stores it as a replay plan; later runs replay
+it over plain HTTP and only drive the browser when replay fails.
+
+- Capture  : RequestRecorder listens to a page's requests / responses. For a
+             download it resolves the originating request (method, URL,
+             form / JSON body, content type). For blob: downloads built by
+             page script, it uses the XHR / fetch call whose response was a
+             document, i.e. the API behind the button.
+- Template : period tokens in URL and body (dates and month names of the
+             disclosure month = last day of the previous month) become
+             {{strftime}} placeholders, e.g. "30-11-2025" -> "{{%d-%m-%Y}}",
+             "NOV" -> "{{%b|upper}}"
+- Check    : a plan is only stored when every date-like token was templated
+             for the disclosure period (a page still showing the previous
+             month would otherwise give "31-10-{{%Y}}", replayed for months)
+- Replay   : placeholders are rendered for the current period
+
+Plans are one JSON file per (AMC, doc_type):
+    <plan_dir>/<amc_key>__<doc_type>.json
+"""
+
+import json
+import logging
+import os
+import re
+from collections import deque
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote_plus
+
+logger = logging.getLogger("mf.etl.replay_plans")
+
+# Longest / most specific formats first; month-only numbers are too
+# ambiguous to template and are left alone
+PERIOD_FORMATS = [
+    '%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d', '%d.%m.%Y', '%d-%b-%Y', '%d %B %Y',
+    '%Y%m%d', '%d%m%Y',
+    '%B-%Y', '%B %Y', '%b-%Y', '%b %Y', '%B_%Y', '%b_%Y',
+    '%Y/%m', '%Y-%m', '%m-%Y', '%Y_%m',
+    '%B', '%b', '%Y',
+]
+
+# Request headers worth replaying (never cookies / auth)
+REPLAY_HEADERS = ('content-type', 'accept', 'referer', 'x-requested-with')
+
+DOCUMENT_CONTENT_TYPES = (
+    'application/pdf', 'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/zip', 'application/x-zip-compressed', 'application/octet-stream',
+    'text/csv',
+)
+
+_PLACEHOLDER = re.compile(r'\{\{(%[^|}]+)(?:\|(upper|lower))?\}\}')
+
+_MONTH = (r'(?:january|february|march|april|may|june|july|august|september|october|november|december'
+          r'|jan|feb|mar|apr|jun|jul|aug|sept|sep|oct|nov|dec)')
+
+# Date-like text of any period (longest shapes first)
+DATE_LIKE = re.compile('|'.join([
+    r'(?<!\d)\d{1,2}[-/._ ]\d{1,2}[-/._ ]\d{4}(?!\d)',
+    r'(?<!\d)\d{4}[-/._]\d{1,2}[-/._]\d{1,2}(?!\d)',
+    rf'(?<![a-z\d])(?:\d{{1,2}}[-/._ ]?)?{_MONTH}[-/._, ]*\d{{4}}(?!\d)',
+    r'(?<!\d)(?:19|20)\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])(?!\d)',
+    r'(?<!\d)(?:0[1-9]|[12]\d|3[01])(?:0[1-9]|1[0-2])(?:19|20)\d{2}(?!\d)',
+    r'(?<!\d)(?:19|20)\d{2}[-/_](?:0?[1-9]|1[0-2])(?!\d)',
+    r'(?<!\d)(?:0?[1-9]|1[0-2])[-/_](?:19|20)\d{2}(?!\d)',
+    rf'(?<![a-z]){_MONTH}(?![a-z])',
+    r'(?<!\d)(?:19|20)\d{2}(?!\d)',
+]), re.IGNORECASE)
+
+# Period no real disclosure uses; a clean template renders only its tokens
+PROBE_PERIOD = date(1987, 7, 31)
+
+
+def disclosure_period(today: Optional[date] = None) -> date:
+    """Last day of the previous month - the period the crawl steps target."""
+    today = today or date.today()
+    return today.replace(day=1) - timedelta(days=1)
+
+
+def _token_pattern(token: str) -> re.Pattern:
+    """Token not glued to another letter (alpha edge) / digit (digit edge) - 'nov' != 'innovation'."""
+    left = r'(?<![A-Za-z])' if token[0].isalpha() else r'(?<!\d)'
+    right = r'(?![A-Za-z])' if token[-1].isalpha() else r'(?!\d)'
+    return re.compile(left + re.escape(token) + right, re.IGNORECASE)
+
+
+def templatize(value: Optional[str], period: date) -> Optional[str]:
+    """Replace the period's date / month tokens in a recorded value with placeholders."""
+    if not value:
+        return value
+
+    for fmt in PERIOD_FORMATS:
+        token = period.strftime(fmt)
+
+        def placeholder(match, fmt=fmt, token=token):
+            text = match.group(0)
+            if text == token:
+                return f"{{{{{fmt}}}}}"
+            if text == token.upper():
+                return f"{{{{{fmt}|upper}}}}"
+            if text == token.lower():
+                return f"{{{{{fmt}|lower}}}}"
+            return text  # mixed case - leave as recorded
+
+        value = _token_pattern(token).sub(placeholder, value)
+    return value
+
+
+def stray_dates(template: Optional[str]) -> List[str]:
+    """
+    Date-like text a template would not render for a new period: dates of
+    another period left as recorded, or partly templated ones such as
+    "31-10-{{%Y}}". Found by rendering for PROBE_PERIOD - anything date-like
+    that is not a whole PROBE_PERIOD token did not come from a placeholder.
+    Percent-escapes are decoded first ("%202025" hides the year 2025).
+    """
+    if not template:
+        return []
+
+    probe_tokens = {PROBE_PERIOD.strftime(fmt).lower() for fmt in PERIOD_FORMATS}
+    rendered = unquote_plus(render(template, PROBE_PERIOD))
+    return [match.group(0) for match in DATE_LIKE.finditer(rendered)
+            if match.group(0).lower() not in probe_tokens]
+
+
+def render(template: Optional[str], period: date) -> Optional[str]:
+    """Fill {{strftime}} placeholders for a period."""
+    if not template:
+        return template
+
+    def fill(match):
+        text = period.strftime(match.group(1))
+        if match.group(2) == 'upper':
+            return text.upper()
+        if match.group(2) == 'lower':
+            return text.lower()
+        return text
+
+    return _PLACEHOLDER.sub(fill, template)
+
+
+def is_document_response(headers: Dict[str, str]) -> bool:
+    """Response headers of a file download (not a page / JSON)."""
+    content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+    return (content_type in DOCUMENT_CONTENT_TYPES
+            or 'attachment' in headers.get('content-disposition', '').lower())
+
+
+class RequestRecorder:
+    """
+    Recent requests of one page, so a download can be traced back to the
+    request (or XHR API call) that produced it. Works with both the sync and
+    async Playwright APIs (event properties are plain attributes).
+    """
+
+    def __init__(self, page, max_requests: int = 200):
+        self.requests = deque(maxlen=max_requests)
+        page.on("request", self._on_request)
+        page.on("response", self._on_response)
+
+    def _on_request(self, request):
+        try:
+            self.requests.append({
+                'url': request.url,
+                'method': request.method,
+                'post_data': request.post_data,
+                'resource_type': request.resource_type,
+                'headers': {k: v for k, v in request.headers.items() if k.lower() in REPLAY_HEADERS},
+                'document': False
+            })
+        except Exception as e:
+            logger.debug(f"Could not record request: {e}")
+
+    def _on_response(self, response):
+        try:
+            if not is_document_response(response.headers):
+                return
+            url = response.request.url
+            for entry in reversed(self.requests):
+                if entry['url'] == url:
+                    entry['document'] = True
+                    break
+        except Exception as e:
+            logger.debug(f"Could not record response: {e}")
+
+    def resolve(self, download_url: str) -> Optional[Dict]:
+        """Request that produced a download (None when it cannot be traced)."""
+        if download_url.startswith(('http://', 'https://')):
+            for entry in reversed(self.requests):
+                if entry['url'] == download_url:
+                    return dict(entry)
+            return {'url': download_url, 'method': 'GET', 'post_data': None,
+                    'resource_type': 'document', 'headers': {}, 'document': True}
+
+        # blob: / data: download assembled by page script - use the API call behind it
+        for entry in reversed(self.requests):
+            if entry['document'] and entry['resource_type'] in ('xhr', 'fetch'):
+                return dict(entry)
+        return None
+
+
+class ReplayPlanStore:
+    """
+    File-per-plan JSON store; a later successful browser run overwrites the plan.
+    """
+
+    def __init__(self, plan_dir: Path):
+        self.plan_dir = Path(plan_dir)
+        self.plan_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key(amc_name: str) -> str:
+        return re.sub(r'[^a-z0-9]+', '_', amc_name.lower()).strip('_')
+
+    def _plan_path(self, amc_name: str, doc_type: str) -> Path:
+        return self.plan_dir / f"{self._key(amc_name)}__{doc_type.lower()}.json"
+
+    def get(self, amc_name: str, doc_type: str) -> Optional[Dict]:
+        path = self._plan_path(amc_name, doc_type)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable replay plan {path.name}: {e}")
+            return None
+
+    def _write(self, path: Path, plan: Dict):
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(plan, fh, indent=1, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not write replay plan {path.name}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def discard(self, amc_name: str, doc_type: str):
+        """Drop the stored plan (the browser is used until a clean one is recorded)."""
+        path = self._plan_path(amc_name, doc_type)
+        if path.exists():
+            path.unlink()
+
+    def record(self, amc_name: str, doc_type: str, captured: List[Dict],
+               period: Optional[date] = None) -> Optional[Dict]:
+        """
+        Templatize the captured download requests and store them as the plan.
+        Requests with date-like text that is not templated for `period` (see
+        stray_dates) are not replayable: no plan is stored and an older plan
+        for the job is discarded.
+        """
+        captured = [c for c in captured if c]
+        if not captured:
+            return None
+
+        period = period or disclosure_period()
+        plan = {
+            'amc_name': amc_name,
+            'doc_type': doc_type,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'recorded_period': period.isoformat(),
+            'requests': [
+                {
+                    'method': c['method'],
+                    'url': templatize(c['url'], period),
+                    'post_data': templatize(c.get('post_data'), period),
+                    'headers': c.get('headers', {}),
+                    'via': c.get('resource_type')
+                }
+                for c in captured
+            ],
+            'replays_ok': 0,
+            'replays_failed': 0
+        }
+
+        unclean = [r['url'] for r in plan['requests']
+                   if stray_dates(r['url']) or stray_dates(r['post_data'])]
+        if unclean:
+            logger.info(f"ℹ️  No replay plan for {amc_name} {doc_type}: dates not of period "
+                        f"{period.isoformat()} left in {unclean}")
+            self.discard(amc_name, doc_type)
+            return None
+
+        self._write(self._plan_path(amc_name, doc_type), plan)
+        logger.info(f"📝 Recorded replay plan for {amc_name} {doc_type} ({len(captured)} request(s))")
+        return plan
+
+    def mark(self, amc_name: str, doc_type: str, success: bool):
+        """Count a replay outcome on the stored plan."""
+        path = self._plan_path(amc_name, doc_type)
+        plan = self.get(amc_name, doc_type)
+        if plan is None:
+            return
+        plan['replays_ok' if success else 'replays_failed'] += 1
+        plan['last_replay_at'] = datetime.now().isoformat(timespec='seconds')
+        plan['last_replay_ok'] = success
+        self._write(path, plan)
+
+
+def rendered_requests(plan: Dict, period: Optional[date] = None) -> List[Dict]:
+    """Plan requests with placeholders filled for the period (default: current)."""
+    period = period or disclosure_period()
+    return [
+        {
+            'method': r['method'],
+            'url': render(r['url'], period),
+            'post_data': render(r.get('post_data'), period),
+            'headers': r.get('headers', {})
+        }
+        for r in plan.get('requests', [])
+    ]
@@ -0,0 +1,475 @@
+# Etl/scheme_mapper.py
+"""
+Scheme Mapping Engine
+---------------------
+Python replacement for sp_refresh_scheme_mapping: maps every RTA scheme
+(CAMS + KFIN) to its AMFI scheme and rewrites scheme_mapping, with the
+same priorities and confidence bands as the stored procedure:
+
+1. ISIN        : RTA ISIN equals any AMFI ISIN (payout and reinvestment
+                 ISINs of the AMFI row, via extract_isins_from_field)
+                 -> AUTO_ISIN, confidence 100
+2. Exact name  : case-insensitive NAV name equality       -> AUTO_NAME_EXACT, 90
+3. Fuzzy name  : pg_trgm-compatible trigram similarity >= 0.60 within
+                 the RTA scheme's AMC                      -> AUTO_NAME_FUZZY, 60-85
+4. Otherwise                                               -> UNMATCHED
+
+Name matches are only taken for RTA schemes without an ISIN (an ISIN that
+AMFI does not know is a mismatch, not a reason to guess by name).
+
+rta_combined_scheme_master and amfi_scheme (refreshed by their stored
+procedures earlier in the same transaction) are read through server-side
+cursors in chunks, so the engine sees exactly the rows - and amfi_code
+text - that the write-back joins against. AMFI is indexed once (ISIN
+hash, name hash, per-AMC trigram index) and RTA chunks are matched as
+they stream in. The result is COPYed into a temp table and swapped into
+scheme_mapping in one transaction, resolving rta_id / amfi_id by join.
+
+The loader runs this engine alone when etl.scheme_mapping_engine is
+python. parity_check() (CLI: parity) is the gate before switching: it runs
+sp_refresh_scheme_mapping and this engine on the same data, compares row
+count and mappings, and rolls both back.
+
+Usage:
+    python -m Etl.scheme_mapper run
+    python -m Etl.scheme_mapper parity
+    python -m Etl.scheme_mapper benchmark
+"""
+
+import io
+import logging
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Etl.utils import engine, settings
+from Etl.cleaner import normalize_amc_name
+from Etl.scheme_matcher import TrigramIndex, trigrams
+
+logger = logging.getLogger("mf.etl.scheme_mapper")
+
+FUZZY_THRESHOLD = 0.60
+
+MAPPING_COLUMNS = [
+    'rta_scheme_id', 'amfi_code', 'amfi_isin',
+    'rta_source', 'rta_scheme_code', 'rta_scheme_nav_name', 'amfi_scheme_nav_name',
+    'isin_match', 'name_match_score', 'match_confidence', 'mapping_source'
+]
+
+# Rows shown per side when a parity check finds differences
+PARITY_SAMPLE = 20
+
+
+def _amc_key(name) -> str:
+    return normalize_amc_name(name).lower()
+
+
+def _fuzzy_confidence(score: float) -> int:
+    """Confidence band of a fuzzy score (sp_refresh_scheme_mapping step 3)."""
+    if score >= 0.85:
+        return 85
+    if score >= 0.75:
+        return 75
+    if score >= 0.65:
+        return 65
+    return 60
+
+
+class SchemeMappingEngine:
+    """
+    Streams RTA schemes against an in-memory AMFI index and writes
+    scheme_mapping via COPY.
+    """
+
+    RTA_SQL = """
+        SELECT scheme_id, rta_source, rta_scheme_code, scheme_nav_name, amc_name, isin
+        FROM rta_combined_scheme_master
+    """
+
+    # amfi_code is already the text sp_refresh_amfi_scheme derived ("Code"::TEXT)
+    AMFI_SQL = """
+        SELECT amfi_code, amc_name, scheme_nav_name, isin_single
+        FROM amfi_scheme
+        WHERE isin_single IS NOT NULL
+        ORDER BY amfi_code, isin_single
+    """
+
+    RESULTS_SQL = """
+        SELECT rta_scheme_id, amfi_id::TEXT AS amfi_id, amfi_code, mapping_source
+        FROM scheme_mapping
+        WHERE verified_by IS NULL
+    """
+
+    STAGE_DDL = """
+        DROP TABLE IF EXISTS scheme_mapping_stage;
+        CREATE TEMP TABLE scheme_mapping_stage (
+            rta_scheme_id TEXT,
+            amfi_code TEXT,
+            amfi_isin TEXT,
+            rta_source TEXT,
+            rta_scheme_code TEXT,
+            rta_scheme_nav_name TEXT,
+            amfi_scheme_nav_name TEXT,
+            isin_match BOOLEAN,
+            name_match_score NUMERIC,
+            match_confidence INTEGER,
+            mapping_source TEXT
+        ) ON COMMIT DROP
+    """
+
+    STAGE_INSERT_SQL = """
+        INSERT INTO scheme_mapping (
+            rta_id, rta_scheme_id, amfi_id, amfi_code,
+            rta_source, rta_scheme_code, rta_scheme_nav_name, amfi_scheme_nav_name,
+            isin_match, name_match_score, match_confidence, mapping_source,
+            created_at, updated_at
+        )
+        SELECT
+            r.id, s.rta_scheme_id, a.id, s.amfi_code,
+            s.rta_source, s.rta_scheme_code, s.rta_scheme_nav_name, s.amfi_scheme_nav_name,
+            s.isin_match, s.name_match_score, s.match_confidence, s.mapping_source,
+            now(), now()
+        FROM scheme_mapping_stage s
+        JOIN rta_combined_scheme_master r ON r.scheme_id = s.rta_scheme_id
+        LEFT JOIN amfi_scheme a ON a.amfi_code = s.amfi_code AND a.isin_single = s.amfi_isin
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.engine = engine
+        self.chunk_size = chunk_size or settings.get('performance', {}).get('chunk_size', 1000)
+
+        self._isin_index: Dict[str, int] = {}
+        self._name_index: Dict[str, int] = {}
+        self._blocks: Dict[str, tuple] = {}
+        self._amfi: Optional[pd.DataFrame] = None
+
+    # ========================================================
+    # LOADING
+    # ========================================================
+
+    def _stream(self, conn, sql: str) -> Iterator[pd.DataFrame]:
+        """
+        Chunks of a query, read through a server-side cursor. Streaming is set
+        on the statement: conn.execution_options() would switch the caller's
+        connection (and every later DDL/DML on it) to server-side cursors.
+        """
+        statement = text(sql).execution_options(stream_results=True)
+        yield from pd.read_sql(statement, conn, chunksize=self.chunk_size)
+
+    def load_amfi(self, conn):
+        """Index AMFI schemes: ISIN hash, lowercase NAV name hash, per-AMC trigram index."""
+        t0 = time.perf_counter()
+
+        # amfi_scheme has one row per ISIN - fold them back into one entry per scheme code
+        schemes: Dict[str, list] = {}
+        for chunk in self._stream(conn, self.AMFI_SQL):
+            for amfi_code, amc, nav_name, isin in chunk.itertuples(index=False):
+                entry = schemes.get(amfi_code)
+                if entry is None:
+                    schemes[amfi_code] = [amfi_code, nav_name or '', _amc_key(amc), [isin]]
+                else:
+                    entry[3].append(isin)
+
+        amfi = pd.DataFrame(list(schemes.values()), columns=['amfi_code', 'nav_name', 'amc_key', 'isins'])
+        self._amfi = amfi
+
+        self._isin_index = {}
+        self._name_index = {}
+        for pos, (isins, nav_name) in enumerate(zip(amfi['isins'], amfi['nav_name'])):
+            for isin in isins:
+                self._isin_index.setdefault(isin, pos)
+            if nav_name:
+                self._name_index.setdefault(nav_name.lower(), pos)
+
+        grams = [trigrams(name) for name in amfi['nav_name']]
+        self._blocks = {}
+        for amc_key, positions in amfi.groupby('amc_key').indices.items():
+            self._blocks[amc_key] = (positions, TrigramIndex([grams[p] for p in positions]))
+        self._blocks[''] = (np.arange(len(amfi)), TrigramIndex(grams))
+
+        logger.info(f"📚 Indexed {len(amfi)} AMFI schemes, {len(self._isin_index)} ISINs, "
+                    f"{len(self._blocks) - 1} AMCs in {time.perf_counter() - t0:.1f}s")
+
+    def iter_rta_chunks(self, conn) -> Iterator[pd.DataFrame]:
+        """
+        RTA schemes straight from rta_combined_scheme_master (one row per
+        scheme_id, latest import, CAMS priority - as the stored procedures left it).
+        Columns: rta_scheme_id, rta_source, rta_scheme_code, nav_name, amc_key, isin
+        """
+        for chunk in self._stream(conn, self.RTA_SQL):
+            isin = chunk['isin'].astype(object)
+            yield pd.DataFrame({
+                'rta_scheme_id': chunk['scheme_id'],
+                'rta_source': chunk['rta_source'],
+                'rta_scheme_code': chunk['rta_scheme_code'].fillna(''),
+                'nav_name': chunk['scheme_nav_name'].fillna(''),
+                'amc_key': chunk['amc_name'].map(_amc_key),
+                'isin': isin.where(isin.notna(), None),
+            })
+
+    # ========================================================
+    # MATCHING
+    # ========================================================
+
+    def _block_for(self, amc_key: str) -> tuple:
+        """AMFI candidates of an AMC; every AMFI scheme when the AMC is unknown to AMFI."""
+        return self._blocks.get(amc_key) or self._blocks['']
+
+    def match_chunk(self, rta: pd.DataFrame) -> pd.DataFrame:
+        """Mapping rows (MAPPING_COLUMNS) for one chunk of RTA schemes."""
+        amfi = self._amfi
+        n = len(rta)
+        pos = np.full(n, -1, dtype=np.int64)
+        score = np.zeros(n)
+        source = np.full(n, 'UNMATCHED', dtype=object)
+        confidence = np.zeros(n, dtype=np.int64)
+
+        # 1. ISIN
+        has_isin = rta['isin'].notna().to_numpy()
+        isin_pos = rta['isin'].map(self._isin_index).to_numpy(dtype=float, na_value=np.nan)
+        hit = ~np.isnan(isin_pos)
+        pos[hit] = isin_pos[hit]
+        score[hit] = 1.0
+        source[hit] = 'AUTO_ISIN'
+        confidence[hit] = 100
+
+        # 2. Exact name (only schemes without an ISIN)
+        open_rows = ~has_isin & (pos < 0)
+        name_pos = rta['nav_name'].str.lower().map(self._name_index).to_numpy(dtype=float, na_value=np.nan)
+        hit = open_rows & ~np.isnan(name_pos)
+        pos[hit] = name_pos[hit]
+        score[hit] = 1.0
+        source[hit] = 'AUTO_NAME_EXACT'
+        confidence[hit] = 90
+
+        # 3. Fuzzy name within the AMC block
+        open_rows = ~has_isin & (pos < 0)
+        nav_names = rta['nav_name'].to_numpy()
+        amc_keys = rta['amc_key'].to_numpy()
+        for i in np.flatnonzero(open_rows):
+            query = trigrams(nav_names[i])
+            if not query:
+                continue
+            positions, index = self._block_for(amc_keys[i])
+            best = index.best(query)
+            if best is not None and best[1] >= FUZZY_THRESHOLD:
+                pos[i] = positions[best[0]]
+                score[i] = best[1]
+                source[i] = 'AUTO_NAME_FUZZY'
+                confidence[i] = _fuzzy_confidence(best[1])
+
+        matched = pos >= 0
+        isin_match = source == 'AUTO_ISIN'
+
+        def amfi_values(column) -> np.ndarray:
+            values = np.full(n, None, dtype=object)
+            values[matched] = column[pos[matched]]
+            return values
+
+        # Name matches point at the first ISIN row of the AMFI scheme
+        amfi_isin = amfi_values(amfi['isins'].str[0].to_numpy())
+        amfi_isin[isin_match] = rta['isin'].to_numpy(dtype=object)[isin_match]
+
+        return pd.DataFrame({
+            'rta_scheme_id': rta['rta_scheme_id'].to_numpy(),
+            'amfi_code': amfi_values(amfi['amfi_code'].to_numpy()),
+            'amfi_isin': amfi_isin,
+            'rta_source': rta['rta_source'].to_numpy(),
+            'rta_scheme_code': rta['rta_scheme_code'].to_numpy(),
+            'rta_scheme_nav_name': nav_names,
+            'amfi_scheme_nav_name': amfi_values(amfi['nav_name'].to_numpy()),
+            'isin_match': isin_match,
+            'name_match_score': score,
+            'match_confidence': confidence,
+            'mapping_source': source,
+        }, columns=MAPPING_COLUMNS)
+
+    def build_mappings(self, conn) -> pd.DataFrame:
+        """Load AMFI, stream and match every RTA scheme; one mapping row per scheme_id."""
+        self.load_amfi(conn)
+
+        t0 = time.perf_counter()
+        frames: List[pd.DataFrame] = [
+            self.match_chunk(rta) for rta in self.iter_rta_chunks(conn) if not rta.empty
+        ]
+
+        mappings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=MAPPING_COLUMNS)
+        logger.info(f"🔗 Matched {len(mappings)} RTA schemes in {time.perf_counter() - t0:.1f}s")
+        return mappings
+
+    # ========================================================
+    # WRITE-BACK
+    # ========================================================
+
+    def write_mappings(self, conn, mappings: pd.DataFrame) -> int:
+        """Replace unverified scheme_mapping rows with `mappings` (COPY + one INSERT..SELECT)."""
+        buffer = io.StringIO()
+        mappings.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        conn.execute(text(self.STAGE_DDL))
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY scheme_mapping_stage ({', '.join(MAPPING_COLUMNS)}) FROM STDIN WITH CSV", buffer
+            )
+        finally:
+            cursor.close()
+
+        conn.execute(text("DELETE FROM scheme_mapping WHERE verified_by IS NULL"))
+        return conn.execute(text(self.STAGE_INSERT_SQL)).rowcount
+
+    def run(self, conn=None) -> Dict[str, int]:
+        """
+        Rebuild scheme_mapping. Pass `conn` to run inside the caller's
+        transaction (e.g. right after sp_refresh_rta_combined_scheme_master).
+        """
+        if conn is None:
+            with self.engine.begin() as conn:
+                return self.run(conn)
+
+        logger.info("🧭 Building scheme mapping (Python engine)...")
+        mappings = self.build_mappings(conn)
+        saved = self.write_mappings(conn, mappings)
+
+        summary = mappings['mapping_source'].value_counts().to_dict()
+        logger.info(f"✅ Saved {saved} scheme mappings: {summary}")
+        return summary
+
+    # ========================================================
+    # PARITY WITH sp_refresh_scheme_mapping
+    # ========================================================
+
+    @staticmethod
+    def compare(sql_df: pd.DataFrame, py_df: pd.DataFrame) -> Dict:
+        """
+        Row count and per-scheme mapping diff (amfi_id, amfi_code,
+        mapping_source) between the stored procedure's and this engine's rows.
+        """
+        both = sql_df.merge(py_df, on='rta_scheme_id', how='outer',
+                            suffixes=('_sql', '_py'), indicator=True)
+        differs = both['_merge'] != 'both'
+        for column in ('amfi_id', 'amfi_code', 'mapping_source'):
+            differs |= both[f'{column}_sql'].fillna('') != both[f'{column}_py'].fillna('')
+
+        diff = both[differs]
+        return {
+            'sql_rows': len(sql_df),
+            'python_rows': len(py_df),
+            'diff_rows': len(diff),
+            'diff_pct': round(100.0 * len(diff) / len(both), 2) if len(both) else 0.0,
+            'diff_sample': diff.drop(columns='_merge').head(PARITY_SAMPLE).to_dict('records'),
+            'sql_sources': sql_df['mapping_source'].value_counts().to_dict(),
+            'python_sources': py_df['mapping_source'].value_counts().to_dict(),
+        }
+
+    def _log_parity(self, report: Dict):
+        logger.info(f"🧪 Scheme mapping parity: {report['sql_rows']} rows (SQL) vs "
+                    f"{report['python_rows']} rows (Python), {report['diff_rows']} differing "
+                    f"({report['diff_pct']}%)")
+        for row in report['diff_sample']:
+            logger.info(f"   ≠ {row}")
+
+    def parity_check(self, tolerance_pct: Optional[float] = None) -> Dict:
+        """
+        Run sp_refresh_scheme_mapping and this engine on the current data and
+        compare them; nothing is written. 'parity' is True on equal row counts
+        and at most `tolerance_pct` differing mappings (default
+        etl.scheme_mapping_parity_tolerance_pct). A one-off gate before
+        switching etl.scheme_mapping_engine to python - the loader itself
+        only runs the selected engine.
+        """
+        if tolerance_pct is None:
+            tolerance_pct = settings.get('etl', {}).get('scheme_mapping_parity_tolerance_pct', 0.0)
+
+        with self.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                savepoint = conn.begin_nested()
+                conn.execute(text("CALL sp_refresh_scheme_mapping()"))
+                sql_df = pd.read_sql(text(self.RESULTS_SQL), conn)
+                savepoint.rollback()
+
+                self.run(conn)
+                py_df = pd.read_sql(text(self.RESULTS_SQL), conn)
+            finally:
+                trans.rollback()
+
+        report = self.compare(sql_df, py_df)
+        report['parity'] = (report['sql_rows'] == report['python_rows']
+                            and report['diff_pct'] <= tolerance_pct)
+        self._log_parity(report)
+        if not report['parity']:
+            logger.warning(f"⚠️  Python scheme mapping differs from sp_refresh_scheme_mapping "
+                           f"by more than {tolerance_pct}%")
+        return report
+
+    # ========================================================
+    # BENCHMARK
+    # ========================================================
+
+    def benchmark(self) -> Dict:
+        """
+        Time sp_refresh_scheme_mapping against this engine on the full
+        universe and compare their mappings. Both runs are rolled back.
+        """
+        with self.engine.connect() as conn:
+            trans = conn.begin()
+            t0 = time.perf_counter()
+            conn.execute(text("CALL sp_refresh_scheme_mapping()"))
+            sql_seconds = time.perf_counter() - t0
+            sql_df = pd.read_sql(text(self.RESULTS_SQL), conn)
+            trans.rollback()
+
+        with self.engine.connect() as conn:
+            trans = conn.begin()
+            t0 = time.perf_counter()
+            self.run(conn)
+            py_seconds = time.perf_counter() - t0
+            py_df = pd.read_sql(text(self.RESULTS_SQL), conn)
+            trans.rollback()
+
+        report = self.compare(sql_df, py_df)
+        report.update({
+            'sql_seconds': round(sql_seconds, 2),
+            'python_seconds': round(py_seconds, 2),
+            'speedup': round(sql_seconds / py_seconds, 1) if py_seconds else None,
+        })
+
+        logger.info(f"""
+⏱️  Scheme mapping benchmark ({report['sql_rows']} RTA schemes)
+   Stored procedure : {report['sql_seconds']}s  {report['sql_sources']}
+   Python engine    : {report['python_seconds']}s  {report['python_sources']}
+   Speedup          : x{report['speedup']}
+   Differing rows   : {report['diff_rows']} ({report['diff_pct']}%)
+        """)
+        return report
+
+
+# ========================================================
+# COMMAND-LINE INTERFACE
+# ========================================================
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Scheme Mapping Engine")
+    parser.add_argument("action", choices=["run", "parity", "benchmark"], help="Action to perform")
+    parser.add_argument("--chunk-size", type=int, default=None)
+
+    args = parser.parse_args()
+
+    mapper = SchemeMappingEngine(chunk_size=args.chunk_size)
+
+    if args.action == "run":
+        mapper.run()
+
+    elif args.action == "parity":
+        sys.exit(0 if mapper.parity_check()['parity'] else 1)
+
+    elif args.action == "benchmark":
+        mapper.benchmark()
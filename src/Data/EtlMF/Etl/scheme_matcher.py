@@ -0,0 +1,188 @@
+# Etl/scheme_matcher.py
+"""
+In-Memory Scheme Matcher
+------------------------
+Loads scheme_master_final once and matches scheme names (from portfolio
+files, sheet names, AMC disclosures) to scheme_id without a database
+round trip per name.
+
+- Exact hits    : hash lookup on the normalized name (lowercase, words of
+                  letters/digits only, single-spaced)
+- Fuzzy matches : trigram similarity computed the way pg_trgm computes
+                  similarity(), so scores are directly comparable with the
+                  0.6 threshold the SQL matchers used
+- AMC blocking  : fuzzy candidates are restricted to schemes whose
+                  amc_name contains the given AMC (like amc_name ILIKE
+                  '%amc%'); all schemes when no AMC is given
+
+Each block keeps a TrigramIndex (trigram -> row positions), so scoring a
+name is one bincount over the rows sharing at least one trigram.
+
+Usage:
+    matcher = SchemeMatcher.from_engine(engine)
+    hit = matcher.match("HDFC Top 100 Fund - Direct Growth", amc_name="HDFC")
+    if hit:
+        scheme_id = hit['scheme_id']
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+logger = logging.getLogger("mf.etl.scheme_matcher")
+
+DEFAULT_THRESHOLD = 0.6
+
+# pg_trgm word characters: letters and digits (underscore is a separator)
+_WORD = re.compile(r'[^\W_]+')
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercased words of letters/digits joined by single spaces."""
+    if not name:
+        return ""
+    return " ".join(_WORD.findall(str(name).lower()))
+
+
+def trigrams(name: Optional[str]) -> Set[str]:
+    """Trigram set of a name, as pg_trgm's show_trgm() builds it."""
+    grams = set()
+    for word in _WORD.findall(str(name or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: Optional[str], b: Optional[str]) -> float:
+    """pg_trgm similarity(a, b): shared trigrams / union of trigrams."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    shared = len(ta & tb)
+    return shared / (len(ta) + len(tb) - shared)
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram -> positions over a list of trigram sets;
+    scores a query against every entry the way pg_trgm similarity() does.
+    """
+
+    def __init__(self, grams: List[Set[str]]):
+        self.sizes = np.array([len(g) for g in grams], dtype=np.int64)
+        postings: Dict[str, List[int]] = {}
+        for pos, entry in enumerate(grams):
+            for gram in entry:
+                postings.setdefault(gram, []).append(pos)
+        self.postings = {gram: np.asarray(p, dtype=np.int64) for gram, p in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def scores(self, query: Set[str]) -> Optional[np.ndarray]:
+        """Similarity of the query to every entry, or None without any shared trigram."""
+        hits = [self.postings[g] for g in query if g in self.postings]
+        if not hits:
+            return None
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.sizes))
+        return shared / (len(query) + self.sizes - shared)
+
+    def best(self, query: Set[str]) -> Optional[Tuple[int, float]]:
+        """(position, similarity) of the best-scoring entry, or None without any shared trigram."""
+        scores = self.scores(query)
+        if scores is None:
+            return None
+        pos = int(scores.argmax())
+        return pos, float(scores[pos])
+
+
+class SchemeMatcher:
+    """
+    AMC-blocked, in-memory index over scheme_master_final.
+    """
+
+    LOAD_SQL = """
+        SELECT scheme_id, canonical_scheme_name, amc_name
+        FROM scheme_master_final
+        WHERE canonical_scheme_name IS NOT NULL
+    """
+
+    def __init__(self, schemes: List[Dict], threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.scheme_ids = [s['scheme_id'] for s in schemes]
+        self.names = [s['canonical_scheme_name'] for s in schemes]
+        self.amc_names = [normalize_name(s.get('amc_name')) for s in schemes]
+
+        self._grams = [trigrams(name) for name in self.names]
+
+        # First scheme wins on duplicate names (the SQL exact match took LIMIT 1)
+        self._exact: Dict[str, int] = {}
+        for row, name in enumerate(self.names):
+            self._exact.setdefault(normalize_name(name), row)
+
+        by_amc: Dict[str, List[int]] = {}
+        for row, amc in enumerate(self.amc_names):
+            by_amc.setdefault(amc, []).append(row)
+        self._amc_rows = by_amc
+        # AMC key -> (scheme rows, trigram index over them)
+        self._blocks: Dict[str, Optional[Tuple[List[int], TrigramIndex]]] = {}
+
+        logger.info(f"🔎 Scheme matcher loaded: {len(self.names)} schemes, {len(by_amc)} AMCs")
+
+    @classmethod
+    def from_engine(cls, engine, threshold: float = DEFAULT_THRESHOLD) -> "SchemeMatcher":
+        """Load scheme_master_final in one query."""
+        with engine.connect() as conn:
+            rows = conn.execute(text(cls.LOAD_SQL)).mappings().all()
+        return cls([dict(r) for r in rows], threshold=threshold)
+
+    def _block(self, amc_name: Optional[str]) -> Optional[Tuple[List[int], TrigramIndex]]:
+        """Trigram index of the AMC's schemes (all schemes without an AMC), built on first use."""
+        key = normalize_name(amc_name)
+        if key not in self._blocks:
+            rows = sorted(
+                row
+                for amc, amc_rows in self._amc_rows.items() if key in amc
+                for row in amc_rows
+            )
+            self._blocks[key] = (rows, TrigramIndex([self._grams[r] for r in rows])) if rows else None
+        return self._blocks[key]
+
+    def match(self, scheme_name: Optional[str], amc_name: Optional[str] = None,
+              threshold: Optional[float] = None) -> Optional[Dict]:
+        """
+        Best scheme for a name: exact normalized-name hit first, then the
+        highest trigram similarity within the AMC's schemes.
+
+        Returns {'scheme_id', 'scheme_name', 'score', 'method'} or None when
+        the best score does not exceed the threshold.
+        """
+        if not scheme_name:
+            return None
+
+        row = self._exact.get(normalize_name(scheme_name))
+        if row is not None:
+            return self._result(row, 1.0, 'exact')
+
+        query = trigrams(scheme_name)
+        block = self._block(amc_name)
+        if not query or block is None:
+            return None
+
+        rows, index = block
+        best = index.best(query)
+        threshold = self.threshold if threshold is None else threshold
+        if best is None or best[1] <= threshold:
+            return None
+        return self._result(rows[best[0]], best[1], 'fuzzy')
+
+    def _result(self, row: int, score: float, method: str) -> Dict:
+        return {
+            'scheme_id': self.scheme_ids[row],
+            'scheme_name': self.names[row],
+            'score': score,
+            'method': method
+        }
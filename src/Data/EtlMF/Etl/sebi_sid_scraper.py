@@ -23,18 +23,64 @@ import requests
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 from sqlalchemy import create_engine, text
-import pdfplumber
-from PyPDF2 import PdfReader
+
+from Etl.isolated_pool import (
+    IsolatedWorkerPool, TASK_OK, TASK_TIMEOUT, format_latency_percentiles
+)
+from Etl.pdf_document import PdfDocument
 
 logger = logging.getLogger("mf.etl.sebi_scraper")
 
+# Fund manager and key info sections are usually within the first 30 pages;
+# scanned for every section that page targeting did not find
+SID_SCAN_PAGES = 30
+
+# The supervisor kills a SID worker this long after the parse budget, so the
+# worker's own (cooperative) PdfDocument budget normally fires first
+SID_KILL_MARGIN_SECONDS = 10
+
+# Parse outcomes that are final: such SIDs are not downloaded again
+SID_FINAL_STATUSES = ('SUCCESS', 'TIMEOUT', 'FAILED')
+
+# Outline titles / content-stream keywords that target the section pages.
+# An outline hit also pulls in the next page, as sections often run over.
+SID_SECTION_KEYWORDS = ('fund manager', 'investment objective', 'benchmark', 'exit load')
+SID_OUTLINE_FOLLOW_PAGES = 1
+
+# Single scan over the SID text: the first hit of each section header wins.
+# Each value is the rest of the header's line, capped at `SID_SECTION_WINDOWS`.
+SID_SECTION_PATTERN = re.compile(
+    r'(?P<fund_manager>fund\s+manager[s]?[\s:]+)'
+    r'|(?P<investment_objective>investment\s+objective[s]?[:\s]+)'
+    r'|(?P<benchmark>benchmark[:\s]+)'
+    r'|(?P<exit_load>exit\s+load[:\s]+)',
+    re.IGNORECASE
+)
+
+SID_SECTION_WINDOWS = {
+    'fund_manager': 500,
+    'investment_objective': 500,
+    'benchmark': 200,
+    'exit_load': 300,
+}
+
+# Manager names keep their original case; only the title / label is case-insensitive
+MANAGER_NAME_PATTERNS = [
+    re.compile(r'(?i:mr\.|ms\.|mrs\.|dr\.)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
+    re.compile(r'(?i:name)[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
+]
+QUALIFICATION_PATTERN = re.compile(r'(MBA|CFA|CA|B\.?Com|M\.?Com|B\.?E|M\.?Sc|PhD|PGDM)', re.IGNORECASE)
+EXPERIENCE_PATTERN = re.compile(r'(\d+)\s*(?:years?|yrs?).*experience', re.IGNORECASE)
+
 
 class SebiSidScraper:
     """
     Scrapes SEBI website for Scheme Information Documents (SIDs).
     """
     
-    def __init__(self, db_url: str, download_dir: Path):
+    def __init__(self, db_url: str, download_dir: Path,
+                 parse_time_budget: Optional[float] = None,
+                 rss_budget_mb: Optional[float] = None):
         self.db_url = db_url
         self.engine = create_engine(db_url, pool_pre_ping=True)
         self.download_dir = Path(download_dir)
@@ -42,6 +88,17 @@ class SebiSidScraper:
         
         self.sebi_base_url = "https://www.sebi.gov.in"
         self.sebi_mf_url = f"{self.sebi_base_url}/sebiweb/other/OtherAction.do?doMutualFund=yes&mftype=2"
+        
+        # Memo of the last SID section scan (see scan_sid_sections)
+        self._scanned_doc = None
+        self._scanned_sections = {}
+        
+        # SIDs are parsed in a supervised worker subprocess under these budgets
+        self.parse_time_budget = parse_time_budget
+        self.rss_budget_mb = rss_budget_mb
+        
+        # sebi_url of SIDs already recorded with a final status (loaded by run)
+        self.recorded_sid_urls = set()
     
     def get_amc_list_from_sebi(self) -> List[Dict]:
         """
@@ -113,6 +170,18 @@ class SebiSidScraper:
         logger.info(f"✅ Found {len(amc_list)} AMCs on SEBI")
         return amc_list
     
+    def get_recorded_sid_urls(self) -> set:
+        """sebi_url of every SID already parsed, timed out or failed."""
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("""
+                    SELECT DISTINCT sebi_url FROM sebi_sid_documents
+                    WHERE parsing_status = ANY(:statuses)
+                """),
+                {"statuses": list(SID_FINAL_STATUSES)}
+            )
+            return {row[0] for row in result.fetchall()}
+    
     def get_scheme_sids_for_amc(self, sebi_amc_code: str) -> List[Dict]:
         """
         Get list of scheme SID documents for a specific AMC.
@@ -211,7 +280,49 @@ class SebiSidScraper:
             logger.error(f"❌ Download failed: {e}")
             return None
     
-    def extract_fund_manager_info(self, pdf_path: Path) -> List[Dict]:
+    def scan_sid_sections(self, pdf_path: Path, doc: Optional[PdfDocument] = None) -> Dict[str, str]:
+        """
+        Run the compiled multi-pattern scan once over the SID text and return
+        the original-case text following the first hit of every section header.
+        The last scan is memoized per document, so both extractors share it.
+        """
+        if doc is None:
+            with PdfDocument(pdf_path) as pdf_doc:
+                return self.scan_sid_sections(pdf_path, pdf_doc)
+        
+        if self._scanned_doc is doc:
+            return self._scanned_sections
+        
+        sections = {}
+        pages = doc.target_pages(SID_SECTION_KEYWORDS, follow=SID_OUTLINE_FOLLOW_PAGES)
+        if pages:
+            logger.debug(f"🎯 {len(pages)}/{doc.page_count} SID pages targeted via {doc.targeting_method}")
+            self._match_sections(doc.text(pages), sections)
+        
+        # Outline / stream hits may cover only some sections - look for the
+        # rest in the leading pages, as an untargeted scan would
+        if len(sections) < len(SID_SECTION_WINDOWS):
+            targeted = set(pages)
+            rest = [p for p in range(SID_SCAN_PAGES) if p not in targeted]
+            self._match_sections(doc.text(rest), sections)
+        
+        self._scanned_doc = doc
+        self._scanned_sections = sections
+        return sections
+    
+    @staticmethod
+    def _match_sections(text: str, sections: Dict[str, str]):
+        """Add the first hit of every section header not yet in `sections`."""
+        for match in SID_SECTION_PATTERN.finditer(text):
+            section = match.lastgroup
+            if section in sections:
+                continue
+            window = text[match.end():match.end() + SID_SECTION_WINDOWS[section]]
+            sections[section] = window.split('\n', 1)[0]
+            if len(sections) == len(SID_SECTION_WINDOWS):
+                break
+    
+    def extract_fund_manager_info(self, pdf_path: Path, doc: Optional[PdfDocument] = None) -> List[Dict]:
         """
         Extract fund manager information from SID PDF.
         
@@ -220,37 +331,15 @@ class SebiSidScraper:
         """
         logger.info("👤 Extracting fund manager info...")
         
-        try:
-            # Extract text
-            with pdfplumber.open(str(pdf_path)) as pdf:
-                text = ""
-                for page in pdf.pages[:20]:  # Usually in first 20 pages
-                    text += page.extract_text() + "\n"
-        except:
-            # Fallback to PyPDF2
-            reader = PdfReader(str(pdf_path))
-            text = ""
-            for page in reader.pages[:20]:
-                text += page.extract_text() + "\n"
-        
         managers = []
         
         # Search for fund manager section
-        fm_section_pattern = r'fund\s+manager[s]?[\s:]+(.{0,500})'
-        match = re.search(fm_section_pattern, text.lower())
+        fm_text = self.scan_sid_sections(pdf_path, doc).get('fund_manager')
         
-        if match:
-            fm_text = match.group(1)
-            
+        if fm_text:
             # Extract manager names (typically in format "Name: XXX" or "Mr./Ms. XXX")
-            name_patterns = [
-                r'(?:mr\.|ms\.|mrs\.|dr\.)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-                r'name[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            ]
-            
-            for pattern in name_patterns:
-                names = re.findall(pattern, fm_text)
-                for name in names:
+            for pattern in MANAGER_NAME_PATTERNS:
+                for name in pattern.findall(fm_text):
                     name = name.strip()
                     if len(name) > 3:  # Filter out initials
                         # Look for qualification and experience near the name
@@ -261,12 +350,12 @@ class SebiSidScraper:
                         experience = None
                         
                         # Extract qualification
-                        qual_match = re.search(r'(MBA|CFA|CA|B\.?Com|M\.?Com|B\.?E|M\.?Sc|PhD|PGDM)', context, re.IGNORECASE)
+                        qual_match = QUALIFICATION_PATTERN.search(context)
                         if qual_match:
                             qualification = qual_match.group(1)
                         
                         # Extract experience (years)
-                        exp_match = re.search(r'(\d+)\s*(?:years?|yrs?).*experience', context, re.IGNORECASE)
+                        exp_match = EXPERIENCE_PATTERN.search(context)
                         if exp_match:
                             experience = float(exp_match.group(1))
                         
@@ -289,7 +378,7 @@ class SebiSidScraper:
         logger.info(f"✓ Extracted {len(unique_managers)} fund managers")
         return unique_managers
     
-    def extract_key_info_from_sid(self, pdf_path: Path) -> Dict:
+    def extract_key_info_from_sid(self, pdf_path: Path, doc: Optional[PdfDocument] = None) -> Dict:
         """
         Extract key information from SID:
         - Investment objective
@@ -299,40 +388,55 @@ class SebiSidScraper:
         """
         logger.info("📋 Extracting key information from SID...")
         
-        try:
-            with pdfplumber.open(str(pdf_path)) as pdf:
-                text = ""
-                for page in pdf.pages[:30]:  # Key info usually in first 30 pages
-                    text += page.extract_text() + "\n"
-        except:
-            reader = PdfReader(str(pdf_path))
-            text = ""
-            for page in reader.pages[:30]:
-                text += page.extract_text() + "\n"
+        sections = self.scan_sid_sections(pdf_path, doc)
         
         info = {}
         
-        # Investment objective
-        obj_pattern = r'investment\s+objective[s]?[:\s]+(.{0,500})'
-        obj_match = re.search(obj_pattern, text.lower())
-        if obj_match:
-            info['investment_objective'] = obj_match.group(1)[:500].strip()
-        
-        # Benchmark
-        bench_pattern = r'benchmark[:\s]+(.{0,200})'
-        bench_match = re.search(bench_pattern, text.lower())
-        if bench_match:
-            info['benchmark'] = bench_match.group(1)[:200].strip()
-        
-        # Exit load
-        exit_pattern = r'exit\s+load[:\s]+(.{0,300})'
-        exit_match = re.search(exit_pattern, text.lower())
-        if exit_match:
-            info['exit_load'] = exit_match.group(1)[:300].strip()
+        # Stored lowercased, as before
+        for section in ('investment_objective', 'benchmark', 'exit_load'):
+            if section in sections:
+                info[section] = sections[section].lower().strip()
         
         logger.info("✓ Extracted key information")
         return info
     
+    def extract_sid(self, pdf_path: Path) -> Dict:
+        """
+        Parse one SID without touching the database (one open + one text scan
+        shared by both extractors). Safe to run in a worker process.
+        """
+        pdf_path = Path(pdf_path)
+        with PdfDocument(pdf_path, time_budget=self.parse_time_budget) as doc:
+            return {
+                'managers': self.extract_fund_manager_info(pdf_path, doc),
+                'key_info': self.extract_key_info_from_sid(pdf_path, doc)
+            }
+    
+    def save_sid_status(self, amc_id: Optional[str], sid_url: str,
+                        local_path: Path, parsing_status: str):
+        """Record a downloaded SID whose parse did not complete (e.g. TIMEOUT)."""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO sebi_sid_documents (
+                        amc_id, document_type, sebi_url, local_file_path,
+                        file_size_kb, download_status, parsing_status,
+                        created_at, updated_at
+                    ) VALUES (
+                        :amc_id, 'SID', :sebi_url, :local_path,
+                        :file_size_kb, 'DOWNLOADED', :parsing_status,
+                        now(), now()
+                    )
+                """),
+                {
+                    "amc_id": amc_id,
+                    "sebi_url": sid_url,
+                    "local_path": str(local_path),
+                    "file_size_kb": local_path.stat().st_size // 1024,
+                    "parsing_status": parsing_status
+                }
+            )
+    
     def save_sid_to_db(self, scheme_id: Optional[str], amc_id: Optional[str],
                        sid_url: str, local_path: Path, managers: List[Dict],
                        key_info: Dict):
@@ -464,51 +568,131 @@ class SebiSidScraper:
         
         logger.info(f"📋 Processing {len(amc_list)} AMCs")
         
-        for i, amc_info in enumerate(amc_list, 1):
-            amc_name = amc_info['amc_name']
-            logger.info(f"[{i}/{len(amc_list)}] Processing {amc_name}")
+        latencies = []
+        timeout_count = 0
+        self.recorded_sid_urls = self.get_recorded_sid_urls()
+        
+        # One supervised worker subprocess parses every SID; a stalled or
+        # runaway parse is killed and the worker replaced
+        pool = IsolatedWorkerPool(
+            _extract_sid_in_worker,
+            workers=1,
+            time_budget=(self.parse_time_budget + SID_KILL_MARGIN_SECONDS
+                         if self.parse_time_budget else None),
+            rss_budget_mb=self.rss_budget_mb,
+            initializer=_init_sid_worker,
+            initargs=(self.db_url, str(self.download_dir), self.parse_time_budget)
+        )
+        
+        with pool:
+            for i, amc_info in enumerate(amc_list, 1):
+                timeout_count += self._process_amc(pool, i, len(amc_list), amc_info, latencies)
+        
+        logger.info(f"""
+🎉 SEBI SID scraping complete!
+   SIDs parsed: {len(latencies)}
+   Timed out: {timeout_count}
+   Latency: {format_latency_percentiles(latencies)}
+        """)
+    
+    def _process_amc(self, pool: IsolatedWorkerPool, i: int, total: int,
+                     amc_info: Dict, latencies: List[float]) -> int:
+        """Download and parse every SID of one AMC; returns the number of timeouts."""
+        timeout_count = 0
+        
+        amc_name = amc_info['amc_name']
+        logger.info(f"[{i}/{total}] Processing {amc_name}")
+        
+        # Match to amc_master (trigram `%` / `<->` use the GIN index on lower(amc_full_name));
+        # the `%` cut-off is SET LOCAL so it ends with this transaction instead of
+        # staying on the pooled connection
+        with self.engine.begin() as conn:
+            conn.execute(text("SET LOCAL pg_trgm.similarity_threshold = 0.6"))
+            result = conn.execute(
+                text("""
+                    SELECT amc_id FROM amc_master
+                    WHERE lower(amc_full_name) % lower(:name)
+                    ORDER BY lower(amc_full_name) <-> lower(:name)
+                    LIMIT 1
+                """),
+                {"name": amc_name}
+            ).fetchone()
             
-            # Match to amc_master
-            with self.engine.connect() as conn:
-                result = conn.execute(
-                    text("""
-                        SELECT amc_id FROM amc_master
-                        WHERE similarity(lower(amc_full_name), lower(:name)) > 0.6
-                        ORDER BY similarity(lower(amc_full_name), lower(:name)) DESC
-                        LIMIT 1
-                    """),
-                    {"name": amc_name}
-                ).fetchone()
-                
-                amc_id = str(result[0]) if result else None
+            amc_id = str(result[0]) if result else None
+        
+        # Get scheme SIDs
+        if 'sebi_amc_code' in amc_info:
+            schemes = self.get_scheme_sids_for_amc(amc_info['sebi_amc_code'])
+        elif 'sid_url' in amc_info:
+            schemes = [{'scheme_name': 'General', 'sid_url': amc_info['sid_url']}]
+        else:
+            return timeout_count
+        
+        # Download and parse SIDs
+        for scheme in schemes:
+            sid_url = scheme['sid_url']
+            scheme_name = scheme['scheme_name']
             
-            # Get scheme SIDs
-            if 'sebi_amc_code' in amc_info:
-                schemes = self.get_scheme_sids_for_amc(amc_info['sebi_amc_code'])
-            elif 'sid_url' in amc_info:
-                schemes = [{'scheme_name': 'General', 'sid_url': amc_info['sid_url']}]
-            else:
+            if sid_url in self.recorded_sid_urls:
+                logger.debug(f"⏭️  SID already recorded: {sid_url}")
                 continue
             
-            # Download and parse SIDs
-            for scheme in schemes:
-                sid_url = scheme['sid_url']
-                scheme_name = scheme['scheme_name']
-                
-                # Download SID
-                local_path = self.download_sid_document(sid_url, amc_name, scheme_name)
-                
-                if not local_path:
-                    continue
-                
-                # Parse SID
-                managers = self.extract_fund_manager_info(local_path)
-                key_info = self.extract_key_info_from_sid(local_path)
-                
-                # Save to DB
-                self.save_sid_to_db(None, amc_id, sid_url, local_path, managers, key_info)
+            # Download SID
+            local_path = self.download_sid_document(sid_url, amc_name, scheme_name)
+            
+            if not local_path:
+                continue
+            
+            # Parse SID in the isolated worker
+            outcome = pool.run_one(str(local_path))
+            latencies.append(outcome.elapsed)
+            
+            # Killed by the supervisor, or the worker's own PdfDocument budget ran out
+            parsed = outcome.result if outcome.status == TASK_OK else None
+            if outcome.status == TASK_TIMEOUT or (parsed and parsed.get('timed_out')):
+                error = parsed['error'] if parsed else outcome.error
+                logger.error(f"⏱️  SID parsing timed out for {local_path.name}: {error}")
+                self.save_sid_status(amc_id, sid_url, local_path, 'TIMEOUT')
+                timeout_count += 1
+                continue
+            
+            if outcome.status != TASK_OK:
+                # Recorded, so the SID is not downloaded and parsed again next run
+                logger.error(f"❌ SID parsing failed for {local_path.name}: {outcome.error}")
+                self.save_sid_status(amc_id, sid_url, local_path, 'FAILED')
+                continue
+            
+            # Save to DB
+            self.save_sid_to_db(None, amc_id, sid_url, local_path,
+                                parsed['managers'], parsed['key_info'])
         
-        logger.info("🎉 SEBI SID scraping complete!")
+        return timeout_count
+
+
+# -------------------------------------------------------------------------
+# ISOLATED WORKER
+# -------------------------------------------------------------------------
+
+_worker_scraper: Optional[SebiSidScraper] = None
+
+
+def _init_sid_worker(db_url: str, download_dir: str, parse_time_budget: Optional[float]):
+    """Worker initializer: the worker process gets its own scraper (only its parsers are used)."""
+    global _worker_scraper
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+    )
+    _worker_scraper = SebiSidScraper(db_url, Path(download_dir),
+                                     parse_time_budget=parse_time_budget)
+
+
+def _extract_sid_in_worker(pdf_path: str) -> Dict:
+    try:
+        return _worker_scraper.extract_sid(Path(pdf_path))
+    except TimeoutError as e:
+        # Cooperative budget (PdfDocument) - reported as a result, not a task error
+        return {'timed_out': True, 'error': str(e)}
 
 
 def main():
@@ -523,7 +707,9 @@ def main():
     
     scraper = SebiSidScraper(
         db_url=str(engine.url),
-        download_dir=download_dir
+        download_dir=download_dir,
+        parse_time_budget=settings.get('phase3', {}).get('pdf_parsing', {}).get('timeout_seconds'),
+        rss_budget_mb=settings.get('phase3', {}).get('pdf_parsing', {}).get('max_rss_mb')
     )
     
     # Scrape first 3 AMCs as test
@@ -5,18 +5,25 @@ Production-ready PDF parser with SEBI format validation.
 Handles: Portfolio, TER, AUM documents with multiple extraction strategies.
 """
 
+import json
 import logging
 import re
+import time
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from decimal import Decimal
 
 import pandas as pd
-import pdfplumber
-from PyPDF2 import PdfReader
 from sqlalchemy import create_engine, text
 
+from Etl.isolated_pool import (
+    IsolatedWorkerPool, TASK_OK, TASK_TIMEOUT, TASK_MEMORY, format_latency_percentiles
+)
+from Etl.pdf_document import PdfDocument
+from Etl.parse_cache import ParseCache, file_sha256
+from Etl.table_templates import TableTemplateStore
+
 logger = logging.getLogger("mf.etl.pdf_parser")
 
 
@@ -86,10 +93,85 @@ class StatutoryPdfParser:
     Enhanced PDF parser with SEBI compliance checking.
     """
     
-    def __init__(self, db_url: str):
+    # Bump the version of a doc_type whenever its extraction logic changes;
+    # only that doc_type's parse-cache entries are invalidated.
+    PARSER_VERSIONS = {
+        'PORTFOLIO': '3',
+        'TER': '2',
+    }
+    
+    # Page targeting: only pages holding one of these keywords (outline entry
+    # or raw content stream) are text-extracted; no hit means all pages.
+    FORMAT_PAGE_KEYWORDS = (
+        'portfolio', 'total expense ratio', 'expense ratio',
+        'aaum', 'average assets under management', 'fact sheet', 'factsheet'
+    )
+    TER_PAGE_KEYWORDS = ('total expense ratio', 'expense ratio', 'regular plan', 'direct plan')
+    
+    HOLDING_INSERT_SQL = """
+        INSERT INTO portfolio_holdings_raw (
+            document_id, scheme_id, amc_id, as_of_date,
+            security_name, isin_code, industry_sector, rating,
+            quantity, market_value, portfolio_percentage,
+            is_illiquid, is_non_traded, is_below_investment_grade,
+            extraction_confidence, source_file, created_at
+        ) VALUES (
+            :doc_id, :scheme_id, :amc_id, :as_of_date,
+            :security_name, :isin_code, :industry_sector, :rating,
+            :quantity, :market_value, :portfolio_percentage,
+            :is_illiquid, :is_non_traded, :is_below_investment_grade,
+            0.85, :source_file, now()
+        )
+    """
+    
+    TER_INSERT_SQL = """
+        INSERT INTO ter_data_raw (
+            document_id, scheme_id, amc_id, as_of_date,
+            plan_type, total_ter,
+            source_file, created_at
+        ) VALUES (
+            :doc_id, :scheme_id, :amc_id, :as_of_date,
+            :plan_type, :total_ter,
+            :source_file, now()
+        )
+    """
+    
+    STATUS_UPDATE_SQL = """
+        UPDATE statutory_document_downloads
+        SET parsing_status = :status,
+            is_sebi_compliant = :is_compliant,
+            sebi_format_type = :format_type,
+            validation_errors = CAST(:errors AS jsonb),
+            parsed_at = now(),
+            updated_at = now()
+        WHERE id = :doc_id
+    """
+    
+    def __init__(self, db_url: str, doc_time_budget: Optional[float] = None,
+                 cache_dir: Optional[Path] = None, template_dir: Optional[Path] = None,
+                 rss_budget_mb: Optional[float] = None):
         self.db_url = db_url
         self.engine = create_engine(db_url, pool_pre_ping=True)
         self.validator = SebiFormatValidator()
+        
+        # Parse-result cache keyed by (file SHA-256, parser version, doc_type)
+        self.cache_dir = cache_dir
+        self.parse_cache = ParseCache(cache_dir) if cache_dir else None
+        
+        # Per-AMC holdings-table templates (page range, bbox, column x-positions)
+        self.template_dir = template_dir
+        self.table_templates = TableTemplateStore(template_dir) if template_dir else None
+        
+        # Per-document wall-clock budget (seconds): checked between pages, and
+        # enforced by killing the worker subprocess when a page itself stalls
+        self.doc_time_budget = doc_time_budget
+        
+        # Per-worker resident memory budget (MB); the worker is killed above it
+        self.rss_budget_mb = rss_budget_mb
+        
+        # Bulk write counters (reported in the run summary)
+        self.rows_written = 0
+        self.write_seconds = 0.0
     
     def get_pending_documents(self, doc_type: Optional[str] = None) -> List[Dict]:
         """Get documents pending parsing."""
@@ -111,75 +193,120 @@ class StatutoryPdfParser:
             result = conn.execute(text(query))
             return [dict(row._mapping) for row in result.fetchall()]
     
-    def detect_document_format(self, pdf_path: Path) -> str:
-        """Identify SEBI format type from document content."""
+    def detect_document_format(self, pdf_path: Path, doc: Optional[PdfDocument] = None) -> str:
+        """
+        Identify SEBI format type from document content: targeted pages first,
+        all pages when those give no format (partial outline / stream hits).
+        """
         try:
-            text = self.extract_text_from_pdf(pdf_path)
-            text_lower = text.lower()
-            
-            # Portfolio detection
-            if 'monthly portfolio' in text_lower or 'portfolio disclosure' in text_lower:
-                if 'half' in text_lower:
-                    return 'SEBI_PORTFOLIO_HALFYEARLY'
-                return 'SEBI_PORTFOLIO_MONTHLY'
-            
-            # TER detection
-            if 'total expense ratio' in text_lower or 'ter' in text_lower:
-                if 'regulation 52' in text_lower:
-                    return 'SEBI_TER'
-                return 'SEBI_TER'
-            
-            # AUM detection
-            if 'aaum' in text_lower or 'average assets under management' in text_lower:
-                return 'SEBI_AUM'
-            
-            # Fact sheet
-            if 'fact sheet' in text_lower or 'factsheet' in text_lower:
-                return 'FACT_SHEET'
-            
-            return 'UNKNOWN'
+            if doc is None:
+                with PdfDocument(pdf_path) as pdf_doc:
+                    return self.detect_document_format(pdf_path, pdf_doc)
             
+            doc_format = self._classify_format(
+                self.extract_text_from_pdf(pdf_path, doc, self.FORMAT_PAGE_KEYWORDS)
+            )
+            if doc_format == 'UNKNOWN':
+                doc_format = self._classify_format(self.extract_text_from_pdf(pdf_path, doc))
+            return doc_format
+        
+        except TimeoutError:
+            raise
         except Exception as e:
             logger.error(f"Format detection failed: {e}")
             return 'UNKNOWN'
     
-    def extract_text_from_pdf(self, pdf_path: Path) -> str:
-        """Extract all text from PDF."""
+    @staticmethod
+    def _classify_format(text: str) -> str:
+        """SEBI format type named in a document's text."""
+        text_lower = text.lower()
+        
+        # Portfolio detection
+        if 'monthly portfolio' in text_lower or 'portfolio disclosure' in text_lower:
+            if 'half' in text_lower:
+                return 'SEBI_PORTFOLIO_HALFYEARLY'
+            return 'SEBI_PORTFOLIO_MONTHLY'
+        
+        # TER detection
+        if 'total expense ratio' in text_lower or 'ter' in text_lower:
+            if 'regulation 52' in text_lower:
+                return 'SEBI_TER'
+            return 'SEBI_TER'
+        
+        # AUM detection
+        if 'aaum' in text_lower or 'average assets under management' in text_lower:
+            return 'SEBI_AUM'
+        
+        # Fact sheet
+        if 'fact sheet' in text_lower or 'factsheet' in text_lower:
+            return 'FACT_SHEET'
+        
+        return 'UNKNOWN'
+    
+    def extract_text_from_pdf(self, pdf_path: Path, doc: Optional[PdfDocument] = None,
+                              keywords: Optional[Tuple[str, ...]] = None) -> str:
+        """
+        Extract text from PDF (shared page cache when `doc` is given).
+        With `keywords`, only the targeted pages are extracted.
+        """
         try:
-            reader = PdfReader(str(pdf_path))
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            return text
+            if doc is not None:
+                return doc.text(self._target_pages(doc, keywords))
+            with PdfDocument(pdf_path) as pdf_doc:
+                return pdf_doc.text(self._target_pages(pdf_doc, keywords))
+        except TimeoutError:
+            raise
         except Exception as e:
             logger.error(f"Text extraction failed for {pdf_path}: {e}")
             return ""
     
-    def extract_tables_from_pdf(self, pdf_path: Path) -> List[pd.DataFrame]:
-        """Extract tables using pdfplumber."""
-        tables = []
-        
+    def extract_tables_from_pdf(self, pdf_path: Path, doc: Optional[PdfDocument] = None,
+                                keywords: Optional[Tuple[str, ...]] = None) -> List[pd.DataFrame]:
+        """
+        Extract tables using pdfplumber (shared page cache when `doc` is given).
+        With `keywords`, only the targeted pages are extracted.
+        """
         try:
-            with pdfplumber.open(str(pdf_path)) as pdf:
-                for page in pdf.pages:
-                    page_tables = page.extract_tables()
-                    for table in page_tables:
-                        if not table or len(table) < 2:
-                            continue
-                        
-                        # Convert to DataFrame
-                        try:
-                            df = pd.DataFrame(table[1:], columns=table[0])
-                            df.columns = [str(col).strip() for col in df.columns]
-                            tables.append(df)
-                        except Exception as e:
-                            logger.debug(f"Table conversion failed: {e}")
-                            continue
-        
+            if doc is not None:
+                return self._tables_to_frames(doc.tables(self._target_pages(doc, keywords)))
+            with PdfDocument(pdf_path) as pdf_doc:
+                return self._tables_to_frames(pdf_doc.tables(self._target_pages(pdf_doc, keywords)))
+        except TimeoutError:
+            raise
         except Exception as e:
             logger.error(f"Table extraction failed for {pdf_path}: {e}")
+            return []
+    
+    def _target_pages(self, doc: PdfDocument,
+                      keywords: Optional[Tuple[str, ...]]) -> Optional[List[int]]:
+        """Pages to extract for `keywords`; None (all pages) when nothing is targeted."""
+        if not keywords:
+            return None
+        
+        pages = doc.target_pages(keywords)
+        if not pages:
+            return None
+        
+        logger.debug(f"🎯 {len(pages)}/{doc.page_count} pages targeted "
+                     f"via {doc.targeting_method} in {doc.pdf_path.name}")
+        return pages
+    
+    def _tables_to_frames(self, raw_tables: List[list]) -> List[pd.DataFrame]:
+        """Convert raw pdfplumber tables (first row = header) to DataFrames."""
+        tables = []
+        
+        for table in raw_tables:
+            if not table or len(table) < 2:
+                continue
+            
+            # Convert to DataFrame
+            try:
+                df = pd.DataFrame(table[1:], columns=table[0])
+                df.columns = [str(col).strip() for col in df.columns]
+                tables.append(df)
+            except Exception as e:
+                logger.debug(f"Table conversion failed: {e}")
+                continue
         
         return tables
     
@@ -189,25 +316,86 @@ class StatutoryPdfParser:
     
     def parse_portfolio_holdings(self, pdf_path: Path, doc_id: str, 
                                  scheme_id: Optional[str], amc_id: str,
-                                 as_of_date: Optional[str]) -> Tuple[int, Dict]:
+                                 as_of_date: Optional[str],
+                                 doc: Optional[PdfDocument] = None) -> Tuple[int, Dict]:
         """
-        Parse portfolio with SEBI validation.
+        Parse portfolio with SEBI validation and save holdings.
         
         Returns:
             (holdings_count, validation_result)
         """
+        holdings, validation = self.extract_portfolio_holdings(pdf_path, doc, amc_id)
+        
+        if holdings:
+            params = [
+                self._holding_params(doc_id, scheme_id, amc_id, as_of_date, h, str(pdf_path))
+                for h in holdings
+            ]
+            with self.engine.begin() as conn:
+                conn.execute(text(self.HOLDING_INSERT_SQL), params)
+        
+        return len(holdings), validation
+    
+    def extract_portfolio_holdings(self, pdf_path: Path,
+                                   doc: Optional[PdfDocument] = None,
+                                   amc_id: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Extract portfolio holdings with SEBI validation (no database access).
+        
+        With an `amc_id` that has a learned table template, only the template
+        region is extracted; full extraction runs (and the template is
+        re-learned) when that result does not validate.
+        
+        Returns:
+            (holdings, validation_result)
+        """
+        if doc is None:
+            with PdfDocument(pdf_path) as pdf_doc:
+                return self.extract_portfolio_holdings(pdf_path, pdf_doc, amc_id)
+        
         logger.info(f"📊 Parsing portfolio (SEBI-compliant) from {pdf_path.name}")
         
         # Detect format
-        format_type = self.detect_document_format(pdf_path)
+        format_type = self.detect_document_format(pdf_path, doc)
+        
+        template = None
+        if self.table_templates and amc_id:
+            template = self.table_templates.get(str(amc_id))
+        
+        if template:
+            tables = self._tables_to_frames(self._template_tables(doc, template))
+            holdings = self._holdings_from_tables(tables)
+            validation = self.validator.validate(holdings, format_type)
+            
+            if self._template_result_ok(holdings, validation, template):
+                logger.info(f"✅ Extracted {len(holdings)} holdings via AMC table template | "
+                            f"Valid: {validation['is_valid']}")
+                return holdings, validation
+            
+            logger.warning(f"⚠️  Table template for AMC {amc_id} did not validate, "
+                           f"falling back to full extraction")
         
         # Extract tables
-        tables = self.extract_tables_from_pdf(pdf_path)
+        tables = self.extract_tables_from_pdf(pdf_path, doc)
         
         if not tables:
             logger.warning("⚠️  No tables found")
-            return 0, {'is_valid': False, 'errors': ['No tables found']}
+            return [], {'is_valid': False, 'errors': ['No tables found']}
+        
+        holdings = self._holdings_from_tables(tables)
         
+        # Validate against SEBI format
+        validation = self.validator.validate(holdings, format_type)
+        
+        if self.table_templates and amc_id and holdings and validation['is_valid']:
+            self._learn_table_template(str(amc_id), doc, validation)
+        
+        logger.info(f"✅ Extracted {len(holdings)} holdings | Valid: {validation['is_valid']}")
+        
+        return holdings, validation
+    
+    def _holdings_from_tables(self, tables: List[pd.DataFrame]) -> List[Dict]:
+        """Holdings from every portfolio-like table."""
         holdings = []
         
         # Find portfolio table (largest table with correct columns)
@@ -215,16 +403,7 @@ class StatutoryPdfParser:
             if len(table) < 5:
                 continue
             
-            col_names_lower = [str(c).lower() for c in table.columns]
-            
-            # Check for portfolio indicators
-            is_portfolio = any([
-                'instrument' in ' '.join(col_names_lower),
-                'security' in ' '.join(col_names_lower),
-                'isin' in ' '.join(col_names_lower)
-            ])
-            
-            if not is_portfolio:
+            if not self._is_portfolio_header(table.columns):
                 continue
             
             logger.info(f"✓ Found portfolio table with {len(table)} rows")
@@ -241,28 +420,87 @@ class StatutoryPdfParser:
                     holding['is_illiquid'] = self.detect_illiquid_marker(row)
                     holding['is_non_traded'] = self.detect_non_traded_marker(row)
                     
-                    # Save to database
-                    self.insert_holding_to_db(
-                        doc_id=doc_id,
-                        scheme_id=scheme_id,
-                        amc_id=amc_id,
-                        as_of_date=as_of_date,
-                        holding=holding,
-                        source_file=str(pdf_path)
-                    )
-                    
                     holdings.append(holding)
                 
                 except Exception as e:
                     logger.debug(f"Error parsing row {idx}: {e}")
                     continue
         
-        # Validate against SEBI format
-        validation = self.validator.validate(holdings, format_type)
+        return holdings
+    
+    @staticmethod
+    def _is_portfolio_header(columns) -> bool:
+        """Check for portfolio indicators in a table header."""
+        header = ' '.join(str(c).lower() for c in columns)
+        return any([
+            'instrument' in header,
+            'security' in header,
+            'isin' in header
+        ])
+    
+    # -------------------------------------------------------------------------
+    # PER-AMC TABLE TEMPLATES
+    # -------------------------------------------------------------------------
+    
+    def _template_tables(self, doc: PdfDocument, template: Dict) -> List[list]:
+        """Raw tables of the template region on every templated page."""
+        last_page = doc.page_count - 1 - template['pages_from_end']
+        tables = []
+        for page_no in range(template['start_page'], last_page + 1):
+            tables.extend(doc.region_tables(page_no, template['bbox'], template['columns']))
+        return tables
+    
+    @staticmethod
+    def _template_result_ok(holdings: List[Dict], validation: Dict, template: Dict) -> bool:
+        """
+        A templated extraction is accepted when it validates and raises no
+        warning the learning document did not already have (a misplaced crop
+        typically trips percentage_sum / min_holdings).
+        """
+        if not holdings or not validation['is_valid']:
+            return False
+        expected = set(template.get('expected_warnings') or [])
+        return set(validation.get('warnings') or []) <= expected
+    
+    def _learn_table_template(self, amc_id: str, doc: PdfDocument, validation: Dict):
+        """Store the geometry of the validated document's holdings tables for its AMC."""
+        pages = []
+        boxes = []
+        columns = None
+        most_rows = 0
         
-        logger.info(f"✅ Extracted {len(holdings)} holdings | Valid: {validation['is_valid']}")
+        for page_no, page_tables in sorted(doc.extracted_tables().items()):
+            for raw, (bbox, table_columns) in zip(page_tables, doc.table_geometry(page_no)):
+                # Same acceptance as _holdings_from_tables: header + at least 5 rows
+                if not raw or len(raw) < 6 or not self._is_portfolio_header(raw[0]):
+                    continue
+                if page_no not in pages:
+                    pages.append(page_no)
+                boxes.append(bbox)
+                if len(raw) > most_rows:
+                    most_rows = len(raw)
+                    columns = table_columns
         
-        return len(holdings), validation
+        if not pages:
+            # Holdings validated but their geometry is unknown; don't keep a stale template
+            self.table_templates.invalidate(amc_id)
+            return
+        
+        template = {
+            'amc_id': amc_id,
+            'start_page': min(pages),
+            'pages_from_end': doc.page_count - 1 - max(pages),
+            'bbox': [
+                min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes)
+            ],
+            'columns': columns,
+            'expected_warnings': validation.get('warnings') or [],
+            'learned_from': doc.pdf_path.name
+        }
+        self.table_templates.put(amc_id, template)
+        logger.info(f"📐 Learned table template for AMC {amc_id}: pages {min(pages) + 1}-{max(pages) + 1}, "
+                    f"{len(columns) - 1} columns")
     
     def parse_holding_row(self, row: pd.Series, columns: List[str]) -> Optional[Dict]:
         """Parse single holding row with SEBI fields."""
@@ -359,68 +597,98 @@ class StatutoryPdfParser:
     def insert_holding_to_db(self, doc_id: str, scheme_id: Optional[str],
                             amc_id: str, as_of_date: Optional[str],
                             holding: Dict, source_file: str):
-        """Insert holding with SEBI-compliant fields."""
+        """Insert a single holding with SEBI-compliant fields."""
         with self.engine.begin() as conn:
             conn.execute(
-                text("""
-                    INSERT INTO portfolio_holdings_raw (
-                        document_id, scheme_id, amc_id, as_of_date,
-                        security_name, isin_code, industry_sector, rating,
-                        quantity, market_value, portfolio_percentage,
-                        is_illiquid, is_non_traded, is_below_investment_grade,
-                        extraction_confidence, source_file, created_at
-                    ) VALUES (
-                        :doc_id, :scheme_id, :amc_id, :as_of_date,
-                        :security_name, :isin_code, :industry_sector, :rating,
-                        :quantity, :market_value, :portfolio_percentage,
-                        :is_illiquid, :is_non_traded, :is_below_investment_grade,
-                        0.85, :source_file, now()
-                    )
-                """),
-                {
-                    "doc_id": doc_id,
-                    "scheme_id": scheme_id,
-                    "amc_id": amc_id,
-                    "as_of_date": as_of_date,
-                    "security_name": holding.get('security_name'),
-                    "isin_code": holding.get('isin_code'),
-                    "industry_sector": holding.get('industry_sector'),
-                    "rating": holding.get('rating'),
-                    "quantity": holding.get('quantity'),
-                    "market_value": holding.get('market_value'),
-                    "portfolio_percentage": holding.get('portfolio_percentage'),
-                    "is_illiquid": holding.get('is_illiquid', False),
-                    "is_non_traded": holding.get('is_non_traded', False),
-                    "is_below_investment_grade": holding.get('is_below_investment_grade', False),
-                    "source_file": source_file
-                }
+                text(self.HOLDING_INSERT_SQL),
+                self._holding_params(doc_id, scheme_id, amc_id, as_of_date, holding, source_file)
             )
     
+    def _holding_params(self, doc_id: str, scheme_id: Optional[str],
+                        amc_id: str, as_of_date: Optional[str],
+                        holding: Dict, source_file: str) -> Dict:
+        """Bind parameters for HOLDING_INSERT_SQL."""
+        return {
+            "doc_id": doc_id,
+            "scheme_id": scheme_id,
+            "amc_id": amc_id,
+            "as_of_date": as_of_date,
+            "security_name": holding.get('security_name'),
+            "isin_code": holding.get('isin_code'),
+            "industry_sector": holding.get('industry_sector'),
+            "rating": holding.get('rating'),
+            "quantity": holding.get('quantity'),
+            "market_value": holding.get('market_value'),
+            "portfolio_percentage": holding.get('portfolio_percentage'),
+            "is_illiquid": holding.get('is_illiquid', False),
+            "is_non_traded": holding.get('is_non_traded', False),
+            "is_below_investment_grade": holding.get('is_below_investment_grade', False),
+            "source_file": source_file
+        }
+    
     # -------------------------------------------------------------------------
     # TER PARSER (SEBI Reg 52 Compliant)
     # -------------------------------------------------------------------------
     
     def parse_ter_document(self, pdf_path: Path, doc_id: str,
                           scheme_id: Optional[str], amc_id: str,
-                          as_of_date: Optional[str]) -> Tuple[bool, Dict]:
+                          as_of_date: Optional[str],
+                          doc: Optional[PdfDocument] = None) -> Tuple[bool, Dict]:
         """
-        Parse TER with SEBI Regulation 52 compliance.
+        Parse TER with SEBI Regulation 52 compliance and save it.
         
         Returns:
             (success, validation_result)
         """
+        ter_entries, validation = self.extract_ter_entries(pdf_path, doc)
+        
+        # Save to database
+        if ter_entries:
+            params = [
+                self._ter_params(doc_id, scheme_id, amc_id, as_of_date, ter, str(pdf_path))
+                for ter in ter_entries
+            ]
+            with self.engine.begin() as conn:
+                conn.execute(text(self.TER_INSERT_SQL), params)
+        
+        return bool(ter_entries), validation
+    
+    def extract_ter_entries(self, pdf_path: Path,
+                            doc: Optional[PdfDocument] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Extract TER entries with SEBI Regulation 52 validation (no database access).
+        
+        Returns:
+            (ter_entries, validation_result)
+        """
+        if doc is None:
+            with PdfDocument(pdf_path) as pdf_doc:
+                return self.extract_ter_entries(pdf_path, pdf_doc)
+        
         logger.info(f"💰 Parsing TER (SEBI Reg 52) from {pdf_path.name}")
         
-        text = self.extract_text_from_pdf(pdf_path)
-        tables = self.extract_tables_from_pdf(pdf_path)
+        # Targeted pages first; all pages when they yield no TER rows
+        ter_entries = self._find_ter_entries(pdf_path, doc, self.TER_PAGE_KEYWORDS)
+        if not ter_entries:
+            ter_entries = self._find_ter_entries(pdf_path, doc, None)
+        
+        if not ter_entries:
+            logger.warning("⚠️  Could not extract TER values")
+            return [], {'is_valid': False, 'errors': ['No TER values found']}
         
-        ter_entries = []
+        # Validate
+        validation = self.validator.validate(ter_entries, 'SEBI_TER')
         
-        # Pattern for TER values
-        ter_patterns = [
-            r'(?:total\s+)?(?:ter|expense\s+ratio)[:\s]+([0-9.]+)%?',
-            r'(?:regular|direct)\s+plan[:\s]+([0-9.]+)%?'
-        ]
+        logger.info(f"✅ Extracted TER for {len(ter_entries)} plans | Valid: {validation['is_valid']}")
+        
+        return ter_entries, validation
+    
+    def _find_ter_entries(self, pdf_path: Path, doc: PdfDocument,
+                          keywords: Optional[Tuple[str, ...]]) -> List[Dict]:
+        """TER rows from the text, else the tables, of the pages `keywords` target."""
+        text = self.extract_text_from_pdf(pdf_path, doc, keywords)
+        
+        ter_entries = []
         
         # Try extracting from text
         for plan_type in ['REGULAR', 'DIRECT']:
@@ -437,26 +705,13 @@ class StatutoryPdfParser:
                 except:
                     pass
         
-        # Try extracting from tables
+        # Try extracting from tables (only parsed when text gave nothing)
         if not ter_entries:
-            for table in tables:
+            for table in self.extract_tables_from_pdf(pdf_path, doc, keywords):
                 ter_data = self._extract_ter_from_table(table)
                 ter_entries.extend(ter_data)
         
-        if not ter_entries:
-            logger.warning("⚠️  Could not extract TER values")
-            return False, {'is_valid': False, 'errors': ['No TER values found']}
-        
-        # Validate
-        validation = self.validator.validate(ter_entries, 'SEBI_TER')
-        
-        # Save to database
-        for ter in ter_entries:
-            self._save_ter_to_db(doc_id, scheme_id, amc_id, as_of_date, ter, str(pdf_path))
-        
-        logger.info(f"✅ Extracted TER for {len(ter_entries)} plans | Valid: {validation['is_valid']}")
-        
-        return True, validation
+        return ter_entries
     
     def _extract_ter_from_table(self, table: pd.DataFrame) -> List[Dict]:
         """Extract TER from table."""
@@ -488,33 +743,19 @@ class StatutoryPdfParser:
         
         return ter_data
     
-    def _save_ter_to_db(self, doc_id: str, scheme_id: Optional[str], 
-                       amc_id: str, as_of_date: Optional[str],
-                       ter: Dict, source_file: str):
-        """Save TER to database."""
-        with self.engine.begin() as conn:
-            conn.execute(
-                text("""
-                    INSERT INTO ter_data_raw (
-                        document_id, scheme_id, amc_id, as_of_date,
-                        plan_type, total_ter,
-                        source_file, created_at
-                    ) VALUES (
-                        :doc_id, :scheme_id, :amc_id, :as_of_date,
-                        :plan_type, :total_ter,
-                        :source_file, now()
-                    )
-                """),
-                {
-                    "doc_id": doc_id,
-                    "scheme_id": scheme_id,
-                    "amc_id": amc_id,
-                    "as_of_date": as_of_date,
-                    "plan_type": ter.get('plan_type'),
-                    "total_ter": ter.get('total_ter'),
-                    "source_file": source_file
-                }
-            )
+    def _ter_params(self, doc_id: str, scheme_id: Optional[str],
+                    amc_id: str, as_of_date: Optional[str],
+                    ter: Dict, source_file: str) -> Dict:
+        """Bind parameters for TER_INSERT_SQL."""
+        return {
+            "doc_id": doc_id,
+            "scheme_id": scheme_id,
+            "amc_id": amc_id,
+            "as_of_date": as_of_date,
+            "plan_type": ter.get('plan_type'),
+            "total_ter": ter.get('total_ter'),
+            "source_file": source_file
+        }
     
     # -------------------------------------------------------------------------
     # MAIN DISPATCHER
@@ -522,70 +763,206 @@ class StatutoryPdfParser:
     
     def parse_document(self, doc_info: Dict) -> Tuple[bool, Dict]:
         """Parse document based on type with SEBI validation."""
+        result = self.extract_document(doc_info)
+        self.write_document_result(result)
+        return result['success'], result['validation']
+    
+    def extract_document(self, doc_info: Dict) -> Dict:
+        """
+        Parse one document without touching the database.
+        Safe to run in a worker process; the result is picklable and is
+        persisted by write_document_result().
+        
+        Unchanged files already parsed by the current parser version are
+        served from the parse cache.
+        """
+        start = time.monotonic()
         pdf_path = Path(doc_info['local_file_path'])
+        doc_type = doc_info['document_type']
+        
+        result = {
+            'doc_info': doc_info,
+            'success': False,
+            'validation': {'is_valid': False},
+            'holdings': [],
+            'ter_entries': [],
+            'elapsed': 0.0,
+            'cached': False,
+            'timed_out': False,
+            'memory_exceeded': False
+        }
         
         if not pdf_path.exists():
             logger.error(f"❌ File not found: {pdf_path}")
-            return False, {'is_valid': False, 'errors': ['File not found']}
+            result['validation'] = {'is_valid': False, 'errors': ['File not found']}
+            return result
         
-        doc_type = doc_info['document_type']
+        if doc_type not in self.PARSER_VERSIONS:
+            logger.warning(f"⚠️  Unsupported document type: {doc_type}")
+            return result
+        
+        version = self.PARSER_VERSIONS[doc_type]
+        sha256 = None
+        
+        if self.parse_cache:
+            sha256 = file_sha256(pdf_path)
+            entry = self.parse_cache.get(sha256, doc_type, version)
+            if entry:
+                logger.info(f"♻️  Parse cache hit for {pdf_path.name} ({doc_type} v{version})")
+                result.update({
+                    'success': entry['success'],
+                    'validation': entry['validation'],
+                    'holdings': entry['holdings'],
+                    'ter_entries': entry['ter_entries'],
+                    'cached': True,
+                    'elapsed': time.monotonic() - start
+                })
+                return result
+        
+        cacheable = False
+        tables = {}
+        
+        try:
+            # Open once; detection, tables and TER text share the page cache
+            with PdfDocument(pdf_path, time_budget=self.doc_time_budget) as doc:
+                if doc_type == 'PORTFOLIO':
+                    holdings, validation = self.extract_portfolio_holdings(
+                        pdf_path, doc, doc_info.get('amc_id'))
+                    result['holdings'] = holdings
+                    result['success'] = len(holdings) > 0
+                
+                else:
+                    ter_entries, validation = self.extract_ter_entries(pdf_path, doc)
+                    result['ter_entries'] = ter_entries
+                    result['success'] = bool(ter_entries)
+                
+                result['validation'] = validation
+                tables = doc.extracted_tables()
+                cacheable = True
+        
+        except TimeoutError as e:
+            # Not cached: a larger budget may succeed on the same file
+            logger.error(f"⏱️  {e}")
+            result['validation'] = {'is_valid': False, 'errors': [str(e)]}
+            result['timed_out'] = True
+        
+        except Exception as e:
+            logger.error(f"❌ Parsing failed: {e}")
+            result['validation'] = {'is_valid': False, 'errors': [str(e)]}
+        
+        if cacheable and self.parse_cache:
+            self.parse_cache.put(sha256, doc_type, version, {
+                'sha256': sha256,
+                'doc_type': doc_type,
+                'parser_version': version,
+                'format_type': result['validation'].get('format_type'),
+                'tables': {str(page): page_tables for page, page_tables in tables.items()},
+                'validation': result['validation'],
+                'success': result['success'],
+                'holdings': result['holdings'],
+                'ter_entries': result['ter_entries']
+            })
+        
+        result['elapsed'] = time.monotonic() - start
+        return result
+    
+    def write_document_result(self, result: Dict):
+        """
+        Persist one parse result in a single transaction: all holdings and
+        TER entries via executemany, plus the document status update.
+        If the batch is rejected the document is marked FAILED instead.
+        """
+        doc_info = result['doc_info']
         doc_id = doc_info['id']
         scheme_id = doc_info.get('scheme_id')
         amc_id = doc_info['amc_id']
         as_of_date = doc_info.get('document_date')
+        source_file = str(doc_info['local_file_path'])
         
-        success = False
-        validation = {'is_valid': False}
+        holding_params = [
+            self._holding_params(doc_id, scheme_id, amc_id, as_of_date, h, source_file)
+            for h in result['holdings']
+        ]
+        ter_params = [
+            self._ter_params(doc_id, scheme_id, amc_id, as_of_date, ter, source_file)
+            for ter in result['ter_entries']
+        ]
+        
+        start = time.monotonic()
         
         try:
-            if doc_type == 'PORTFOLIO':
-                count, validation = self.parse_portfolio_holdings(
-                    pdf_path, doc_id, scheme_id, amc_id, as_of_date
-                )
-                success = count > 0
-            
-            elif doc_type == 'TER':
-                success, validation = self.parse_ter_document(
-                    pdf_path, doc_id, scheme_id, amc_id, as_of_date
+            with self.engine.begin() as conn:
+                if holding_params:
+                    conn.execute(text(self.HOLDING_INSERT_SQL), holding_params)
+                if ter_params:
+                    conn.execute(text(self.TER_INSERT_SQL), ter_params)
+                
+                conn.execute(
+                    text(self.STATUS_UPDATE_SQL),
+                    self._status_params(doc_id, result['success'], result['validation'],
+                                        result.get('timed_out', False),
+                                        result.get('memory_exceeded', False))
                 )
             
-            else:
-                logger.warning(f"⚠️  Unsupported document type: {doc_type}")
+            self.rows_written += len(holding_params) + len(ter_params)
         
         except Exception as e:
-            logger.error(f"❌ Parsing failed: {e}")
-            validation = {'is_valid': False, 'errors': [str(e)]}
-        
-        # Update document status
-        self._update_document_status(doc_id, success, validation)
+            logger.error(f"❌ Bulk write failed for document {doc_id}: {e}")
+            result['success'] = False
+            result['validation'] = {
+                'is_valid': False,
+                'errors': result['validation'].get('errors', []) + [f'Write failed: {e}']
+            }
+            self._update_document_status(doc_id, False, result['validation'],
+                                         result.get('timed_out', False),
+                                         result.get('memory_exceeded', False))
         
-        return success, validation
+        self.write_seconds += time.monotonic() - start
     
-    def _update_document_status(self, doc_id: str, success: bool, validation: Dict):
+    def _update_document_status(self, doc_id: str, success: bool, validation: Dict,
+                                timed_out: bool = False, memory_exceeded: bool = False):
         """Update parsing status in database."""
         with self.engine.begin() as conn:
             conn.execute(
-                text("""
-                    UPDATE statutory_document_downloads
-                    SET parsing_status = :status,
-                        is_sebi_compliant = :is_compliant,
-                        sebi_format_type = :format_type,
-                        validation_errors = :errors::jsonb,
-                        parsed_at = now(),
-                        updated_at = now()
-                    WHERE id = :doc_id
-                """),
-                {
-                    "doc_id": doc_id,
-                    "status": 'SUCCESS' if success else 'FAILED',
-                    "is_compliant": validation.get('is_valid', False),
-                    "format_type": validation.get('format_type'),
-                    "errors": str(validation.get('errors', []))
-                }
+                text(self.STATUS_UPDATE_SQL),
+                self._status_params(doc_id, success, validation, timed_out, memory_exceeded)
             )
     
-    def run(self, doc_type: Optional[str] = None, limit: int = 100):
-        """Parse all pending documents with SEBI validation."""
+    def _status_params(self, doc_id: str, success: bool, validation: Dict,
+                       timed_out: bool = False, memory_exceeded: bool = False) -> Dict:
+        """
+        Bind parameters for STATUS_UPDATE_SQL. TIMEOUT and MEMORY (worker
+        killed over its RSS budget) are terminal: get_pending_documents only
+        retries PENDING / FAILED, and these would just be killed again.
+        """
+        if timed_out:
+            status = 'TIMEOUT'
+        elif memory_exceeded:
+            status = 'MEMORY'
+        else:
+            status = 'SUCCESS' if success else 'FAILED'
+        return {
+            "doc_id": doc_id,
+            "status": status,
+            "is_compliant": validation.get('is_valid', False),
+            "format_type": validation.get('format_type'),
+            "errors": json.dumps(validation.get('errors', []), default=str)
+        }
+    
+    def run(self, doc_type: Optional[str] = None, limit: int = 100, workers: int = 1,
+            isolate: bool = True):
+        """
+        Parse all pending documents with SEBI validation.
+        
+        Args:
+            doc_type: Only parse this document type (e.g. 'PORTFOLIO', 'TER')
+            limit: Maximum documents to parse
+            workers: Number of worker subprocesses; results are written back
+                     by this process
+            isolate: Parse every document in a supervised worker subprocess
+                     (wall-clock / RSS budgets enforced by killing it);
+                     False parses in-process, for debugging
+        """
         logger.info("🚀 Starting PDF parser (SEBI-compliant)...")
         
         pending_docs = self.get_pending_documents(doc_type)
@@ -594,27 +971,112 @@ class StatutoryPdfParser:
             logger.info("✅ No pending documents")
             return
         
+        docs = pending_docs[:limit]
         logger.info(f"📋 Found {len(pending_docs)} documents")
         
+        start = time.monotonic()
+        self.rows_written = 0
+        self.write_seconds = 0.0
         success_count = 0
         compliant_count = 0
+        cached_count = 0
+        timeout_count = 0
+        latencies = []
         
-        for i, doc in enumerate(pending_docs[:limit], 1):
-            logger.info(f"[{i}/{min(len(pending_docs), limit)}] Parsing {doc['document_type']}")
+        for i, result in enumerate(self._iter_results(docs, workers, isolate), 1):
+            doc = result['doc_info']
+            logger.info(f"[{i}/{len(docs)}] Parsed {doc['document_type']} "
+                        f"in {result['elapsed']:.1f}s{' (cached)' if result.get('cached') else ''}")
+            
+            latencies.append(result['elapsed'])
+            if result.get('cached'):
+                cached_count += 1
+            if result.get('timed_out'):
+                timeout_count += 1
             
-            success, validation = self.parse_document(doc)
+            self.write_document_result(result)
             
-            if success:
+            if result['success']:
                 success_count += 1
-                if validation.get('is_valid'):
+                if result['validation'].get('is_valid'):
                     compliant_count += 1
         
+        elapsed = time.monotonic() - start
+        rows_per_sec = self.rows_written / self.write_seconds if self.write_seconds else 0.0
+        
         logger.info(f"""
 🎉 Parsing complete!
-   Total: {min(len(pending_docs), limit)}
+   Total: {len(docs)}
    Success: {success_count}
    SEBI Compliant: {compliant_count}
+   Timed out: {timeout_count}
+   From parse cache: {cached_count}
+   Workers: {max(1, workers)}{' (isolated)' if isolate else ''}
+   Elapsed: {elapsed:.1f}s
+   Latency: {format_latency_percentiles(latencies)}
+   Rows written: {self.rows_written} in {self.write_seconds:.2f}s ({rows_per_sec:,.0f} rows/sec)
         """)
+    
+    def _iter_results(self, docs: List[Dict], workers: int, isolate: bool = True):
+        """Yield extract_document() results, in-process or from isolated worker subprocesses."""
+        if not isolate:
+            for doc in docs:
+                yield self.extract_document(doc)
+            return
+        
+        with IsolatedWorkerPool(
+            _parse_in_worker,
+            workers=min(max(1, workers), len(docs)),
+            time_budget=self.doc_time_budget,
+            rss_budget_mb=self.rss_budget_mb,
+            initializer=_init_parse_worker,
+            initargs=(self.db_url, self.doc_time_budget, self.cache_dir, self.template_dir)
+        ) as pool:
+            for outcome in pool.imap_unordered(docs):
+                if outcome.status == TASK_OK:
+                    result = outcome.result
+                    # Supervisor wall-clock, so latency includes worker overhead
+                    result['elapsed'] = outcome.elapsed
+                    yield result
+                    continue
+                
+                # Killed over budget or crashed; record the document without a result
+                logger.error(f"❌ Worker {outcome.status.lower()} on document "
+                             f"{outcome.item['id']}: {outcome.error}")
+                yield {
+                    'doc_info': outcome.item,
+                    'success': False,
+                    'validation': {'is_valid': False, 'errors': [outcome.error]},
+                    'holdings': [],
+                    'ter_entries': [],
+                    'elapsed': outcome.elapsed,
+                    'cached': False,
+                    'timed_out': outcome.status == TASK_TIMEOUT,
+                    'memory_exceeded': outcome.status == TASK_MEMORY
+                }
+
+
+# -------------------------------------------------------------------------
+# ISOLATED WORKERS
+# -------------------------------------------------------------------------
+
+_worker_parser: Optional[StatutoryPdfParser] = None
+
+
+def _init_parse_worker(db_url: str, doc_time_budget: Optional[float],
+                       cache_dir: Optional[Path], template_dir: Optional[Path]):
+    """Worker initializer: each worker process gets its own parser and engine."""
+    global _worker_parser
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+    )
+    _worker_parser = StatutoryPdfParser(db_url, doc_time_budget=doc_time_budget,
+                                        cache_dir=cache_dir, template_dir=template_dir)
+
+
+def _parse_in_worker(doc_info: Dict) -> Dict:
+    return _worker_parser.extract_document(doc_info)
 
 
 def main():
@@ -623,10 +1085,16 @@ def main():
         format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
     )
     
-    from Etl.utils import engine
+    from Etl.utils import engine, settings
     
-    parser = StatutoryPdfParser(db_url=str(engine.url))
-    parser.run(limit=50)
+    parser = StatutoryPdfParser(
+        db_url=str(engine.url),
+        doc_time_budget=settings.get('phase3', {}).get('pdf_parsing', {}).get('timeout_seconds'),
+        cache_dir=settings.get('paths', {}).get('parse_cache_dir'),
+        template_dir=settings.get('paths', {}).get('table_template_dir'),
+        rss_budget_mb=settings.get('phase3', {}).get('pdf_parsing', {}).get('max_rss_mb')
+    )
+    parser.run(limit=50, workers=settings.get('performance', {}).get('max_workers', 1))
 
 
 if __name__ == "__main__":
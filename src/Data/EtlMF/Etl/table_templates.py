@@ -0,0 +1,92 @@
+# Etl/table_templates.py
+"""
+Per-AMC Table Templates
+-----------------------
+AMC portfolio PDFs keep the same layout month to month, so once one
+document has been parsed and validated, the geometry of its holdings table
+is stored as a template for that AMC:
+
+- start_page / pages_from_end : which pages hold the holdings table
+                                (counted from the end, so a longer month
+                                still covers every holdings page)
+- bbox                        : union bounding box of the table on those pages
+- columns                     : column boundary x-positions
+- expected_warnings           : validation warnings the learning run had
+
+Later documents of the AMC crop to that region and extract with explicit
+vertical lines instead of running pdfplumber's default detection on every
+page. The parser falls back to full extraction (and re-learns) when the
+templated result does not validate.
+
+Layout:
+    <template_dir>/<amc_id>.json
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("mf.etl.table_templates")
+
+# Bump when the template layout changes; older templates are ignored
+TEMPLATE_VERSION = 1
+
+
+class TableTemplateStore:
+    """
+    File-per-AMC JSON store; safe to share between worker processes.
+    """
+
+    def __init__(self, template_dir: Path):
+        self.template_dir = Path(template_dir)
+        self.template_dir.mkdir(parents=True, exist_ok=True)
+        self._loaded: Dict[str, Optional[Dict]] = {}
+
+    def _path(self, amc_id: str) -> Path:
+        return self.template_dir / f"{amc_id}.json"
+
+    def get(self, amc_id: str) -> Optional[Dict]:
+        if amc_id in self._loaded:
+            return self._loaded[amc_id]
+
+        template = None
+        path = self._path(amc_id)
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as fh:
+                    template = json.load(fh)
+                if template.get('version') != TEMPLATE_VERSION:
+                    template = None
+            except Exception as e:
+                logger.warning(f"⚠️  Ignoring unreadable table template {path.name}: {e}")
+                template = None
+
+        self._loaded[amc_id] = template
+        return template
+
+    def put(self, amc_id: str, template: Dict):
+        template = dict(template, version=TEMPLATE_VERSION,
+                        learned_at=datetime.now().isoformat(timespec='seconds'))
+        path = self._path(amc_id)
+
+        # Write to a temp file and rename so concurrent readers never see a partial template
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(template, fh, indent=2)
+            os.replace(tmp_path, path)
+            self._loaded[amc_id] = template
+        except Exception as e:
+            logger.warning(f"⚠️  Could not write table template {path.name}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def invalidate(self, amc_id: str):
+        """Drop a template that no longer matches the AMC's layout."""
+        self._loaded[amc_id] = None
+        path = self._path(amc_id)
+        if path.exists():
+            path.unlink()
@@ -8,9 +8,17 @@ Executes complex multi-step navigation like kfin_fetcher.py
 Architecture:
 1. Load AMC links from Structured_portfolio.csv
 2. Load step definitions from amc_crawl_steps.yaml
-3. Execute steps using Playwright
-4. Smart file organization
-5. Track downloads in database
+3. Direct file links: HTTP fast path (HEAD probe + conditional GET);
+   everything else: execute steps using Playwright (one pooled headless
+   browser, one isolated context per AMC job); run_async() crawls jobs
+   concurrently under a global cap and a per-domain politeness limit;
+   the request behind each browser download is recorded as a replay plan
+   and replayed over plain HTTP on later runs (browser only on failure)
+4. Smart file organization: content-addressed store (SHA-256) with hard
+   links into downloads/<doc_type>/<amc>/; re-crawled identical documents
+   add no file; once parsed successfully they are marked UNCHANGED (never
+   re-queued for parsing), while failed parses stay in the parse queue
+5. Track downloads in database (one row per document content)
 """
 
 import logging
@@ -18,23 +26,93 @@ import yaml
 import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
 from calendar import monthrange
 import re
 import time
+import asyncio
+import functools
+import inspect
+from collections import deque
+from urllib.parse import urlparse
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout, Page
+from playwright.sync_api import TimeoutError as PlaywrightTimeout, Page
+from playwright.async_api import TimeoutError as AsyncPlaywrightTimeout
 from sqlalchemy import create_engine, text
 
+from Etl.browser_pool import BrowserPool, AsyncBrowserPool
+from Etl.isolated_pool import format_latency_percentiles
+from Etl.http_fetcher import HttpFetcher, FETCH_DOWNLOADED, FETCH_NOT_MODIFIED, FETCH_FAILED
+from Etl.replay_plans import RequestRecorder, ReplayPlanStore, disclosure_period, rendered_requests
+from Etl.download_store import DownloadStore, StoredDocument
+
 logger = logging.getLogger("mf.etl.universal_crawler")
 
+# A page counts as settled once no request has been in flight for this long
+NETWORK_QUIET_MS = 300
+# Poll tick while waiting for a condition (lets Playwright dispatch events)
+WAIT_POLL_MS = 50
+
+
+class NetworkActivity:
+    """
+    In-flight request counter for one page, fed by Playwright request
+    events; backs the 'network quiet' wait that replaces fixed sleeps.
+    """
+    
+    def __init__(self, page):
+        self.inflight = 0
+        self.last_change = time.monotonic()
+        page.on("request", self._started)
+        page.on("requestfinished", self._ended)
+        page.on("requestfailed", self._ended)
+    
+    def _started(self, request):
+        self.inflight += 1
+        self.last_change = time.monotonic()
+    
+    def _ended(self, request):
+        self.inflight = max(0, self.inflight - 1)
+        self.last_change = time.monotonic()
+    
+    def mark(self):
+        """Restart the quiet window (call right after an action)."""
+        self.last_change = time.monotonic()
+    
+    def is_quiet(self, quiet_ms: int = NETWORK_QUIET_MS) -> bool:
+        return self.inflight == 0 and (time.monotonic() - self.last_change) * 1000 >= quiet_ms
+
 
 class StepExecutor:
-    """Executes individual crawl steps on webpage."""
+    """
+    Executes individual crawl steps on webpage.
     
-    def __init__(self, page: Page):
+    Step handling that does not touch the page (dispatch, variable and value
+    resolution, loop contexts, result bookkeeping) lives here and is shared
+    with AsyncStepExecutor, which only overrides the Playwright calls.
+    """
+    
+    # Actions understood in amc_crawl_steps.yaml (handler: _<action>)
+    ACTIONS = (
+        'navigate', 'click', 'click_expand', 'hover_menu', 'select_dropdown',
+        'set_date', 'click_download', 'get_scheme_links', 'get_scheme_list',
+        'open_new_tab', 'close_tab', 'wait_for_element',
+        'for_each_scheme', 'for_each_type', 'for_each_link'
+    )
+    # Handlers that also take the runtime context
+    CONTEXT_ACTIONS = (
+        'select_dropdown', 'set_date', 'for_each_scheme', 'for_each_type', 'for_each_link'
+    )
+    
+    def __init__(self, page: Page, step_timings: Optional[List[Dict]] = None):
         self.page = page
         self.downloaded_files = []
+        self.network = NetworkActivity(page)
+        # Request behind each download (replay plan capture)
+        self.recorder = RequestRecorder(page)
+        self.captured_requests: List[Optional[Dict]] = []
+        # Wall time of every executed step (shared with nested executors)
+        self.step_timings = [] if step_timings is None else step_timings
     
     def execute_step(self, step: Dict, context: Dict) -> Any:
         """
@@ -44,6 +122,31 @@ class StepExecutor:
             step: Step definition from YAML
             context: Runtime context (variables, state)
         """
+        step, call = self._prepare_step(step, context)
+        if call is None:
+            return None
+        
+        started = time.perf_counter()
+        status = 'OK'
+        try:
+            return call()
+        except Exception as e:
+            status = 'FAILED'
+            logger.error(f"Step execution failed ({step.get('action')}): {e}")
+            raise
+        finally:
+            self._record_timing(step, context, time.perf_counter() - started, status)
+    
+    # ------------------------------------------------------------------
+    # Shared step logic (no page I/O)
+    # ------------------------------------------------------------------
+    
+    def _prepare_step(self, step: Dict, context: Dict) -> Tuple[Dict, Optional[Callable[[], Any]]]:
+        """
+        Substitute variables and bind the step's handler via ACTIONS /
+        CONTEXT_ACTIONS. Unknown actions are logged, timed as UNKNOWN and
+        returned without a handler.
+        """
         action = step.get('action')
         
         # Replace variables in step (e.g., {scheme_type} -> 'open_ended')
@@ -51,59 +154,26 @@ class StepExecutor:
         
         logger.debug(f"Executing: {action} - {step.get('description', '')}")
         
-        try:
-            if action == "navigate":
-                return self._navigate(step)
-            
-            elif action == "click":
-                return self._click(step)
-            
-            elif action == "click_expand":
-                return self._click_expand(step)
-            
-            elif action == "hover_menu":
-                return self._hover_menu(step)
-            
-            elif action == "select_dropdown":
-                return self._select_dropdown(step, context)
-            
-            elif action == "set_date":
-                return self._set_date(step, context)
-            
-            elif action == "click_download":
-                return self._click_download(step)
-            
-            elif action == "get_scheme_links":
-                return self._get_scheme_links(step)
-            
-            elif action == "get_scheme_list":
-                return self._get_scheme_list(step)
-            
-            elif action == "open_new_tab":
-                return self._open_new_tab(step)
-            
-            elif action == "close_tab":
-                return self._close_tab(step)
-            
-            elif action == "wait_for_element":
-                return self._wait_for_element(step)
-            
-            elif action == "for_each_scheme":
-                return self._for_each_scheme(step, context)
-            
-            elif action == "for_each_type":
-                return self._for_each_type(step, context)
-            
-            elif action == "for_each_link":
-                return self._for_each_link(step, context)
-            
-            else:
-                logger.warning(f"Unknown action: {action}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Step execution failed ({action}): {e}")
-            raise
+        handler = getattr(self, f"_{action}", None) if action in self.ACTIONS else None
+        if handler is None:
+            logger.warning(f"Unknown action: {action}")
+            self._record_timing(step, context, 0.0, 'UNKNOWN')
+            return step, None
+        
+        if action in self.CONTEXT_ACTIONS:
+            return step, functools.partial(handler, step, context)
+        return step, functools.partial(handler, step)
+    
+    def _record_timing(self, step: Dict, context: Dict, seconds: float, status: str):
+        self.step_timings.append({
+            'amc_name': context.get('amc_name'),
+            'doc_type': context.get('doc_type'),
+            'action': step.get('action'),
+            'description': step.get('description'),
+            'seconds': seconds,
+            'status': status,
+            'recorded_at': datetime.now()
+        })
     
     def _substitute_variables(self, step: Dict, context: Dict) -> Dict:
         """Replace {variable} placeholders with context values."""
@@ -115,6 +185,156 @@ class StepExecutor:
         
         return eval(step_str)  # Reconstruct dict
     
+    def _quiet_deadline(self, timeout_ms: int) -> float:
+        """Restart the network quiet window; monotonic deadline for the wait."""
+        self.network.mark()
+        return time.monotonic() + timeout_ms / 1000
+    
+    def _still_busy(self, deadline: float) -> bool:
+        return not self.network.is_quiet() and time.monotonic() < deadline
+    
+    @staticmethod
+    def _step_selectors(step: Dict) -> List[str]:
+        selectors = step.get('selectors', [])
+        return [selectors] if isinstance(selectors, str) else selectors
+    
+    @staticmethod
+    def _dropdown_value(value: Any) -> Any:
+        """Resolve dynamic dropdown values (latest / previous_month / ...)."""
+        if value == "latest":
+            return str(datetime.now().year)
+        prev_month = datetime.now().replace(day=1) - timedelta(days=1)
+        if value == "previous_month":
+            return prev_month.strftime("%B")  # "November"
+        if value == "last_day_previous_month":
+            return prev_month.strftime("%d-%m-%Y")
+        return value
+    
+    def _dropdown_attempts(self, step: Dict) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        (selector, pattern, select_option kwargs) in the order tried: every
+        value pattern of every selector, by label first, then by value.
+        """
+        value = self._dropdown_value(step.get('value'))
+        
+        for selector in step.get('selectors', []):
+            for pattern in step.get('value_patterns', [value]):
+                yield selector, pattern, {'label': pattern}
+                yield selector, pattern, {'value': pattern}
+    
+    @staticmethod
+    def _date_value(value: Any, format_str: str) -> Any:
+        """Resolve dynamic date values (last_day_previous_month)."""
+        if value == "last_day_previous_month":
+            prev_month = datetime.now().replace(day=1) - timedelta(days=1)
+            return prev_month.strftime(format_str)
+        return value
+    
+    def _date_fill(self, step: Dict) -> Tuple[str, Any, List[str]]:
+        """(field, resolved date, candidate selectors) of a set_date step."""
+        field = step.get('field')
+        date_value = self._date_value(step.get('value'), step.get('format', '%d-%m-%Y'))
+        selectors = step.get('selectors', [f"input[name='{field}']", f"#{field}"])
+        return field, date_value, selectors
+    
+    @staticmethod
+    def _is_excluded(text: str, exclude_text: List[str]) -> bool:
+        """Download link text matches an exclusion (e.g., skip "Passive" factsheets)."""
+        text = text.lower()
+        if any(excl in text for excl in exclude_text):
+            logger.debug(f"Skipping excluded: {text}")
+            return True
+        return False
+    
+    def _record_download(self, url: str, path: str) -> Path:
+        """Keep the request behind a completed download for replay."""
+        downloaded_file = Path(path)
+        self.captured_requests.append(self.recorder.resolve(url))
+        logger.info(f"📥 Download complete: {downloaded_file.name}")
+        return downloaded_file
+    
+    @staticmethod
+    def _scheme_option(text: str, value: Optional[str], exclude_patterns: List[str]) -> Optional[Dict]:
+        """Dropdown option as a scheme entry; None for excluded patterns."""
+        text = text.strip()
+        if any(pat.lower() in text.lower() for pat in exclude_patterns):
+            return None
+        return {'text': text, 'value': value}
+    
+    @staticmethod
+    def _scheme_contexts(context: Dict) -> Iterator[Dict]:
+        """for_each_scheme: one context per scheme."""
+        for scheme in context.get('schemes', []):
+            logger.info(f"📊 Processing scheme: {scheme.get('text', '')}")
+            
+            scheme_context = context.copy()
+            scheme_context['current_scheme'] = scheme
+            yield scheme_context
+    
+    @staticmethod
+    def _type_contexts(step: Dict, context: Dict) -> Iterator[Dict]:
+        """for_each_type: one context per loop value (e.g., scheme types for TER)."""
+        variable = step.get('variable')
+        
+        for type_value in context.get('loop_values', []):
+            logger.info(f"🔄 Processing {variable}: {type_value}")
+            
+            type_context = context.copy()
+            type_context[variable] = type_value
+            yield type_context
+    
+    @staticmethod
+    def _link_contexts(context: Dict) -> Iterator[Tuple[str, Dict]]:
+        """for_each_link: (link, context) per scheme link."""
+        for link in context.get('scheme_links', []):
+            logger.info(f"🔗 Processing link: {link}")
+            
+            link_context = context.copy()
+            link_context['current_link'] = link
+            yield link, link_context
+    
+    def _absorb(self, executor: "StepExecutor") -> None:
+        """Take over a nested executor's downloads and their captured requests."""
+        self.downloaded_files.extend(executor.downloaded_files)
+        self.captured_requests.extend(executor.captured_requests)
+    
+    # ------------------------------------------------------------------
+    # Page I/O (overridden by AsyncStepExecutor)
+    # ------------------------------------------------------------------
+    
+    def wait_settled(self, timeout_ms: int, selector: Optional[str] = None,
+                     state: str = 'visible') -> None:
+        """
+        Condition wait after an action, capped at timeout_ms:
+        - selector given: until it reaches `state` (visible/attached/hidden/detached)
+        - otherwise: until no request has been in flight for NETWORK_QUIET_MS
+        Timeouts are not errors - the next step's own waits take over.
+        """
+        if not timeout_ms or self.page.is_closed():
+            return
+        
+        if selector:
+            try:
+                self.page.wait_for_selector(selector, state=state, timeout=timeout_ms)
+            except PlaywrightTimeout:
+                logger.debug(f"Wait for {selector} ({state}) timed out after {timeout_ms}ms")
+            return
+        
+        deadline = self._quiet_deadline(timeout_ms)
+        while self._still_busy(deadline):
+            self.page.wait_for_timeout(WAIT_POLL_MS)
+    
+    def _settle_after(self, step: Dict, default_ms: int) -> Any:
+        """
+        Step's wait: `wait_for` selector or network quiet, capped by `wait_after`
+        (returns wait_settled's result, an awaitable on the async executor).
+        """
+        return self.wait_settled(
+            step.get('wait_after', default_ms),
+            selector=step.get('wait_for'),
+            state=step.get('wait_state', 'visible')
+        )
+    
     def _navigate(self, step: Dict) -> None:
         """Navigate to URL."""
         url = step.get('url')
@@ -123,13 +343,11 @@ class StepExecutor:
         
         logger.info(f"🌐 Navigating to: {url}")
         self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
-        time.sleep(step.get('wait_after', 2000) / 1000)
+        self._settle_after(step, 2000)
     
     def _click(self, step: Dict) -> None:
         """Click element using multiple selector strategies."""
-        selectors = step.get('selectors', [])
-        if isinstance(selectors, str):
-            selectors = [selectors]
+        selectors = self._step_selectors(step)
         
         for selector in selectors:
             try:
@@ -138,7 +356,7 @@ class StepExecutor:
                 if self.page.locator(selector).count() > 0:
                     self.page.locator(selector).first.click(timeout=10000)
                     logger.info(f"✅ Clicked: {selector}")
-                    time.sleep(step.get('wait_after', 1000) / 1000)
+                    self._settle_after(step, 1000)
                     return
             except Exception as e:
                 logger.debug(f"Selector failed: {e}")
@@ -146,9 +364,9 @@ class StepExecutor:
         
         raise Exception(f"Could not click any selector: {selectors}")
     
-    def _click_expand(self, step: Dict) -> None:
+    def _click_expand(self, step: Dict) -> Any:
         """Click to expand collapsible section."""
-        self._click(step)
+        return self._click(step)
     
     def _hover_menu(self, step: Dict) -> None:
         """Hover over menu to reveal dropdown."""
@@ -156,10 +374,9 @@ class StepExecutor:
         
         for selector in selectors:
             try:
-                element = self.page.locator(selector).first
-                element.hover(timeout=5000)
+                self.page.locator(selector).first.hover(timeout=5000)
                 logger.info(f"✅ Hovered: {selector}")
-                time.sleep(step.get('wait_after', 1000) / 1000)
+                self._settle_after(step, 1000)
                 return
             except:
                 continue
@@ -169,59 +386,20 @@ class StepExecutor:
     def _select_dropdown(self, step: Dict, context: Dict) -> None:
         """Select dropdown value with smart value detection."""
         field = step.get('field')
-        value = step.get('value')
-        selectors = step.get('selectors', [])
         
-        # Calculate dynamic values
-        if value == "latest":
-            value = str(datetime.now().year)
-        elif value == "previous_month":
-            prev_month = datetime.now().replace(day=1) - timedelta(days=1)
-            value = prev_month.strftime("%B")  # "November"
-        elif value == "last_day_previous_month":
-            prev_month = datetime.now().replace(day=1) - timedelta(days=1)
-            value = prev_month.strftime("%d-%m-%Y")
-        
-        # Try value patterns if specified
-        value_patterns = step.get('value_patterns', [value])
-        
-        for selector in selectors:
+        for selector, pattern, option in self._dropdown_attempts(step):
             try:
-                dropdown = self.page.locator(selector).first
-                
-                # Try each value pattern
-                for pattern in value_patterns:
-                    try:
-                        dropdown.select_option(label=pattern, timeout=5000)
-                        logger.info(f"✅ Selected: {field} = {pattern}")
-                        return
-                    except:
-                        try:
-                            dropdown.select_option(value=pattern, timeout=5000)
-                            logger.info(f"✅ Selected: {field} = {pattern}")
-                            return
-                        except:
-                            continue
+                self.page.locator(selector).first.select_option(timeout=5000, **option)
+                logger.info(f"✅ Selected: {field} = {pattern}")
+                return
             except:
                 continue
         
-        logger.warning(f"Could not select: {field} = {value}")
+        logger.warning(f"Could not select: {field} = {self._dropdown_value(step.get('value'))}")
     
     def _set_date(self, step: Dict, context: Dict) -> None:
         """Set date field."""
-        field = step.get('field')
-        value = step.get('value')
-        format_str = step.get('format', '%d-%m-%Y')
-        
-        # Calculate date
-        if value == "last_day_previous_month":
-            prev_month = datetime.now().replace(day=1) - timedelta(days=1)
-            date_value = prev_month.strftime(format_str)
-        else:
-            date_value = value
-        
-        # Try to fill date field
-        selectors = step.get('selectors', [f"input[name='{field}']", f"#{field}"])
+        field, date_value, selectors = self._date_fill(step)
         
         for selector in selectors:
             try:
@@ -237,25 +415,17 @@ class StepExecutor:
         """Click download button and capture file."""
         selectors = step.get('selectors', [])
         timeout_ms = step.get('timeout_ms', 180000)
-        wait_for_download = step.get('wait_for_download', True)
-        
-        # Exclude patterns (e.g., skip "Passive" factsheets)
         exclude_text = step.get('exclude_text', [])
         
         downloaded_file = None
         
-        if wait_for_download:
+        if step.get('wait_for_download', True):
             # Setup download listener
             with self.page.expect_download(timeout=timeout_ms) as download_info:
                 for selector in selectors:
                     try:
-                        elements = self.page.locator(selector).all()
-                        
-                        for elem in elements:
-                            # Check exclusion patterns
-                            text = elem.inner_text().lower()
-                            if any(excl in text for excl in exclude_text):
-                                logger.debug(f"Skipping excluded: {text}")
+                        for elem in self.page.locator(selector).all():
+                            if self._is_excluded(elem.inner_text(), exclude_text):
                                 continue
                             
                             elem.click(timeout=10000)
@@ -266,8 +436,7 @@ class StepExecutor:
                         continue
                 
                 download = download_info.value
-                downloaded_file = Path(download.path())
-                logger.info(f"📥 Download complete: {downloaded_file.name}")
+                downloaded_file = self._record_download(download.url, download.path())
         
         else:
             # Just click without waiting
@@ -278,14 +447,10 @@ class StepExecutor:
     
     def _get_scheme_links(self, step: Dict) -> List[str]:
         """Extract all scheme detail page links."""
-        container = step.get('container', 'body')
-        link_selector = step.get('link_selector', 'a')
+        container_elem = self.page.locator(step.get('container', 'body')).first
+        link_elements = container_elem.locator(step.get('link_selector', 'a')).all()
         
         links = []
-        
-        container_elem = self.page.locator(container).first
-        link_elements = container_elem.locator(link_selector).all()
-        
         for elem in link_elements:
             try:
                 href = elem.get_attribute('href')
@@ -297,26 +462,20 @@ class StepExecutor:
         logger.info(f"📋 Found {len(links)} scheme links")
         return links
     
-    def _get_scheme_list(self, step: Dict) -> List[str]:
+    def _get_scheme_list(self, step: Dict) -> List[Dict]:
         """Get list of schemes from dropdown options."""
-        selectors = step.get('selectors', [])
         exclude_patterns = step.get('exclude_patterns', [])
         
         schemes = []
         
-        for selector in selectors:
+        for selector in step.get('selectors', []):
             try:
-                options = self.page.locator(selector).all()
-                
-                for option in options:
-                    text = option.inner_text().strip()
-                    value = option.get_attribute('value')
-                    
-                    # Skip excluded patterns
-                    if any(pat.lower() in text.lower() for pat in exclude_patterns):
-                        continue
-                    
-                    schemes.append({'text': text, 'value': value})
+                for option in self.page.locator(selector).all():
+                    scheme = self._scheme_option(
+                        option.inner_text(), option.get_attribute('value'), exclude_patterns
+                    )
+                    if scheme:
+                        schemes.append(scheme)
                 
                 break
             except:
@@ -330,10 +489,9 @@ class StepExecutor:
         # Playwright handles new tab automatically
         pass
     
-    def _close_tab(self, step: Dict) -> None:
+    def _close_tab(self, step: Dict) -> Any:
         """Close current tab."""
-        self.page.close()
-        time.sleep(step.get('wait_after', 1000) / 1000)
+        return self.page.close()
     
     def _wait_for_element(self, step: Dict) -> None:
         """Wait for element to appear."""
@@ -352,54 +510,252 @@ class StepExecutor:
     
     def _for_each_scheme(self, step: Dict, context: Dict) -> None:
         """Loop through schemes."""
-        schemes = context.get('schemes', [])
-        sub_steps = step.get('steps', [])
-        
-        for scheme in schemes:
-            logger.info(f"📊 Processing scheme: {scheme.get('text', '')}")
-            
-            scheme_context = context.copy()
-            scheme_context['current_scheme'] = scheme
-            
-            for sub_step in sub_steps:
+        for scheme_context in self._scheme_contexts(context):
+            for sub_step in step.get('steps', []):
                 self.execute_step(sub_step, scheme_context)
     
     def _for_each_type(self, step: Dict, context: Dict) -> None:
         """Loop through types (e.g., scheme types for TER)."""
-        variable = step.get('variable')
-        types = context.get('loop_values', [])
-        sub_steps = step.get('steps', [])
-        
-        for type_value in types:
-            logger.info(f"🔄 Processing {variable}: {type_value}")
-            
-            type_context = context.copy()
-            type_context[variable] = type_value
-            
-            for sub_step in sub_steps:
+        for type_context in self._type_contexts(step, context):
+            for sub_step in step.get('steps', []):
                 self.execute_step(sub_step, type_context)
     
     def _for_each_link(self, step: Dict, context: Dict) -> None:
-        """Loop through links."""
-        links = context.get('scheme_links', [])
-        sub_steps = step.get('steps', [])
-        
-        for link in links:
-            logger.info(f"🔗 Processing link: {link}")
-            
-            link_context = context.copy()
-            link_context['current_link'] = link
-            
-            # Open link in new tab
+        """Loop through links, each opened in a new tab."""
+        for link, link_context in self._link_contexts(context):
             new_page = self.page.context.new_page()
-            new_page.goto(link, timeout=60000)
-            
-            # Execute sub-steps on new page
-            executor = StepExecutor(new_page)
-            for sub_step in sub_steps:
-                executor.execute_step(sub_step, link_context)
+            try:
+                new_page.goto(link, timeout=60000)
+                
+                # Execute sub-steps on new page
+                executor = StepExecutor(new_page, self.step_timings)
+                try:
+                    for sub_step in step.get('steps', []):
+                        executor.execute_step(sub_step, link_context)
+                finally:
+                    self._absorb(executor)
+            finally:
+                new_page.close()
+
+
+class AsyncStepExecutor(StepExecutor):
+    """
+    StepExecutor for Playwright's async API (used by the async crawl mode).
+    Same actions and YAML semantics; only the page interactions are
+    overridden, everything else is inherited.
+    """
+    
+    async def execute_step(self, step: Dict, context: Dict) -> Any:
+        """Execute single step based on action type (see StepExecutor.execute_step)."""
+        step, call = self._prepare_step(step, context)
+        if call is None:
+            return None
+        
+        started = time.perf_counter()
+        status = 'OK'
+        try:
+            # Inherited handlers without page I/O return plain values
+            result = call()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception as e:
+            status = 'FAILED'
+            logger.error(f"Step execution failed ({step.get('action')}): {e}")
+            raise
+        finally:
+            self._record_timing(step, context, time.perf_counter() - started, status)
+    
+    async def wait_settled(self, timeout_ms: int, selector: Optional[str] = None,
+                           state: str = 'visible') -> None:
+        """Async StepExecutor.wait_settled."""
+        if not timeout_ms or self.page.is_closed():
+            return
+        
+        if selector:
+            try:
+                await self.page.wait_for_selector(selector, state=state, timeout=timeout_ms)
+            except AsyncPlaywrightTimeout:
+                logger.debug(f"Wait for {selector} ({state}) timed out after {timeout_ms}ms")
+            return
+        
+        deadline = self._quiet_deadline(timeout_ms)
+        while self._still_busy(deadline):
+            await self.page.wait_for_timeout(WAIT_POLL_MS)
+    
+    async def _navigate(self, step: Dict) -> None:
+        url = step.get('url')
+        if not url:
+            return
+        
+        logger.info(f"🌐 Navigating to: {url}")
+        await self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        await self._settle_after(step, 2000)
+    
+    async def _click(self, step: Dict) -> None:
+        selectors = self._step_selectors(step)
+        
+        for selector in selectors:
+            try:
+                logger.debug(f"Trying selector: {selector}")
+                
+                if await self.page.locator(selector).count() > 0:
+                    await self.page.locator(selector).first.click(timeout=10000)
+                    logger.info(f"✅ Clicked: {selector}")
+                    await self._settle_after(step, 1000)
+                    return
+            except Exception as e:
+                logger.debug(f"Selector failed: {e}")
+                continue
+        
+        raise Exception(f"Could not click any selector: {selectors}")
+    
+    async def _hover_menu(self, step: Dict) -> None:
+        selectors = step.get('selectors', [])
+        
+        for selector in selectors:
+            try:
+                await self.page.locator(selector).first.hover(timeout=5000)
+                logger.info(f"✅ Hovered: {selector}")
+                await self._settle_after(step, 1000)
+                return
+            except:
+                continue
+        
+        logger.warning(f"Could not hover: {selectors}")
+    
+    async def _select_dropdown(self, step: Dict, context: Dict) -> None:
+        field = step.get('field')
+        
+        for selector, pattern, option in self._dropdown_attempts(step):
+            try:
+                await self.page.locator(selector).first.select_option(timeout=5000, **option)
+                logger.info(f"✅ Selected: {field} = {pattern}")
+                return
+            except:
+                continue
+        
+        logger.warning(f"Could not select: {field} = {self._dropdown_value(step.get('value'))}")
+    
+    async def _set_date(self, step: Dict, context: Dict) -> None:
+        field, date_value, selectors = self._date_fill(step)
+        
+        for selector in selectors:
+            try:
+                await self.page.locator(selector).first.fill(date_value, timeout=5000)
+                logger.info(f"✅ Set date: {field} = {date_value}")
+                return
+            except:
+                continue
+        
+        logger.warning(f"Could not set date: {field}")
+    
+    async def _click_download(self, step: Dict) -> Optional[Path]:
+        selectors = step.get('selectors', [])
+        timeout_ms = step.get('timeout_ms', 180000)
+        exclude_text = step.get('exclude_text', [])
+        
+        downloaded_file = None
+        
+        if step.get('wait_for_download', True):
+            async with self.page.expect_download(timeout=timeout_ms) as download_info:
+                for selector in selectors:
+                    try:
+                        for elem in await self.page.locator(selector).all():
+                            if self._is_excluded(await elem.inner_text(), exclude_text):
+                                continue
+                            
+                            await elem.click(timeout=10000)
+                            logger.info(f"✅ Clicked download: {selector}")
+                            break
+                        break
+                    except:
+                        continue
             
-            new_page.close()
+            download = await download_info.value
+            downloaded_file = self._record_download(download.url, await download.path())
+        
+        else:
+            await self._click(step)
+        
+        self.downloaded_files.append(downloaded_file)
+        return downloaded_file
+    
+    async def _get_scheme_links(self, step: Dict) -> List[str]:
+        container_elem = self.page.locator(step.get('container', 'body')).first
+        link_elements = await container_elem.locator(step.get('link_selector', 'a')).all()
+        
+        links = []
+        for elem in link_elements:
+            try:
+                href = await elem.get_attribute('href')
+                if href:
+                    links.append(href)
+            except:
+                continue
+        
+        logger.info(f"📋 Found {len(links)} scheme links")
+        return links
+    
+    async def _get_scheme_list(self, step: Dict) -> List[Dict]:
+        exclude_patterns = step.get('exclude_patterns', [])
+        
+        schemes = []
+        
+        for selector in step.get('selectors', []):
+            try:
+                for option in await self.page.locator(selector).all():
+                    scheme = self._scheme_option(
+                        await option.inner_text(), await option.get_attribute('value'), exclude_patterns
+                    )
+                    if scheme:
+                        schemes.append(scheme)
+                
+                break
+            except:
+                continue
+        
+        logger.info(f"📋 Found {len(schemes)} schemes")
+        return schemes
+    
+    async def _wait_for_element(self, step: Dict) -> None:
+        selectors = step.get('selectors', [])
+        timeout_ms = step.get('timeout_ms', 10000)
+        
+        for selector in selectors:
+            try:
+                await self.page.wait_for_selector(selector, timeout=timeout_ms)
+                logger.info(f"✅ Element appeared: {selector}")
+                return
+            except:
+                continue
+        
+        logger.warning(f"Element did not appear: {selectors}")
+    
+    async def _for_each_scheme(self, step: Dict, context: Dict) -> None:
+        for scheme_context in self._scheme_contexts(context):
+            for sub_step in step.get('steps', []):
+                await self.execute_step(sub_step, scheme_context)
+    
+    async def _for_each_type(self, step: Dict, context: Dict) -> None:
+        for type_context in self._type_contexts(step, context):
+            for sub_step in step.get('steps', []):
+                await self.execute_step(sub_step, type_context)
+    
+    async def _for_each_link(self, step: Dict, context: Dict) -> None:
+        for link, link_context in self._link_contexts(context):
+            new_page = await self.page.context.new_page()
+            try:
+                await new_page.goto(link, timeout=60000)
+                
+                executor = AsyncStepExecutor(new_page, self.step_timings)
+                try:
+                    for sub_step in step.get('steps', []):
+                        await executor.execute_step(sub_step, link_context)
+                finally:
+                    self._absorb(executor)
+            finally:
+                await new_page.close()
 
 
 class UniversalAmcCrawler:
@@ -407,6 +763,19 @@ class UniversalAmcCrawler:
     Universal crawler that reads CSV links + YAML steps.
     """
     
+    # Timing row for the initial navigation to the CSV link
+    OPEN_STEP = {'action': 'open_link', 'description': 'Open CSV link'}
+    
+    TIMING_INSERT_SQL = """
+        INSERT INTO crawl_step_timings (
+            amc_name, doc_type, action, description,
+            duration_ms, status, recorded_at
+        ) VALUES (
+            :amc_name, :doc_type, :action, :description,
+            :duration_ms, :status, :recorded_at
+        )
+    """
+    
     def __init__(self, db_url: str, settings: Dict):
         self.db_url = db_url
         self.engine = create_engine(db_url, pool_pre_ping=True)
@@ -419,6 +788,51 @@ class UniversalAmcCrawler:
         # Load configurations
         self.amc_links_df = self._load_amc_links()
         self.step_definitions = self._load_step_definitions()
+        
+        # Shared browser, launched on the first job
+        self.browser_pool: Optional[BrowserPool] = None
+        # Pooled HTTP session for direct file links (created lazily)
+        self.http_fetcher: Optional[HttpFetcher] = None
+        # Recorded download requests per (AMC, doc_type) (created lazily)
+        self.replay_store: Optional[ReplayPlanStore] = None
+        # SHA-256 object store behind the downloads layout (created lazily)
+        self.download_store: Optional[DownloadStore] = None
+        
+        # Per-step wall times of this crawl (also written to crawl_step_timings)
+        self.step_timings: List[Dict] = []
+        self._timing_table_ok = True
+    
+    def _get_browser_pool(self) -> BrowserPool:
+        """Pooled headless browser (created lazily)."""
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool.from_settings(self.settings)
+        return self.browser_pool
+    
+    def _get_http_fetcher(self) -> HttpFetcher:
+        """Pooled HTTP fetcher with persisted validators (created lazily)."""
+        if self.http_fetcher is None:
+            self.http_fetcher = HttpFetcher.from_settings(self.settings)
+        return self.http_fetcher
+    
+    def _get_replay_store(self) -> ReplayPlanStore:
+        """Replay plan store under paths.replay_plan_dir (created lazily)."""
+        if self.replay_store is None:
+            plan_dir = self.settings['paths'].get(
+                'replay_plan_dir', self.data_root / 'cache' / 'replay_plans'
+            )
+            self.replay_store = ReplayPlanStore(plan_dir)
+        return self.replay_store
+    
+    def _get_download_store(self) -> DownloadStore:
+        """Content-addressed download store (created lazily)."""
+        if self.download_store is None:
+            self.download_store = DownloadStore.from_settings(self.settings)
+        return self.download_store
+    
+    def close(self):
+        """Shut down the pooled browser."""
+        if self.browser_pool is not None:
+            self.browser_pool.close()
     
     def _load_amc_links(self) -> pd.DataFrame:
         """Load manual AMC links from CSV."""
@@ -464,10 +878,14 @@ class UniversalAmcCrawler:
         return self.step_definitions.get('generic', {})
     
     def _organize_downloaded_file(self, file_path: Path, amc_name: str, 
-                                   doc_type: str) -> Path:
+                                   doc_type: str, url: Optional[str] = None) -> StoredDocument:
         """
         Organize downloaded file into proper directory structure.
         
+        The file itself goes into the content-addressed store; the path below
+        is a hard link to it. Content already in the store is not linked
+        again - the existing path is returned with is_new=False.
+        
         Structure:
         downloads/
           ├── portfolio/
@@ -492,16 +910,29 @@ class UniversalAmcCrawler:
         
         dest_path = dest_dir / new_name
         
-        # Move file
-        import shutil
-        shutil.move(str(file_path), str(dest_path))
+        stored = self._get_download_store().ingest(file_path, dest_path, url=url)
         
-        logger.info(f"📁 Organized: {dest_path.relative_to(self.downloads_dir)}")
-        return dest_path
+        if stored.is_new:
+            logger.info(f"📁 Organized: {dest_path.relative_to(self.downloads_dir)}")
+        else:
+            logger.info(f"♻️  Unchanged content ({stored.sha256[:12]}) - already stored as {stored.path.name}")
+        return stored
     
     def _track_download_in_db(self, amc_id: str, amc_name: str, doc_type: str,
-                             url: str, local_path: Path, status: str):
-        """Track download in database."""
+                             url: str, local_path: Path, status: str,
+                             content_sha256: Optional[str] = None):
+        """
+        Track download in database.
+        
+        Rows are unique per (document_type, content_sha256); a download whose
+        content is already tracked bumps the attempt counters and, by the
+        row's parsing_status:
+        - SUCCESS         : marked UNCHANGED, never re-enters the parse queue
+        - PENDING / FAILED: (re)set to DOWNLOADED with the current file path,
+                            so it stays in the parse queue (which retries
+                            FAILED rows)
+        - TIMEOUT / MEMORY: keeps its status (terminal for the same content)
+        """
         with self.engine.begin() as conn:
             conn.execute(
                 text("""
@@ -509,17 +940,25 @@ class UniversalAmcCrawler:
                         amc_id, amc_name, document_type, frequency,
                         download_url, local_file_path, file_format,
                         file_size_kb, download_status, download_attempts,
-                        last_download_attempt, created_at, updated_at
+                        last_download_attempt, content_sha256, created_at, updated_at
                     ) VALUES (
                         :amc_id, :amc_name, :doc_type, 'MONTHLY',
                         :url, :local_path, :file_format,
                         :file_size_kb, :status, 1,
-                        now(), now(), now()
+                        now(), :content_sha256, now(), now()
                     )
-                    ON CONFLICT (amc_id, document_type, frequency, document_date)
+                    ON CONFLICT (document_type, content_sha256)
                     DO UPDATE SET
-                        local_file_path = EXCLUDED.local_file_path,
-                        download_status = EXCLUDED.download_status,
+                        download_status = CASE
+                            WHEN statutory_document_downloads.parsing_status = 'SUCCESS'
+                            THEN 'UNCHANGED'
+                            WHEN statutory_document_downloads.parsing_status IN ('PENDING', 'FAILED')
+                            THEN EXCLUDED.download_status
+                            ELSE statutory_document_downloads.download_status
+                        END,
+                        local_file_path = COALESCE(
+                            EXCLUDED.local_file_path, statutory_document_downloads.local_file_path
+                        ),
                         download_attempts = statutory_document_downloads.download_attempts + 1,
                         last_download_attempt = now(),
                         updated_at = now()
@@ -532,32 +971,34 @@ class UniversalAmcCrawler:
                     "local_path": str(local_path) if local_path else None,
                     "file_format": local_path.suffix[1:].upper() if local_path else None,
                     "file_size_kb": (local_path.stat().st_size // 1024) if local_path and local_path.exists() else None,
-                    "status": status
+                    "status": status,
+                    "content_sha256": content_sha256
                 }
             )
     
-    def crawl_amc_document(self, amc_row: pd.Series, doc_type: str) -> bool:
-        """
-        Crawl single document type for one AMC.
-        CSV contains DIRECT links - no redirection handling needed.
-        
-        For PORTFOLIO: Downloads ALL available frequencies (monthly + fortnightly + halfyearly)
-        For others: Downloads latest available data
+    def _doc_url(self, amc_row: pd.Series, doc_type: str) -> Optional[str]:
+        """Direct CSV link for a document type, or None."""
+        url_column = f"{doc_type.capitalize()} Link" if doc_type != 'aaum' else "Aaum link"
+        base_url = amc_row.get(url_column)
         
-        Args:
-            amc_row: Row from Structured_portfolio.csv
-            doc_type: 'portfolio', 'aaum', 'factsheet', 'ter', or 'sid'
+        if pd.isna(base_url) or not base_url:
+            return None
+        return base_url
+    
+    def _prepare_job(self, amc_row: pd.Series, doc_type: str) -> Optional[Dict]:
+        """
+        Resolve URL and step config for one (AMC, doc_type) job.
         
         Returns:
-            Success boolean
+            {'amc_name', 'base_url', 'doc_config', 'exec_context'} or None
+            when the job has nothing to crawl
         """
         amc_name = amc_row['AMC']
-        url_column = f"{doc_type.capitalize()} Link" if doc_type != 'aaum' else "Aaum link"
-        base_url = amc_row.get(url_column)
+        base_url = self._doc_url(amc_row, doc_type)
         
-        if pd.isna(base_url) or not base_url:
+        if not base_url:
             logger.warning(f"⚠️  No {doc_type} link for {amc_name}")
-            return False
+            return None
         
         logger.info(f"🏢 Crawling {doc_type} for {amc_name}")
         logger.info(f"🔗 URL: {base_url}")
@@ -568,34 +1009,286 @@ class UniversalAmcCrawler:
         
         if not doc_config:
             logger.warning(f"⚠️  No config found for {amc_name} {doc_type}")
+            return None
+        
+        # Build execution context
+        exec_context = {
+            'amc_name': amc_name,
+            'doc_type': doc_type,
+            'base_url': base_url
+        }
+        
+        # Handle looping scenarios (for TER)
+        if doc_type == 'ter' and doc_config.get('loop_scheme_types'):
+            exec_context['loop_values'] = doc_config['loop_scheme_types']
+        
+        return {
+            'amc_name': amc_name,
+            'base_url': base_url,
+            'doc_config': doc_config,
+            'exec_context': exec_context
+        }
+    
+    @staticmethod
+    def _store_step_result(step: Dict, result: Any, exec_context: Dict):
+        """Store results in context for next steps."""
+        if result:
+            if step.get('action') == 'get_scheme_links':
+                exec_context['scheme_links'] = result
+            elif step.get('action') == 'get_scheme_list':
+                exec_context['schemes'] = result
+    
+    def _track_organized(self, amc_name: str, doc_type: str, base_url: str, stored: StoredDocument):
+        """Track in database (skip if DB error)."""
+        try:
+            self._track_download_in_db(
+                amc_id=None,  # Match in post-processing
+                amc_name=amc_name,
+                doc_type=doc_type.upper(),
+                url=base_url,
+                local_path=stored.path,
+                status='DOWNLOADED',
+                content_sha256=stored.sha256
+            )
+        except Exception as db_err:
+            logger.warning(f"⚠️  Could not track in DB (non-critical): {db_err}")
+    
+    def _try_http_fast_path(self, amc_name: str, doc_type: str, base_url: str) -> Optional[bool]:
+        """
+        Fetch a direct file link (PDF / XLSX / ...) over plain HTTP, no browser.
+        
+        Returns:
+            True when the document was downloaded or is unchanged (304),
+            None when the link is a web page / unreachable and needs the browser
+        """
+        crawl_cfg = self.settings.get('phase3', {}).get('amc_crawl', {})
+        if not crawl_cfg.get('http_fast_path', True):
+            return None
+        
+        started = time.perf_counter()
+        fetcher = self._get_http_fetcher()
+        probe = fetcher.probe(base_url)
+        if probe is None or not probe['is_file']:
+            return None
+        
+        logger.info(f"⚡ Direct {probe['extension']} link for {amc_name} {doc_type} - fetching over HTTP")
+        
+        incoming_dir = self.downloads_dir / "_incoming" / amc_name.lower().replace(' ', '_') / doc_type.lower()
+        result = fetcher.fetch(probe['url'], incoming_dir)
+        
+        self._save_step_timings([{
+            'amc_name': amc_name,
+            'doc_type': doc_type,
+            'action': 'http_fast_path',
+            'description': result.status,
+            'seconds': time.perf_counter() - started,
+            'status': 'FAILED' if result.status == FETCH_FAILED else 'OK',
+            'recorded_at': datetime.now()
+        }])
+        
+        if result.status == FETCH_NOT_MODIFIED:
+            logger.info(f"♻️  {amc_name} {doc_type} unchanged since last crawl - skipped")
+            return True
+        
+        if result.status == FETCH_FAILED:
+            logger.info(f"ℹ️  HTTP fetch failed for {amc_name} {doc_type} - falling back to browser")
+            return None
+        
+        stored = self._organize_downloaded_file(result.path, amc_name, doc_type, url=probe['url'])
+        fetcher.remember_path(probe['url'], stored.path)
+        self._track_organized(amc_name, doc_type, base_url, stored)
+        
+        logger.info(f"✅ Completed {doc_type} for {amc_name} over HTTP")
+        return True
+    
+    def _try_replay(self, amc_name: str, doc_type: str, base_url: str) -> Optional[bool]:
+        """
+        Replay the recorded download request(s) of an earlier browser crawl
+        over plain HTTP, with period placeholders filled for this month.
+        
+        Returns:
+            True when every request returned a document (downloaded or 304)
+            and, for a plan recorded in an earlier disclosure period, at least
+            one of them is new content; None when there is no plan, a request
+            failed or the replay only brought back known content for a new
+            period (browser runs and records a fresh plan)
+        """
+        crawl_cfg = self.settings.get('phase3', {}).get('amc_crawl', {})
+        if not crawl_cfg.get('replay_plans', True):
+            return None
+        
+        store = self._get_replay_store()
+        plan = store.get(amc_name, doc_type)
+        if not plan or not plan.get('requests'):
+            return None
+        
+        started = time.perf_counter()
+        fetcher = self._get_http_fetcher()
+        requests_ = rendered_requests(plan)
+        logger.info(f"🔁 Replaying {len(requests_)} recorded request(s) for {amc_name} {doc_type}")
+        
+        incoming_dir = self.downloads_dir / "_incoming" / amc_name.lower().replace(' ', '_') / doc_type.lower()
+        results = []
+        for i, request in enumerate(requests_):
+            result = fetcher.fetch(
+                request['url'], incoming_dir / f"replay_{i}",
+                method=request['method'], data=request['post_data'],
+                headers=request['headers'], require_document=True
+            )
+            results.append(result)
+            if result.status == FETCH_FAILED:
+                break
+        
+        failed = any(r.status == FETCH_FAILED for r in results)
+        stale = False
+        
+        if failed:
+            # Site changed (or session-bound request) - drop partial files, use the browser
+            for result in results:
+                if result.status == FETCH_DOWNLOADED and result.path and result.path.exists():
+                    result.path.unlink()
+        else:
+            new_documents = 0
+            for result in results:
+                if result.status != FETCH_DOWNLOADED:
+                    continue
+                stored = self._organize_downloaded_file(result.path, amc_name, doc_type, url=result.url)
+                fetcher.remember_path(result.url, stored.path)
+                self._track_organized(amc_name, doc_type, base_url, stored)
+                new_documents += stored.is_new
+            
+            # Only known content for a new period: the plan may point at an old
+            # document (or the site has not published yet) - the browser decides
+            stale = (not new_documents
+                     and plan.get('recorded_period') != disclosure_period().isoformat())
+        
+        self._save_step_timings([{
+            'amc_name': amc_name,
+            'doc_type': doc_type,
+            'action': 'http_replay',
+            'description': f"{len(results)} request(s)" + (" - known content only" if stale else ""),
+            'seconds': time.perf_counter() - started,
+            'status': 'FAILED' if failed or stale else 'OK',
+            'recorded_at': datetime.now()
+        }])
+        store.mark(amc_name, doc_type, not (failed or stale))
+        
+        if failed:
+            logger.info(f"ℹ️  Replay failed for {amc_name} {doc_type} - falling back to browser")
+            return None
+        if stale:
+            logger.info(f"ℹ️  Replay for {amc_name} {doc_type} returned no new document since "
+                        f"{plan.get('recorded_period')} - falling back to browser")
+            return None
+        
+        logger.info(f"✅ Completed {doc_type} for {amc_name} by replay (no browser)")
+        return True
+    
+    def _record_replay_plan(self, executor: StepExecutor, amc_name: str, doc_type: str):
+        """Store the job's download requests as a replay plan - only when every download was traced."""
+        crawl_cfg = self.settings.get('phase3', {}).get('amc_crawl', {})
+        if not crawl_cfg.get('replay_plans', True):
+            return
+        
+        captured = executor.captured_requests
+        if captured and all(captured) and len(captured) == len(executor.downloaded_files):
+            self._get_replay_store().record(amc_name, doc_type, captured)
+        else:
+            logger.debug(f"No replay plan for {amc_name} {doc_type}: not every download could be traced")
+    
+    def _finish_job(self, downloaded_files: List[Optional[Path]], amc_name: str,
+                    doc_type: str, base_url: str) -> bool:
+        """Organize + track the job's downloads; True when anything was downloaded."""
+        unchanged = 0
+        for downloaded_file in downloaded_files:
+            if downloaded_file and downloaded_file.exists():
+                stored = self._organize_downloaded_file(
+                    downloaded_file, amc_name, doc_type, url=base_url
+                )
+                unchanged += not stored.is_new
+                
+                self._track_organized(amc_name, doc_type, base_url, stored)
+        
+        success = len(downloaded_files) > 0
+        if success:
+            logger.info(f"✅ Completed {doc_type} for {amc_name} - Downloaded {len(downloaded_files)} file(s)"
+                        f" ({unchanged} unchanged)")
+        else:
+            logger.warning(f"⚠️  Completed {doc_type} for {amc_name} but no files downloaded")
+        
+        return success
+    
+    def _save_step_timings(self, timings: List[Dict]):
+        """Keep a job's step timings for the summary and write them to crawl_step_timings."""
+        self.step_timings.extend(timings)
+        if not timings or not self._timing_table_ok:
+            return
+        
+        rows = [
+            {**{k: t[k] for k in ('amc_name', 'doc_type', 'action', 'description', 'status', 'recorded_at')},
+             'duration_ms': int(t['seconds'] * 1000)}
+            for t in timings
+        ]
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(self.TIMING_INSERT_SQL), rows)
+        except Exception as e:
+            # Table missing (schema not redeployed) - keep crawling, log once
+            logger.warning(f"⚠️  Could not record step timings (non-critical): {e}")
+            self._timing_table_ok = False
+    
+    def crawl_amc_document(self, amc_row: pd.Series, doc_type: str) -> bool:
+        """
+        Crawl single document type for one AMC.
+        CSV contains DIRECT links - no redirection handling needed.
+        
+        For PORTFOLIO: Downloads ALL available frequencies (monthly + fortnightly + halfyearly)
+        For others: Downloads latest available data
+        
+        Args:
+            amc_row: Row from Structured_portfolio.csv
+            doc_type: 'portfolio', 'aaum', 'factsheet', 'ter', or 'sid'
+        
+        Returns:
+            Success boolean
+        """
+        # Direct file links need no browser
+        base_url = self._doc_url(amc_row, doc_type)
+        if base_url:
+            fast_result = self._try_http_fast_path(amc_row['AMC'], doc_type, base_url)
+            if fast_result is not None:
+                return fast_result
+            
+            replay_result = self._try_replay(amc_row['AMC'], doc_type, base_url)
+            if replay_result is not None:
+                return replay_result
+        
+        job = self._prepare_job(amc_row, doc_type)
+        if job is None:
             return False
         
+        amc_name = job['amc_name']
+        base_url = job['base_url']
+        doc_config = job['doc_config']
+        exec_context = job['exec_context']
+        executor = None
+        
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=False)  # Set True for production
-                context = browser.new_context(accept_downloads=True)
+            # Isolated context on the pooled browser; files are organized
+            # before the block exits (context close removes download temp files)
+            with self._get_browser_pool().context() as context:
                 page = context.new_page()
+                executor = StepExecutor(page)
                 
-                # Navigate to DIRECT URL from CSV
+                # Navigate to DIRECT URL from CSV, then wait for the page to go quiet
+                started = time.perf_counter()
                 page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
-                time.sleep(3)
+                executor.wait_settled(3000)
+                executor._record_timing(self.OPEN_STEP, exec_context,
+                                        time.perf_counter() - started, 'OK')
                 
                 logger.info(f"✅ Navigated to: {page.url}")
                 
-                # Execute steps
-                executor = StepExecutor(page)
-                
-                # Build execution context
-                exec_context = {
-                    'amc_name': amc_name,
-                    'doc_type': doc_type,
-                    'base_url': base_url
-                }
-                
-                # Handle looping scenarios (for TER)
-                if doc_type == 'ter' and doc_config.get('loop_scheme_types'):
-                    exec_context['loop_values'] = doc_config['loop_scheme_types']
-                
                 # SPECIAL HANDLING FOR PORTFOLIO: Download ALL available frequencies
                 if doc_type == 'portfolio' and doc_config.get('frequency_preference'):
                     frequencies = doc_config['frequency_preference']
@@ -615,7 +1308,7 @@ class UniversalAmcCrawler:
                             # Reset page state for each frequency attempt
                             # Go back to top of page
                             page.evaluate("window.scrollTo(0, 0)")
-                            time.sleep(1)
+                            executor.wait_settled(1000)
                             
                             # Track files before this frequency
                             files_before = len(executor.downloaded_files)
@@ -623,12 +1316,7 @@ class UniversalAmcCrawler:
                             # Execute steps for this frequency
                             for step in freq_config.get('steps', []):
                                 result = executor.execute_step(step, exec_context)
-                                
-                                if result:
-                                    if step.get('action') == 'get_scheme_links':
-                                        exec_context['scheme_links'] = result
-                                    elif step.get('action') == 'get_scheme_list':
-                                        exec_context['schemes'] = result
+                                self._store_step_result(step, result, exec_context)
                             
                             # Check if we got a new file
                             files_after = len(executor.downloaded_files)
@@ -659,51 +1347,126 @@ class UniversalAmcCrawler:
                     for step in steps:
                         try:
                             result = executor.execute_step(step, exec_context)
-                            
-                            # Store results in context for next steps
-                            if result:
-                                if step.get('action') == 'get_scheme_links':
-                                    exec_context['scheme_links'] = result
-                                elif step.get('action') == 'get_scheme_list':
-                                    exec_context['schemes'] = result
+                            self._store_step_result(step, result, exec_context)
                         
                         except Exception as e:
                             logger.error(f"❌ Step failed: {step.get('action')} - {e}")
                             # Continue with next step
                 
                 # Organize downloaded files
-                for downloaded_file in executor.downloaded_files:
-                    if downloaded_file and downloaded_file.exists():
-                        organized_path = self._organize_downloaded_file(
-                            downloaded_file, amc_name, doc_type
-                        )
+                success = self._finish_job(executor.downloaded_files, amc_name, doc_type, base_url)
+                if success:
+                    self._record_replay_plan(executor, amc_name, doc_type)
+                return success
+        
+        except Exception as e:
+            logger.exception(f"❌ Crawl failed for {amc_name} {doc_type}: {e}")
+            return False
+        
+        finally:
+            if executor is not None:
+                self._save_step_timings(executor.step_timings)
+    
+    async def crawl_amc_document_async(self, amc_row: pd.Series, doc_type: str,
+                                       pool: AsyncBrowserPool) -> bool:
+        """
+        Async counterpart of crawl_amc_document (same steps, same file
+        handling) on a context from the shared AsyncBrowserPool.
+        """
+        base_url = self._doc_url(amc_row, doc_type)
+        if base_url:
+            fast_result = await asyncio.to_thread(
+                self._try_http_fast_path, amc_row['AMC'], doc_type, base_url
+            )
+            if fast_result is not None:
+                return fast_result
+            
+            replay_result = await asyncio.to_thread(
+                self._try_replay, amc_row['AMC'], doc_type, base_url
+            )
+            if replay_result is not None:
+                return replay_result
+        
+        job = self._prepare_job(amc_row, doc_type)
+        if job is None:
+            return False
+        
+        amc_name = job['amc_name']
+        base_url = job['base_url']
+        doc_config = job['doc_config']
+        exec_context = job['exec_context']
+        executor = None
+        
+        try:
+            async with pool.context() as context:
+                page = await context.new_page()
+                executor = AsyncStepExecutor(page)
+                
+                started = time.perf_counter()
+                await page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
+                await executor.wait_settled(3000)
+                executor._record_timing(self.OPEN_STEP, exec_context,
+                                        time.perf_counter() - started, 'OK')
+                
+                logger.info(f"✅ Navigated to: {page.url}")
+                
+                if doc_type == 'portfolio' and doc_config.get('frequency_preference'):
+                    for freq in doc_config['frequency_preference']:
+                        freq_config = doc_config.get(freq)
+                        if not freq_config or not freq_config.get('steps'):
+                            continue
+                        
+                        logger.info(f"🔄 [{amc_name}] Attempting to download {freq} portfolio...")
                         
-                        # Track in database (skip if DB error)
                         try:
-                            self._track_download_in_db(
-                                amc_id=None,  # Match in post-processing
-                                amc_name=amc_name,
-                                doc_type=doc_type.upper(),
-                                url=base_url,
-                                local_path=organized_path,
-                                status='DOWNLOADED'
-                            )
-                        except Exception as db_err:
-                            logger.warning(f"⚠️  Could not track in DB (non-critical): {db_err}")
-                
-                browser.close()
+                            await page.evaluate("window.scrollTo(0, 0)")
+                            await executor.wait_settled(1000)
+                            
+                            files_before = len(executor.downloaded_files)
+                            
+                            for step in freq_config.get('steps', []):
+                                result = await executor.execute_step(step, exec_context)
+                                self._store_step_result(step, result, exec_context)
+                            
+                            if len(executor.downloaded_files) > files_before:
+                                logger.info(f"✅ [{amc_name}] Successfully downloaded {freq} portfolio")
+                            else:
+                                logger.info(f"ℹ️  [{amc_name}] No {freq} portfolio available (not an error)")
+                        
+                        except Exception as e:
+                            logger.info(f"ℹ️  [{amc_name}] {freq} not available or failed: {e}")
+                            continue
                 
-                success = len(executor.downloaded_files) > 0
-                if success:
-                    logger.info(f"✅ Completed {doc_type} for {amc_name} - Downloaded {len(executor.downloaded_files)} file(s)")
                 else:
-                    logger.warning(f"⚠️  Completed {doc_type} for {amc_name} but no files downloaded")
+                    steps = doc_config.get('steps', [])
+                    
+                    if not steps:
+                        logger.warning(f"⚠️  No steps defined for {amc_name} {doc_type}")
+                        return False
+                    
+                    for step in steps:
+                        try:
+                            result = await executor.execute_step(step, exec_context)
+                            self._store_step_result(step, result, exec_context)
+                        
+                        except Exception as e:
+                            logger.error(f"❌ [{amc_name}] Step failed: {step.get('action')} - {e}")
                 
+                # File moves + DB writes are blocking: keep them off the event loop
+                success = await asyncio.to_thread(
+                    self._finish_job, executor.downloaded_files, amc_name, doc_type, base_url
+                )
+                if success:
+                    await asyncio.to_thread(self._record_replay_plan, executor, amc_name, doc_type)
                 return success
         
         except Exception as e:
             logger.exception(f"❌ Crawl failed for {amc_name} {doc_type}: {e}")
             return False
+        
+        finally:
+            if executor is not None:
+                await asyncio.to_thread(self._save_step_timings, executor.step_timings)
     
     def run(self, doc_types: List[str] = None, limit_amcs: int = None):
         """
@@ -727,27 +1490,185 @@ class UniversalAmcCrawler:
             amc_df = self.amc_links_df
         
         # Statistics
-        stats = {doc_type: {'success': 0, 'failed': 0} for doc_type in doc_types}
+        job_results = []
+        started = time.perf_counter()
         
-        for idx, amc_row in amc_df.iterrows():
-            amc_name = amc_row['AMC']
-            logger.info(f"\n{'='*70}")
-            logger.info(f"[{idx+1}/{len(amc_df)}] Processing: {amc_name}")
-            logger.info(f"{'='*70}\n")
-            
-            for doc_type in doc_types:
-                success = self.crawl_amc_document(amc_row, doc_type)
+        try:
+            for idx, amc_row in amc_df.iterrows():
+                amc_name = amc_row['AMC']
+                logger.info(f"\n{'='*70}")
+                logger.info(f"[{idx+1}/{len(amc_df)}] Processing: {amc_name}")
+                logger.info(f"{'='*70}\n")
                 
-                if success:
-                    stats[doc_type]['success'] += 1
-                else:
-                    stats[doc_type]['failed'] += 1
+                for doc_type in doc_types:
+                    job_started = time.perf_counter()
+                    success = self.crawl_amc_document(amc_row, doc_type)
+                    job_results.append(self._job_result(
+                        amc_row, doc_type, success, time.perf_counter() - job_started
+                    ))
+                    
+                    # Small delay between documents
+                    time.sleep(2)
                 
-                # Small delay between documents
-                time.sleep(2)
+                # Delay between AMCs
+                time.sleep(5)
+        finally:
+            self.close()
+        
+        self._log_crawl_summary(doc_types, job_results, time.perf_counter() - started,
+                                self.browser_pool)
+    
+    # ------------------------------------------------------------------
+    # ASYNC MODE
+    # ------------------------------------------------------------------
+    
+    def run_async(self, doc_types: List[str] = None, limit_amcs: int = None,
+                  max_concurrency: Optional[int] = None,
+                  per_domain_limit: Optional[int] = None):
+        """
+        Run crawler for all AMCs with concurrent jobs (Playwright async API).
+        
+        Args:
+            doc_types: List of doc types to crawl (default: all)
+            limit_amcs: Limit number of AMCs (for testing)
+            max_concurrency: Global cap on jobs in flight
+                (default: phase3.amc_crawl.max_concurrent_crawls)
+            per_domain_limit: Jobs in flight per website host
+                (default: phase3.amc_crawl.per_domain_limit)
+        """
+        asyncio.run(self._run_async(doc_types, limit_amcs, max_concurrency, per_domain_limit))
+    
+    async def _run_async(self, doc_types: Optional[List[str]], limit_amcs: Optional[int],
+                         max_concurrency: Optional[int], per_domain_limit: Optional[int]):
+        if doc_types is None:
+            doc_types = ['portfolio', 'aaum', 'factsheet', 'ter', 'sid']
+        
+        crawl_cfg = self.settings.get('phase3', {}).get('amc_crawl', {})
+        max_concurrency = max(1, max_concurrency or crawl_cfg.get('max_concurrent_crawls', 3))
+        per_domain_limit = max(1, per_domain_limit or crawl_cfg.get('per_domain_limit', 1))
+        domain_delay = crawl_cfg.get('domain_delay_seconds', 2)
+        
+        amc_df = self.amc_links_df.head(limit_amcs) if limit_amcs else self.amc_links_df
+        
+        # Job queue: every (AMC, doc_type) pair, AMC-major like the serial run
+        pending = deque(
+            (amc_row, doc_type, self._job_domain(amc_row, doc_type))
+            for _, amc_row in amc_df.iterrows()
+            for doc_type in doc_types
+        )
+        
+        logger.info("🚀 Starting Universal AMC Crawler (async)")
+        logger.info(f"📋 Document types: {doc_types}")
+        logger.info(f"🏢 AMCs: {len(amc_df)} | Jobs: {len(pending)} | "
+                    f"Concurrency: {max_concurrency} (≤{per_domain_limit} per domain, "
+                    f"{domain_delay}s between jobs on a domain)")
+        
+        job_results = []
+        started = time.perf_counter()
+        
+        # Per-domain politeness: jobs in flight and earliest next start
+        domain_active: Dict[str, int] = {}
+        domain_ready_at: Dict[str, float] = {}
+        running: Dict[asyncio.Task, tuple] = {}
+        
+        async def run_job(amc_row: pd.Series, doc_type: str) -> Dict:
+            job_started = time.perf_counter()
+            success = await self.crawl_amc_document_async(amc_row, doc_type, pool)
+            return self._job_result(amc_row, doc_type, success, time.perf_counter() - job_started)
+        
+        async with AsyncBrowserPool.from_settings(self.settings) as pool:
+            while pending or running:
+                now = time.monotonic()
+                
+                # Start every queued job whose domain has room, up to the global cap
+                held = deque()
+                while pending and len(running) < max_concurrency:
+                    job = pending.popleft()
+                    amc_row, doc_type, domain = job
+                    # Jobs without a link ('' domain) finish at once - no politeness needed
+                    if domain and (domain_active.get(domain, 0) >= per_domain_limit
+                                   or domain_ready_at.get(domain, 0) > now):
+                        held.append(job)
+                        continue
+                    domain_active[domain] = domain_active.get(domain, 0) + 1
+                    domain_ready_at[domain] = now + domain_delay
+                    running[asyncio.create_task(run_job(amc_row, doc_type))] = (domain, amc_row['AMC'], doc_type)
+                pending = held + pending
+                
+                # Next wake-up: a finished job, or (below the global cap) the
+                # end of a domain delay holding back a queued job
+                timeout = None
+                if len(running) < max_concurrency:
+                    delays = [
+                        domain_ready_at.get(domain, 0) - now
+                        for _, _, domain in pending
+                        if domain_active.get(domain, 0) < per_domain_limit
+                    ]
+                    if delays:
+                        timeout = max(0.0, min(delays))
+                
+                if not running:
+                    await asyncio.sleep(timeout or 0)
+                    continue
+                
+                done, _ = await asyncio.wait(running, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    domain, amc_name, doc_type = running.pop(task)
+                    domain_active[domain] -= 1
+                    domain_ready_at[domain] = time.monotonic() + domain_delay
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.error(f"❌ Job crashed: {amc_name} {doc_type} - {e}")
+                        result = {'amc_name': amc_name, 'doc_type': doc_type, 'domain': domain,
+                                  'success': False, 'seconds': 0.0}
+                    job_results.append(result)
+                    logger.info(f"{'✅' if result['success'] else '⚠️ '} [{len(job_results)}/"
+                                f"{len(job_results) + len(pending) + len(running)}] "
+                                f"{amc_name} {doc_type} in {result['seconds']:.1f}s")
             
-            # Delay between AMCs
-            time.sleep(5)
+            self._log_crawl_summary(doc_types, job_results, time.perf_counter() - started, pool)
+    
+    def _job_domain(self, amc_row: pd.Series, doc_type: str) -> str:
+        """Website host a job hits (politeness key)."""
+        url = self._doc_url(amc_row, doc_type)
+        return (urlparse(str(url)).hostname or "") if url else ""
+    
+    def _job_result(self, amc_row: pd.Series, doc_type: str, success: bool, seconds: float) -> Dict:
+        return {
+            'amc_name': amc_row['AMC'],
+            'doc_type': doc_type,
+            'domain': self._job_domain(amc_row, doc_type),
+            'success': success,
+            'seconds': seconds
+        }
+    
+    def _log_step_timing_summary(self, top: int = 10):
+        """Slowest (AMC, action) pairs by total step time - the configs worth tuning."""
+        if not self.step_timings:
+            return
+        
+        totals: Dict[tuple, List[float]] = {}
+        for timing in self.step_timings:
+            key = (timing['amc_name'], timing['doc_type'], timing['action'])
+            totals.setdefault(key, []).append(timing['seconds'])
+        
+        logger.info(f"⏱️  Slowest steps ({len(self.step_timings)} steps timed):")
+        ranked = sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True)[:top]
+        for (amc_name, doc_type, action), seconds in ranked:
+            logger.info(f"   {sum(seconds):7.1f}s  {amc_name} {doc_type} {action} "
+                        f"(x{len(seconds)}, max {max(seconds):.1f}s)")
+    
+    def _log_crawl_summary(self, doc_types: List[str], job_results: List[Dict],
+                           elapsed: float, pool=None):
+        """Per doc type success + timing, job latency percentiles and browser pool stats."""
+        stats = {doc_type: {'success': 0, 'failed': 0, 'seconds': 0.0} for doc_type in doc_types}
+        for result in job_results:
+            counts = stats[result['doc_type']]
+            counts['success' if result['success'] else 'failed'] += 1
+            counts['seconds'] += result['seconds']
         
         # Print summary
         logger.info("\n" + "="*70)
@@ -757,7 +1678,28 @@ class UniversalAmcCrawler:
         for doc_type, counts in stats.items():
             total = counts['success'] + counts['failed']
             pct = (counts['success'] / total * 100) if total > 0 else 0
-            logger.info(f"{doc_type.upper():15} → Success: {counts['success']:3}/{total:3} ({pct:.1f}%)")
+            avg = (counts['seconds'] / total) if total > 0 else 0
+            logger.info(f"{doc_type.upper():15} → Success: {counts['success']:3}/{total:3} ({pct:.1f}%) | avg {avg:.1f}s")
+        
+        job_seconds = [r['seconds'] for r in job_results]
+        logger.info(f"⏱️  Wall time: {elapsed:.0f}s for {len(job_results)} jobs "
+                    f"({sum(job_seconds):.0f}s of job time)")
+        logger.info(f"⏱️  Job latency: {format_latency_percentiles(job_seconds)}")
+        
+        slowest = sorted(job_results, key=lambda r: r['seconds'], reverse=True)[:5]
+        for result in slowest:
+            logger.info(f"   🐢 {result['seconds']:6.1f}s  {result['amc_name']} {result['doc_type']}")
+        
+        self._log_step_timing_summary()
+        
+        if self.http_fetcher is not None:
+            logger.info(f"⚡ HTTP fast path: {self.http_fetcher.summary()}")
+        
+        if self.download_store is not None:
+            logger.info(f"🗄️  Download store: {self.download_store.summary()}")
+        
+        if pool is not None:
+            logger.info(f"🌐 Browser pool: {pool.summary()}")
         
         logger.info("="*70)
         logger.info("🎉 Universal AMC Crawler Complete!")
@@ -778,7 +1720,10 @@ def main():
     )
     
     # Test with 2 AMCs, only portfolio
-    crawler.run(doc_types=['portfolio'], limit_amcs=2)
+    if settings.get('phase3', {}).get('amc_crawl', {}).get('crawl_mode') == 'async':
+        crawler.run_async(doc_types=['portfolio'], limit_amcs=2)
+    else:
+        crawler.run(doc_types=['portfolio'], limit_amcs=2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+# Etl/workbook_reader.py
+"""
+Workbook Sheet Iterator
+-----------------------
+Yields every sheet of an AMC disclosure file as a string-typed DataFrame,
+opening the file once.
+
+- .xlsx / .xlsm : openpyxl in read-only mode; each sheet is streamed row by
+                  row only when the iterator reaches it
+- .xls          : all sheets in one pd.read_excel(sheet_name=None) call
+- .csv          : a single sheet, with encoding fallback
+
+Cells are converted like pd.read_excel(dtype=str): empty -> NaN, integral
+floats without the trailing ".0".
+
+Usage:
+    for sheet_name, df in iter_workbook_sheets(path):
+        ...
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+logger = logging.getLogger("mf.etl.workbook_reader")
+
+CSV_ENCODINGS = ['utf-8', 'cp1252', 'latin1', 'iso-8859-1']
+
+
+def _cell_text(value):
+    """Cell value as read_excel(dtype=str) would return it."""
+    if value is None:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _promote_header(df: pd.DataFrame) -> pd.DataFrame:
+    """Use the first row as column names (blank names -> 'Unnamed: i')."""
+    if df.empty:
+        return df
+    columns = [
+        name if isinstance(name, str) and name.strip() else f"Unnamed: {i}"
+        for i, name in enumerate(df.iloc[0].tolist())
+    ]
+    body = df.iloc[1:].reset_index(drop=True)
+    body.columns = columns
+    return body
+
+
+def _read_only_sheet(worksheet) -> pd.DataFrame:
+    """Stream one read-only worksheet into a frame, dropping trailing empty rows."""
+    rows = [
+        [_cell_text(value) for value in row]
+        for row in worksheet.iter_rows(values_only=True)
+    ]
+
+    # Read-only dimensions are often inflated by formatted-but-empty rows
+    while rows and all(pd.isna(v) for v in rows[-1]):
+        rows.pop()
+
+    width = max((len(r) for r in rows), default=0)
+    return pd.DataFrame([r + [np.nan] * (width - len(r)) for r in rows], dtype=object)
+
+
+def iter_workbook_sheets(file_path: Path, header: Optional[int] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (sheet_name, DataFrame) for every sheet of a workbook / CSV.
+
+    Args:
+        file_path: .xlsx / .xlsm / .xls / .csv file
+        header: None for the raw grid, 0 to use each sheet's first row as columns
+    """
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+
+    if suffix == '.csv':
+        for encoding in CSV_ENCODINGS:
+            try:
+                df = pd.read_csv(file_path, encoding=encoding, dtype=str, header=header)
+            except UnicodeDecodeError:
+                continue
+            yield file_path.stem, df
+            return
+        raise ValueError(f"Could not read {file_path.name} with any encoding")
+
+    if suffix == '.xls':
+        # xlrd has no streaming mode; still a single open for every sheet
+        for sheet_name, df in pd.read_excel(file_path, sheet_name=None, dtype=str, header=header).items():
+            yield sheet_name, df
+        return
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            df = _read_only_sheet(worksheet)
+            if header == 0:
+                df = _promote_header(df)
+            logger.debug(f"Read sheet '{worksheet.title}' of {file_path.name}: {len(df)} rows")
+            yield worksheet.title, df
+    finally:
+        workbook.close()
@@ -0,0 +1,147 @@
+"""
+benchmark_trgm_lookups.py
+-------------------------
+Before/after EXPLAIN ANALYZE of the fuzzy AMC / scheme name lookups.
+
+before: WHERE similarity(lower(name), lower(:name)) > limit ORDER BY similarity DESC
+        (no index can serve the expression -> sequential scan per lookup)
+after : WHERE lower(name) % lower(:name) ORDER BY lower(name) <-> lower(:name)
+        with pg_trgm.similarity_threshold = limit, set transaction-local
+        (bitmap scan on the GIN trigram index)
+
+Run deploy_amc_complete.py first so the trigram indexes exist.
+
+Usage:
+    python benchmark_trgm_lookups.py [samples]
+"""
+
+import json
+import logging
+import statistics
+import sys
+from sqlalchemy import text
+from Etl.utils import engine
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LOOKUPS = {
+    'amc_master': {
+        'column': 'amc_full_name',
+        'limit': 0.5,
+    },
+    'scheme_master_final': {
+        'column': 'canonical_scheme_name',
+        'limit': 0.5,
+    },
+}
+
+
+def before_sql(table: str, column: str) -> str:
+    return f"""
+        SELECT {column}, similarity(lower({column}), lower(:name)) AS sim
+        FROM {table}
+        WHERE similarity(lower({column}), lower(:name)) > :limit
+        ORDER BY sim DESC
+        LIMIT 1
+    """
+
+
+def after_sql(table: str, column: str) -> str:
+    return f"""
+        SELECT {column}, similarity(lower({column}), lower(:name)) AS sim
+        FROM {table}
+        WHERE lower({column}) % lower(:name)
+        ORDER BY lower({column}) <-> lower(:name)
+        LIMIT 1
+    """
+
+
+def sample_names(conn, table: str, column: str, samples: int):
+    """Real names with a typo-like change, so they only match fuzzily"""
+    rows = conn.execute(
+        text(f"""
+            SELECT {column} FROM {table}
+            WHERE {column} IS NOT NULL
+            ORDER BY random()
+            LIMIT :n
+        """),
+        {"n": samples}
+    ).fetchall()
+    return [f"{r[0][:-2]} Fund" if len(r[0]) > 10 else r[0] for r in rows]
+
+
+def plan_nodes(plan: dict):
+    """Node types of a JSON plan, depth first"""
+    nodes = [plan['Node Type']]
+    for child in plan.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(conn, sql: str, params: dict):
+    """(execution ms, node types) of one EXPLAIN ANALYZE"""
+    result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]['Execution Time'], plan_nodes(result[0]['Plan'])
+
+
+def benchmark_table(conn, table: str, column: str, limit: float, samples: int):
+    """EXPLAIN ANALYZE both query shapes over the same sample names"""
+    names = sample_names(conn, table, column, samples)
+    if not names:
+        logger.warning(f"  {table} is empty - skipped")
+        return
+
+    # Transaction-local `%` cut-off (SET LOCAL cannot take a bind parameter)
+    conn.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :limit, true)"),
+        {"limit": str(limit)}
+    )
+
+    timings = {}
+    for label, sql in (('before', before_sql(table, column)), ('after', after_sql(table, column))):
+        times = []
+        nodes = []
+        for name in names:
+            elapsed, nodes = explain(conn, sql, {"name": name, "limit": limit})
+            times.append(elapsed)
+        timings[label] = times
+        logger.info(
+            f"  {label:<6} median {statistics.median(times):8.2f} ms | "
+            f"max {max(times):8.2f} ms | plan: {' > '.join(nodes)}"
+        )
+
+    speedup = statistics.median(timings['before']) / max(statistics.median(timings['after']), 1e-6)
+    logger.info(f"  speedup x{speedup:.1f} over {len(names)} lookups")
+
+    # Full text plan of the first sample, for the record
+    for label, sql in (('before', before_sql(table, column)), ('after', after_sql(table, column))):
+        plan = conn.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"),
+            {"name": names[0], "limit": limit}
+        ).fetchall()
+        logger.info(f"  {label} plan for '{names[0]}':")
+        for row in plan:
+            logger.info(f"    {row[0]}")
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    logger.info("="*60)
+    logger.info("TRIGRAM LOOKUP BENCHMARK")
+    logger.info("="*60)
+
+    with engine.begin() as conn:
+        for table, lookup in LOOKUPS.items():
+            logger.info(f"{table}.{lookup['column']}")
+            benchmark_table(conn, table, lookup['column'], lookup['limit'], samples)
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -48,6 +48,92 @@ CREATE UNIQUE INDEX idx_amc_staging_unique ON amc_staging(source_table, source_a
 ALTER TABLE amc_master ADD COLUMN IF NOT EXISTS bse_amc_code TEXT;
 ALTER TABLE amc_master ADD COLUMN IF NOT EXISTS nse_amc_code TEXT;
 
+-- =====================================================
+-- STEP 1B2: NORMALIZED CODE MAP
+-- One row per (source, code) exploded from the comma-separated
+-- *_amc_code columns, kept in sync by trigger, so code lookups
+-- are primary-key probes instead of string_to_array() scans.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS amc_code_map (
+    source TEXT NOT NULL,       -- cams / kfin / bse / nse
+    code TEXT NOT NULL,         -- upper-cased, trimmed
+    amc_id UUID NOT NULL REFERENCES amc_master(amc_id) ON DELETE CASCADE,
+    PRIMARY KEY (source, code)
+);
+
+CREATE INDEX IF NOT EXISTS idx_amc_code_map_amc ON amc_code_map(amc_id);
+
+CREATE OR REPLACE FUNCTION sync_amc_code_map()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_freed TEXT[];             -- 'source:code' keys this AMC owned until now
+BEGIN
+    WITH removed AS (
+        DELETE FROM amc_code_map WHERE amc_id = NEW.amc_id
+        RETURNING source || ':' || code AS code_key
+    )
+    SELECT array_agg(code_key) INTO v_freed FROM removed;
+    
+    -- A code already owned by another AMC keeps its first owner
+    INSERT INTO amc_code_map (source, code, amc_id)
+    SELECT DISTINCT v.source, TRIM(c.code), NEW.amc_id
+    FROM (VALUES 
+        ('cams', NEW.cams_amc_code),
+        ('kfin', NEW.kfin_amc_code),
+        ('bse', NEW.bse_amc_code),
+        ('nse', NEW.nse_amc_code)
+    ) AS v(source, codes)
+    CROSS JOIN LATERAL unnest(string_to_array(UPPER(COALESCE(v.codes, '')), ',')) AS c(code)
+    WHERE TRIM(c.code) <> ''
+    ON CONFLICT (source, code) DO NOTHING;
+    
+    -- Codes this AMC no longer lists pass to the earliest other AMC listing
+    -- them (same order as the backfill below), instead of staying unmapped
+    IF v_freed IS NOT NULL THEN
+        INSERT INTO amc_code_map (source, code, amc_id)
+        SELECT DISTINCT ON (v.source, TRIM(c.code)) v.source, TRIM(c.code), am.amc_id
+        FROM amc_master am
+        CROSS JOIN LATERAL (VALUES 
+            ('cams', am.cams_amc_code),
+            ('kfin', am.kfin_amc_code),
+            ('bse', am.bse_amc_code),
+            ('nse', am.nse_amc_code)
+        ) AS v(source, codes)
+        CROSS JOIN LATERAL unnest(string_to_array(UPPER(COALESCE(v.codes, '')), ',')) AS c(code)
+        WHERE am.amc_id <> NEW.amc_id
+          AND v.source || ':' || TRIM(c.code) = ANY(v_freed)
+        ORDER BY v.source, TRIM(c.code), am.created_at
+        ON CONFLICT (source, code) DO NOTHING;
+    END IF;
+    
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_sync_amc_code_map ON amc_master;
+CREATE TRIGGER trg_sync_amc_code_map
+AFTER INSERT OR UPDATE OF cams_amc_code, kfin_amc_code, bse_amc_code, nse_amc_code
+ON amc_master
+FOR EACH ROW EXECUTE FUNCTION sync_amc_code_map();
+
+-- Backfill codes of existing AMCs
+INSERT INTO amc_code_map (source, code, amc_id)
+SELECT DISTINCT ON (v.source, TRIM(c.code)) v.source, TRIM(c.code), am.amc_id
+FROM amc_master am
+CROSS JOIN LATERAL (VALUES 
+    ('cams', am.cams_amc_code),
+    ('kfin', am.kfin_amc_code),
+    ('bse', am.bse_amc_code),
+    ('nse', am.nse_amc_code)
+) AS v(source, codes)
+CROSS JOIN LATERAL unnest(string_to_array(UPPER(COALESCE(v.codes, '')), ',')) AS c(code)
+WHERE TRIM(c.code) <> ''
+ORDER BY v.source, TRIM(c.code), am.created_at
+ON CONFLICT (source, code) DO NOTHING;
+
 -- =====================================================
 -- STEP 1C: IMPROVED MATCHING FUNCTION (v3)
 -- =====================================================
@@ -81,12 +167,12 @@ BEGIN
     RETURN;
   END IF;
   
-  -- PRIORITY 1: Exact code match in comma-separated lists
+  -- PRIORITY 1: Exact code match (primary-key lookup in amc_code_map)
   IF v_code <> '' THEN
-    SELECT am.amc_id INTO amc_id
-    FROM amc_master am
-    WHERE v_code = ANY(string_to_array(UPPER(COALESCE(am.cams_amc_code, '')), ','))
-       OR v_code = ANY(string_to_array(UPPER(COALESCE(am.kfin_amc_code, '')), ','))
+    SELECT cm.amc_id INTO amc_id
+    FROM amc_code_map cm
+    WHERE cm.source IN ('cams', 'kfin')
+      AND cm.code = v_code
     LIMIT 1;
     
     IF amc_id IS NOT NULL THEN
@@ -256,6 +342,46 @@ BEGIN
 END;
 $;
 
+-- =====================================================
+-- STEP 1E: PRECOMPUTED MATCH LOOKUP (set-based matching)
+-- One row per CAMS/KFIN code (from amc_code_map) and per normalized
+-- full/short name of every amc_master row, so staging rows
+-- are matched with index joins instead of re-normalizing
+-- and re-splitting amc_master for every lookup.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS amc_master_lookup (
+    amc_id UUID NOT NULL,
+    key_type TEXT NOT NULL,     -- CODE / NAME_FULL / NAME_SHORT
+    match_key TEXT NOT NULL     -- upper-cased code or normalize_amc_name_sql() name
+);
+
+CREATE INDEX IF NOT EXISTS idx_amc_master_lookup_key ON amc_master_lookup(key_type, match_key);
+CREATE INDEX IF NOT EXISTS idx_amc_master_lookup_trgm ON amc_master_lookup USING gin (match_key gin_trgm_ops);
+
+CREATE OR REPLACE PROCEDURE sp_refresh_amc_master_lookup()
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    TRUNCATE amc_master_lookup;
+    
+    INSERT INTO amc_master_lookup (amc_id, key_type, match_key)
+    SELECT DISTINCT cm.amc_id, 'CODE', cm.code
+    FROM amc_code_map cm
+    WHERE cm.source IN ('cams', 'kfin')
+    UNION ALL
+    SELECT am.amc_id, 'NAME_FULL', normalize_amc_name_sql(am.amc_full_name)
+    FROM amc_master am
+    WHERE normalize_amc_name_sql(am.amc_full_name) <> ''
+    UNION ALL
+    SELECT am.amc_id, 'NAME_SHORT', normalize_amc_name_sql(am.amc_short_name)
+    FROM amc_master am
+    WHERE normalize_amc_name_sql(am.amc_short_name) <> '';
+    
+    ANALYZE amc_master_lookup;
+END;
+$$;
+
 -- =====================================================
 -- STEP 2: EXTRACT AMCs FROM RAW SOURCES
 -- =====================================================
@@ -331,36 +457,121 @@ $$;
 -- STEP 3: AUTO-MATCH STAGING AMCs TO MASTER
 -- =====================================================
 
+-- Same priorities and confidences as find_amc_match_v3, applied to all
+-- PENDING rows at once: each pass only fills rows still unmatched.
 CREATE OR REPLACE PROCEDURE sp_match_staging_to_master()
 LANGUAGE plpgsql
 AS $$
 DECLARE
-    rec RECORD;
-    v_match RECORD;
+    v_count INTEGER;
 BEGIN
     RAISE NOTICE 'Matching staging AMCs to master...';
     
-    FOR rec IN 
-        SELECT * FROM amc_staging 
-        WHERE status = 'PENDING'
-          AND suggested_amc_id IS NULL
-    LOOP
-        -- Use the improved matching function
-        SELECT * INTO v_match
-        FROM find_amc_match_v3(rec.source_amc_name, rec.source_amc_code);
-        
-        -- Update staging record with match result
-        UPDATE amc_staging
-        SET 
-            suggested_amc_id = v_match.amc_id,
-            match_confidence = v_match.confidence,
-            match_type = v_match.match_type,
-            updated_at = now()
-        WHERE id = rec.id;
-        
-    END LOOP;
+    CALL sp_refresh_amc_master_lookup();
     
-    RAISE NOTICE 'Matching complete!';
+    DROP TABLE IF EXISTS tmp_amc_match;
+    CREATE TEMP TABLE tmp_amc_match ON COMMIT DROP AS
+    SELECT 
+        id,
+        COALESCE(normalized_name, normalize_amc_name_sql(source_amc_name)) AS norm_name,
+        UPPER(TRIM(COALESCE(source_amc_code, ''))) AS code,
+        NULL::UUID AS amc_id,
+        NULL::TEXT AS match_type,
+        0.0::NUMERIC AS confidence
+    FROM amc_staging
+    WHERE status = 'PENDING'
+      AND suggested_amc_id IS NULL;
+    
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    
+    -- Skip if both inputs are empty
+    UPDATE tmp_amc_match
+    SET match_type = 'EMPTY_INPUT'
+    WHERE norm_name = '' AND code = '';
+    
+    -- PRIORITY 1: Exact code match
+    UPDATE tmp_amc_match t
+    SET amc_id = m.amc_id, match_type = 'CODE_EXACT', confidence = 1.0
+    FROM (
+        SELECT DISTINCT ON (t2.id) t2.id, l.amc_id
+        FROM tmp_amc_match t2
+        JOIN amc_master_lookup l ON l.key_type = 'CODE' AND l.match_key = t2.code
+        WHERE t2.match_type IS NULL
+        ORDER BY t2.id, l.amc_id
+    ) m
+    WHERE t.id = m.id;
+    
+    -- PRIORITY 2: Exact normalized name match
+    UPDATE tmp_amc_match t
+    SET amc_id = m.amc_id, match_type = 'NAME_EXACT', confidence = 0.95
+    FROM (
+        SELECT DISTINCT ON (t2.id) t2.id, l.amc_id
+        FROM tmp_amc_match t2
+        JOIN amc_master_lookup l ON l.key_type IN ('NAME_FULL', 'NAME_SHORT')
+                                AND l.match_key = t2.norm_name
+        WHERE t2.match_type IS NULL
+          AND t2.norm_name <> ''
+        ORDER BY t2.id, l.amc_id
+    ) m
+    WHERE t.id = m.id;
+    
+    -- PRIORITY 3: Partial word match (for short names like "Hdfc", "Sbi")
+    UPDATE tmp_amc_match t
+    SET amc_id = m.amc_id, match_type = 'NAME_PARTIAL', confidence = 0.85
+    FROM (
+        SELECT DISTINCT ON (t2.id) t2.id, l.amc_id
+        FROM tmp_amc_match t2
+        JOIN amc_master_lookup l
+          ON (l.key_type = 'NAME_SHORT' AND l.match_key = split_part(t2.norm_name, ' ', 1))
+          OR (l.key_type = 'NAME_FULL' AND l.match_key LIKE split_part(t2.norm_name, ' ', 1) || '%')
+        WHERE t2.match_type IS NULL
+          AND t2.norm_name <> ''
+          AND LENGTH(t2.norm_name) <= 15
+        ORDER BY t2.id, l.amc_id
+    ) m
+    WHERE t.id = m.id;
+    
+    -- PRIORITY 4: Fuzzy match; `%` (threshold 0.50) is served by the trigram index.
+    -- The threshold is transaction-local (set_config(..., true)) so it does not
+    -- stay on the caller's session the way set_limit() would
+    PERFORM set_config('pg_trgm.similarity_threshold', '0.50', true);
+    UPDATE tmp_amc_match t
+    SET 
+        amc_id = m.amc_id,
+        confidence = m.sim,
+        match_type = CASE 
+            WHEN m.sim >= 0.80 THEN 'NAME_FUZZY_HIGH'
+            WHEN m.sim >= 0.65 THEN 'NAME_FUZZY_MEDIUM'
+            ELSE 'NAME_FUZZY_LOW'
+        END
+    FROM (
+        SELECT DISTINCT ON (t2.id) t2.id, l.amc_id, similarity(l.match_key, t2.norm_name) AS sim
+        FROM tmp_amc_match t2
+        JOIN amc_master_lookup l ON l.key_type IN ('NAME_FULL', 'NAME_SHORT')
+                                AND l.match_key % t2.norm_name
+        WHERE t2.match_type IS NULL
+          AND t2.norm_name <> ''
+        ORDER BY t2.id, sim DESC
+    ) m
+    WHERE t.id = m.id
+      AND m.sim >= 0.50;
+    
+    -- No match found
+    UPDATE tmp_amc_match
+    SET match_type = 'NO_MATCH'
+    WHERE match_type IS NULL;
+    
+    -- Write every result back in one statement
+    UPDATE amc_staging s
+    SET 
+        suggested_amc_id = t.amc_id,
+        match_confidence = t.confidence,
+        match_type = t.match_type,
+        updated_at = now()
+    FROM tmp_amc_match t
+    WHERE s.id = t.id;
+    
+    RAISE NOTICE 'Matching complete! (% staging rows)', v_count;
 END;
 $$;
 
@@ -374,60 +585,56 @@ CREATE OR REPLACE PROCEDURE sp_generate_amc_master(
 LANGUAGE plpgsql
 AS $$
 DECLARE
-    rec RECORD;
-    v_new_amc_id UUID;
-    v_amc_code TEXT;
-    v_counter INTEGER;
-    v_base_code TEXT;
+    v_count INTEGER;
 BEGIN
     RAISE NOTICE 'Generating AMC master from staging...';
     
     -- AUTO-APPROVE: High-confidence matches
-    FOR rec IN 
-        SELECT * FROM amc_staging 
-        WHERE status = 'PENDING'
-          AND suggested_amc_id IS NOT NULL
-          AND match_confidence >= p_auto_approve_threshold
-    LOOP
-        UPDATE amc_staging
-        SET 
-            status = 'APPROVED',
-            reviewed_by = 'system',
-            reviewed_at = now()
-        WHERE id = rec.id;
-    END LOOP;
-    
-    RAISE NOTICE 'Auto-approved high-confidence matches';
-    
-    -- CREATE NEW AMCs: For unmatched staging records
-    FOR rec IN 
+    UPDATE amc_staging
+    SET 
+        status = 'APPROVED',
+        reviewed_by = 'system',
+        reviewed_at = now()
+    WHERE status = 'PENDING'
+      AND suggested_amc_id IS NOT NULL
+      AND match_confidence >= p_auto_approve_threshold;
+    
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RAISE NOTICE 'Auto-approved % high-confidence matches', v_count;
+    
+    -- CREATE NEW AMCs: one per normalized name of the unmatched staging records,
+    -- coded <first 3 letters><next free 3-digit counter for that prefix>
+    WITH unmatched AS (
         SELECT 
             normalized_name,
             array_agg(DISTINCT source_amc_code) FILTER (WHERE source_amc_code IS NOT NULL) as codes,
-            array_agg(DISTINCT source_table) as sources,
-            SUM(scheme_count) as total_schemes
+            array_agg(DISTINCT source_table) as sources
         FROM amc_staging
         WHERE status = 'PENDING'
           AND (suggested_amc_id IS NULL OR match_confidence < 0.60)
+          AND COALESCE(normalized_name, '') <> ''
         GROUP BY normalized_name
-        HAVING COUNT(*) > 0
-    LOOP
-        -- Generate unique AMC code
-        v_base_code := UPPER(LEFT(regexp_replace(rec.normalized_name, '[^A-Za-z]', '', 'g'), 3));
-        IF LENGTH(v_base_code) < 3 THEN
-            v_base_code := (v_base_code || 'XXX')::TEXT;
-            v_base_code := LEFT(v_base_code, 3);
-        END IF;
-        
-        -- Find next available counter
-        SELECT COALESCE(MAX(NULLIF(regexp_replace(amc_code, '^[A-Z]{3}', ''), '')::INTEGER), 0) + 1
-        INTO v_counter
-        FROM amc_master
-        WHERE amc_code LIKE v_base_code || '%';
-        
-        v_amc_code := v_base_code || LPAD(v_counter::TEXT, 3, '0');
-        
-        -- Insert into amc_master
+    ),
+    coded AS (
+        SELECT 
+            u.*,
+            LEFT(UPPER(LEFT(regexp_replace(u.normalized_name, '[^A-Za-z]', '', 'g'), 3)) || 'XXX', 3) as base_code
+        FROM unmatched u
+    ),
+    numbered AS (
+        SELECT 
+            c.*,
+            c.base_code || LPAD((
+                COALESCE((
+                    SELECT MAX(regexp_replace(am.amc_code, '^[A-Z]{3}', '')::INTEGER)
+                    FROM amc_master am
+                    WHERE am.amc_code ~ ('^' || c.base_code || '[0-9]+$')
+                ), 0)
+                + ROW_NUMBER() OVER (PARTITION BY c.base_code ORDER BY c.normalized_name)
+            )::TEXT, 3, '0') as amc_code
+        FROM coded c
+    ),
+    created AS (
         INSERT INTO amc_master (
             amc_code,
             amc_short_name,
@@ -437,36 +644,36 @@ BEGIN
             created_at,
             updated_at
         )
-        VALUES (
-            v_amc_code,
-            rec.normalized_name,
-            rec.normalized_name,
-            CASE WHEN 'cams_raw' = ANY(rec.sources) 
-                 THEN array_to_string(rec.codes, ',') 
+        SELECT 
+            n.amc_code,
+            n.normalized_name,
+            n.normalized_name,
+            CASE WHEN 'cams_raw' = ANY(n.sources) 
+                 THEN array_to_string(n.codes, ',') 
                  ELSE NULL END,
-            CASE WHEN 'kfin_raw' = ANY(rec.sources) 
-                 THEN array_to_string(rec.codes, ',') 
+            CASE WHEN 'kfin_raw' = ANY(n.sources) 
+                 THEN array_to_string(n.codes, ',') 
                  ELSE NULL END,
             now(),
             now()
-        )
-        RETURNING amc_id INTO v_new_amc_id;
-        
-        -- Update staging records to point to new master
-        UPDATE amc_staging
-        SET 
-            suggested_amc_id = v_new_amc_id,
-            status = 'APPROVED',
-            match_confidence = 1.0,
-            match_type = 'NEW_AMC',
-            reviewed_by = 'system',
-            reviewed_at = now()
-        WHERE normalized_name = rec.normalized_name
-          AND status = 'PENDING';
-        
-        RAISE NOTICE 'Created new AMC: % (code: %, schemes: %)', 
-            rec.normalized_name, v_amc_code, rec.total_schemes;
-    END LOOP;
+        FROM numbered n
+        RETURNING amc_id, amc_short_name
+    )
+    -- Update staging records to point to new master
+    UPDATE amc_staging s
+    SET 
+        suggested_amc_id = c.amc_id,
+        status = 'APPROVED',
+        match_confidence = 1.0,
+        match_type = 'NEW_AMC',
+        reviewed_by = 'system',
+        reviewed_at = now()
+    FROM created c
+    WHERE s.normalized_name = c.amc_short_name
+      AND s.status = 'PENDING';
+    
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RAISE NOTICE 'Created new AMCs for % staging records', v_count;
     
     RAISE NOTICE 'AMC master generation complete!';
 END;
@@ -422,6 +422,7 @@ CREATE TABLE scheme_master_final (
 
 CREATE INDEX IF NOT EXISTS idx_master_final_isin ON scheme_master_final(isin);
 CREATE INDEX IF NOT EXISTS idx_master_final_amc ON scheme_master_final(amc_name);
+CREATE INDEX IF NOT EXISTS idx_master_final_name_trgm ON scheme_master_final USING gin (lower(canonical_scheme_name) gin_trgm_ops);
 
 CREATE TABLE IF NOT EXISTS amc_master (
   amc_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -438,6 +439,7 @@ CREATE TABLE IF NOT EXISTS amc_master (
 
 -- helpful indexes
 CREATE INDEX IF NOT EXISTS idx_amc_fullname_lower ON amc_master(lower(amc_full_name));
+CREATE INDEX IF NOT EXISTS idx_amc_fullname_trgm ON amc_master USING gin (lower(amc_full_name) gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_amc_codes_text ON amc_master(cams_amc_code);
 
 
@@ -55,6 +55,7 @@ CREATE TABLE statutory_document_downloads (
     local_file_path TEXT,
     file_format TEXT,
     file_size_kb INTEGER,
+    content_sha256 TEXT,
     
     download_status TEXT DEFAULT 'PENDING',
     download_attempts INTEGER DEFAULT 0,
@@ -83,6 +84,11 @@ CREATE UNIQUE INDEX idx_statutory_unique ON statutory_document_downloads(
     COALESCE(frequency, 'NONE'), document_date
 );
 
+-- One row per document content: re-crawled identical files update this row
+CREATE UNIQUE INDEX idx_statutory_content ON statutory_document_downloads(
+    document_type, content_sha256
+);
+
 -- -------------------------
 -- 3. PORTFOLIO HOLDINGS RAW
 -- -------------------------
@@ -134,6 +140,23 @@ CREATE INDEX idx_portfolio_raw_isin ON portfolio_holdings_raw(isin_code);
 CREATE INDEX idx_portfolio_raw_doc ON portfolio_holdings_raw(document_id);
 CREATE INDEX idx_portfolio_raw_illiquid ON portfolio_holdings_raw(is_illiquid) WHERE is_illiquid = true;
 
+-- Rows the bulk COPY load could not insert into portfolio_holdings_raw
+-- (NOT NULL / precision violations), kept with the reason instead of
+-- aborting the whole scheme
+DROP TABLE IF EXISTS portfolio_holdings_raw_rejects CASCADE;
+CREATE TABLE portfolio_holdings_raw_rejects (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    scheme_id TEXT,
+    as_of_date DATE,
+    source_file TEXT,
+    row_no INTEGER,
+    reject_reason TEXT NOT NULL,
+    raw_data JSONB,
+    created_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX idx_portfolio_rejects_scheme ON portfolio_holdings_raw_rejects(scheme_id, as_of_date);
+
 -- -------------------------
 -- 4. PORTFOLIO HOLDINGS MASTER
 -- -------------------------
@@ -538,6 +561,47 @@ CREATE INDEX idx_sebi_sid_scheme ON sebi_sid_documents(scheme_id);
 CREATE INDEX idx_sebi_sid_amc ON sebi_sid_documents(amc_id);
 CREATE INDEX idx_sebi_sid_date ON sebi_sid_documents(document_date DESC);
 
+-- -------------------------
+-- 13. CRAWL STEP TIMINGS
+-- -------------------------
+-- Wall time of every crawl step (UniversalAmcCrawler), per AMC and action,
+-- to spot slow / over-padded configs in amc_crawl_steps.yaml; AmcWebsiteCrawler
+-- adds one discover_static / discover_browser row per page it searches
+DROP TABLE IF EXISTS crawl_step_timings CASCADE;
+CREATE TABLE crawl_step_timings (
+    id BIGSERIAL PRIMARY KEY,
+    
+    amc_name TEXT,
+    doc_type TEXT,
+    action TEXT NOT NULL,
+    description TEXT,
+    
+    duration_ms INTEGER NOT NULL,
+    status TEXT NOT NULL,           -- OK / FAILED / UNKNOWN
+    
+    recorded_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX idx_crawl_timing_amc ON crawl_step_timings(amc_name, doc_type, action);
+CREATE INDEX idx_crawl_timing_recorded ON crawl_step_timings(recorded_at DESC);
+
+CREATE OR REPLACE VIEW v_crawl_step_timing_summary AS
+SELECT
+    amc_name,
+    doc_type,
+    action,
+    COUNT(*) AS runs,
+    ROUND(AVG(duration_ms)) AS avg_ms,
+    PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+    MAX(duration_ms) AS max_ms,
+    SUM(duration_ms) AS total_ms,
+    COUNT(*) FILTER (WHERE status = 'FAILED') AS failures,
+    MAX(recorded_at) AS last_run
+FROM crawl_step_timings
+WHERE recorded_at >= now() - INTERVAL '30 days'
+GROUP BY amc_name, doc_type, action
+ORDER BY total_ms DESC;
+
 -- =============================================
 -- STORED PROCEDURES
 -- =============================================
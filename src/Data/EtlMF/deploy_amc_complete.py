@@ -100,6 +100,90 @@ def deploy_amc_schema():
         "ALTER TABLE amc_master ADD COLUMN IF NOT EXISTS bse_amc_code TEXT",
         "ALTER TABLE amc_master ADD COLUMN IF NOT EXISTS nse_amc_code TEXT",
         
+        # 3b. Normalized (source, code) -> amc_id map, synced by trigger
+        """
+        CREATE TABLE IF NOT EXISTS amc_code_map (
+            source TEXT NOT NULL,       -- cams / kfin / bse / nse
+            code TEXT NOT NULL,         -- upper-cased, trimmed
+            amc_id UUID NOT NULL REFERENCES amc_master(amc_id) ON DELETE CASCADE,
+            PRIMARY KEY (source, code)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_amc_code_map_amc ON amc_code_map(amc_id)",
+        # Same trigger function as database/amc_master_generator.sql - keep in sync
+        """
+        CREATE OR REPLACE FUNCTION sync_amc_code_map()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_freed TEXT[];             -- 'source:code' keys this AMC owned until now
+        BEGIN
+            WITH removed AS (
+                DELETE FROM amc_code_map WHERE amc_id = NEW.amc_id
+                RETURNING source || ':' || code AS code_key
+            )
+            SELECT array_agg(code_key) INTO v_freed FROM removed;
+            
+            -- A code already owned by another AMC keeps its first owner
+            INSERT INTO amc_code_map (source, code, amc_id)
+            SELECT DISTINCT v.source, TRIM(c.code), NEW.amc_id
+            FROM (VALUES 
+                ('cams', NEW.cams_amc_code),
+                ('kfin', NEW.kfin_amc_code),
+                ('bse', NEW.bse_amc_code),
+                ('nse', NEW.nse_amc_code)
+            ) AS v(source, codes)
+            CROSS JOIN LATERAL unnest(string_to_array(UPPER(COALESCE(v.codes, '')), ',')) AS c(code)
+            WHERE TRIM(c.code) <> ''
+            ON CONFLICT (source, code) DO NOTHING;
+            
+            -- Codes this AMC no longer lists pass to the earliest other AMC listing
+            -- them (same order as the backfill below), instead of staying unmapped
+            IF v_freed IS NOT NULL THEN
+                INSERT INTO amc_code_map (source, code, amc_id)
+                SELECT DISTINCT ON (v.source, TRIM(c.code)) v.source, TRIM(c.code), am.amc_id
+                FROM amc_master am
+                CROSS JOIN LATERAL (VALUES 
+                    ('cams', am.cams_amc_code),
+                    ('kfin', am.kfin_amc_code),
+                    ('bse', am.bse_amc_code),
+                    ('nse', am.nse_amc_code)
+                ) AS v(source, codes)
+                CROSS JOIN LATERAL unnest(string_to_array(UPPER(COALESCE(v.codes, '')), ',')) AS c(code)
+                WHERE am.amc_id <> NEW.amc_id
+                  AND v.source || ':' || TRIM(c.code) = ANY(v_freed)
+                ORDER BY v.source, TRIM(c.code), am.created_at
+                ON CONFLICT (source, code) DO NOTHING;
+            END IF;
+            
+            RETURN NEW;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS trg_sync_amc_code_map ON amc_master",
+        """
+        CREATE TRIGGER trg_sync_amc_code_map
+        AFTER INSERT OR UPDATE OF cams_amc_code, kfin_amc_code, bse_amc_code, nse_amc_code
+        ON amc_master
+        FOR EACH ROW EXECUTE FUNCTION sync_amc_code_map()
+        """,
+        """
+        INSERT INTO amc_code_map (source, code, amc_id)
+        SELECT DISTINCT ON (v.source, TRIM(c.code)) v.source, TRIM(c.code), am.amc_id
+        FROM amc_master am
+        CROSS JOIN LATERAL (VALUES 
+            ('cams', am.cams_amc_code),
+            ('kfin', am.kfin_amc_code),
+            ('bse', am.bse_amc_code),
+            ('nse', am.nse_amc_code)
+        ) AS v(source, codes)
+        CROSS JOIN LATERAL unnest(string_to_array(UPPER(COALESCE(v.codes, '')), ',')) AS c(code)
+        WHERE TRIM(c.code) <> ''
+        ORDER BY v.source, TRIM(c.code), am.created_at
+        ON CONFLICT (source, code) DO NOTHING
+        """,
+        
         # 4. Create find_amc_match_v3 function
         """
         CREATE OR REPLACE FUNCTION find_amc_match_v3(
@@ -130,10 +214,10 @@ def deploy_amc_schema():
           END IF;
           
           IF v_code <> '' THEN
-            SELECT am.amc_id INTO amc_id
-            FROM amc_master am
-            WHERE v_code = ANY(string_to_array(UPPER(COALESCE(am.cams_amc_code, '')), ','))
-               OR v_code = ANY(string_to_array(UPPER(COALESCE(am.kfin_amc_code, '')), ','))
+            SELECT cm.amc_id INTO amc_id
+            FROM amc_code_map cm
+            WHERE cm.source IN ('cams', 'kfin')
+              AND cm.code = v_code
             LIMIT 1;
             
             IF amc_id IS NOT NULL THEN
@@ -290,6 +374,36 @@ def deploy_amc_schema():
         return False
 
 
+def deploy_trigram_indexes():
+    """Create GIN trigram indexes used by the fuzzy AMC / scheme name lookups"""
+    logger.info("Creating trigram indexes...")
+    
+    # Expression indexes: the lookups compare lower(name) with `%` / `<->`
+    statements = [
+        """
+        CREATE INDEX IF NOT EXISTS idx_amc_fullname_trgm
+        ON amc_master USING gin (lower(amc_full_name) gin_trgm_ops)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_master_final_name_trgm
+        ON scheme_master_final USING gin (lower(canonical_scheme_name) gin_trgm_ops)
+        """,
+    ]
+    
+    try:
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+            conn.execute(text("ANALYZE amc_master"))
+            conn.execute(text("ANALYZE scheme_master_final"))
+        logger.info("  Y Trigram indexes ready")
+        return True
+    except Exception as e:
+        logger.warning(f"  Trigram index creation failed: {e}")
+        logger.info("  Fuzzy lookups still work, as sequential scans")
+        return False
+
+
 def deploy_procedures():
     """Deploy stored procedures from SQL file"""
     logger.info("Deploying stored procedures...")
@@ -327,6 +441,7 @@ def verify_deployment():
     
     checks = {
         'amc_staging table': "SELECT COUNT(*) FROM amc_staging",
+        'amc_code_map table': "SELECT COUNT(*) FROM amc_code_map",
         'find_amc_match_v3': "SELECT find_amc_match_v3('Test', NULL)",
         'get_amc_id_v3': "SELECT get_amc_id_v3('Test', NULL)",
         'get_amc_id': "SELECT get_amc_id('Test', NULL)"
@@ -365,10 +480,13 @@ def main():
         logger.error("Core schema deployment failed!")
         return False
     
-    # Step 3: Deploy procedures (optional - core functions work without this)
+    # Step 3: Trigram indexes for fuzzy name lookups
+    deploy_trigram_indexes()
+    
+    # Step 4: Deploy procedures (optional - core functions work without this)
     deploy_procedures()
     
-    # Step 4: Verify
+    # Step 5: Verify
     if not verify_deployment():
         logger.error("Verification failed!")
         return False
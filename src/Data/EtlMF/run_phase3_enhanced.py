@@ -24,6 +24,7 @@ from sqlalchemy import text
 
 from Etl.utils import settings, engine, ensure_dir
 from Etl.universal_amc_crawler import UniversalAmcCrawler
+from Etl.scheme_matcher import SchemeMatcher
 from Etl.real_world_amc_parser import (
     PortfolioStatementParser,
     AaumReportParser,
@@ -52,6 +53,9 @@ class Phase3EnhancedOrchestrator:
         self.aaum_parser = AaumReportParser(self.db_url)
         self.ter_parser = ExpenseRatioParser(self.db_url)
         
+        # Loaded on first match (needs scheme_master_final)
+        self.scheme_matcher: Optional[SchemeMatcher] = None
+        
         logger.info("📁 Phase 3 Enhanced Orchestrator initialized")
     
     # =====================================================================
@@ -70,7 +74,11 @@ class Phase3EnhancedOrchestrator:
         logger.info("PHASE 1: DOWNLOAD DOCUMENTS")
         logger.info("=" * 70)
         
-        self.crawler.run(doc_types=doc_types, limit_amcs=limit_amcs)
+        crawl_mode = self.settings.get('phase3', {}).get('amc_crawl', {}).get('crawl_mode', 'serial')
+        if crawl_mode == 'async':
+            self.crawler.run_async(doc_types=doc_types, limit_amcs=limit_amcs)
+        else:
+            self.crawler.run(doc_types=doc_types, limit_amcs=limit_amcs)
         
         logger.info("✅ Download phase complete")
     
@@ -94,53 +102,57 @@ class Phase3EnhancedOrchestrator:
         
         total_files = 0
         total_holdings = 0
+        workers = self.settings.get('performance', {}).get('max_workers', 1)
         
         # Process each AMC folder
-        for amc_folder in portfolio_dir.iterdir():
-            if not amc_folder.is_dir():
-                continue
-            
-            amc_name = amc_folder.name
-            logger.info(f"\n🏢 Processing AMC: {amc_name}")
-            
-            # Get all Excel/CSV files
-            files = list(amc_folder.glob("*.xlsx")) + \
-                    list(amc_folder.glob("*.xls")) + \
-                    list(amc_folder.glob("*.csv"))
-            
-            logger.info(f"📁 Found {len(files)} portfolio files")
-            
-            for file in files:
-                try:
-                    logger.info(f"📊 Parsing: {file.name}")
-                    
-                    # Parse portfolio
-                    result = self.portfolio_parser.parse_portfolio_csv(file)
-                    
-                    if not result or not result.get('holdings'):
-                        logger.warning(f"⚠️  No holdings extracted from {file.name}")
-                        continue
-                    
-                    holdings = result['holdings']
-                    scheme_info = result['scheme_info']
-                    
-                    logger.info(f"✓ Extracted {len(holdings)} holdings")
-                    
-                    # Match to scheme_id (simplified - production would use fuzzy matching)
-                    scheme_id = self._match_scheme_id(scheme_info.get('scheme_name'), amc_name)
-                    
-                    if scheme_id:
-                        # Save to database
-                        self.portfolio_parser.save_to_database(result, scheme_id)
-                        logger.info(f"✅ Saved to database: {scheme_id}")
-                    else:
-                        logger.warning(f"⚠️  Could not match scheme: {scheme_info.get('scheme_name')}")
-                    
-                    total_files += 1
-                    total_holdings += len(holdings)
+        with PortfolioStatementParser.sheet_pool(workers) as sheet_pool:
+            for amc_folder in portfolio_dir.iterdir():
+                if not amc_folder.is_dir():
+                    continue
                 
-                except Exception as e:
-                    logger.error(f"❌ Failed to parse {file.name}: {e}")
+                amc_name = amc_folder.name
+                logger.info(f"\n🏢 Processing AMC: {amc_name}")
+                
+                # Get all Excel/CSV files
+                files = list(amc_folder.glob("*.xlsx")) + \
+                        list(amc_folder.glob("*.xls")) + \
+                        list(amc_folder.glob("*.csv"))
+                
+                logger.info(f"📁 Found {len(files)} portfolio files")
+                
+                for file in files:
+                    try:
+                        logger.info(f"📊 Parsing: {file.name}")
+                        
+                        # Parse portfolio (one result per scheme sheet of the workbook)
+                        results = self.portfolio_parser.parse_portfolio_workbook(file, pool=sheet_pool)
+                        
+                        if not results:
+                            logger.warning(f"⚠️  No holdings extracted from {file.name}")
+                            continue
+                        
+                        for result in results:
+                            holdings = result['holdings']
+                            scheme_info = result['scheme_info']
+                            
+                            logger.info(f"✓ Extracted {len(holdings)} holdings ({result['sheet_name']})")
+                            
+                            # Match to scheme_id (simplified - production would use fuzzy matching)
+                            scheme_id = self._match_scheme_id(scheme_info.get('scheme_name'), amc_name)
+                            
+                            if scheme_id:
+                                # Save to database
+                                self.portfolio_parser.save_to_database(result, scheme_id)
+                                logger.info(f"✅ Saved to database: {scheme_id}")
+                            else:
+                                logger.warning(f"⚠️  Could not match scheme: {scheme_info.get('scheme_name')}")
+                            
+                            total_holdings += len(holdings)
+                        
+                        total_files += 1
+                    
+                    except Exception as e:
+                        logger.error(f"❌ Failed to parse {file.name}: {e}")
         
         logger.info(f"\n📊 Portfolio Parsing Summary:")
         logger.info(f"   Files processed: {total_files}")
@@ -391,7 +403,7 @@ class Phase3EnhancedOrchestrator:
                     SELECT 
                         document_type,
                         COUNT(*) as total,
-                        COUNT(CASE WHEN download_status = 'DOWNLOADED' THEN 1 END) as successful,
+                        COUNT(CASE WHEN download_status IN ('DOWNLOADED', 'UNCHANGED') THEN 1 END) as successful,
                         COUNT(CASE WHEN parsing_status = 'SUCCESS' THEN 1 END) as parsed
                     FROM statutory_document_downloads
                     WHERE created_at >= CURRENT_DATE - INTERVAL '7 days'
@@ -422,44 +434,22 @@ class Phase3EnhancedOrchestrator:
     def _match_scheme_id(self, scheme_name: Optional[str], amc_name: str) -> Optional[str]:
         """
         Match scheme name to scheme_master_final.scheme_id.
-        Uses fuzzy matching with pg_trgm.
+        Exact normalized-name hit, else pg_trgm-compatible fuzzy match within the AMC.
         """
         if not scheme_name:
             return None
         
-        with engine.connect() as conn:
-            # Try exact match first
-            result = conn.execute(
-                text("""
-                    SELECT scheme_id FROM scheme_master_final
-                    WHERE lower(canonical_scheme_name) = lower(:name)
-                    LIMIT 1
-                """),
-                {"name": scheme_name}
-            ).fetchone()
-            
-            if result:
-                return result[0]
-            
-            # Try fuzzy match
-            result = conn.execute(
-                text("""
-                    SELECT scheme_id, canonical_scheme_name,
-                           similarity(lower(canonical_scheme_name), lower(:name)) AS sim
-                    FROM scheme_master_final
-                    WHERE amc_name ILIKE :amc_pattern
-                      AND similarity(lower(canonical_scheme_name), lower(:name)) > 0.5
-                    ORDER BY sim DESC
-                    LIMIT 1
-                """),
-                {"name": scheme_name, "amc_pattern": f"%{amc_name}%"}
-            ).fetchone()
-            
-            if result and result[2] > 0.6:
-                logger.info(f"🔗 Fuzzy matched: '{scheme_name}' → '{result[1]}' (sim={result[2]:.2f})")
-                return result[0]
+        # scheme_master_final is loaded once per run
+        if self.scheme_matcher is None:
+            self.scheme_matcher = SchemeMatcher.from_engine(engine)
+        
+        match = self.scheme_matcher.match(scheme_name, amc_name)
+        if not match:
+            return None
         
-        return None
+        if match['method'] == 'fuzzy':
+            logger.info(f"🔗 Fuzzy matched: '{scheme_name}' → '{match['scheme_name']}' (sim={match['score']:.2f})")
+        return match['scheme_id']
     
     # =====================================================================
     # MAIN PIPELINES
@@ -25,6 +25,7 @@ from Etl.amfi_link_scraper import AmfiLinkScraper
 from Etl.amc_website_crawler import AmcWebsiteCrawler
 from Etl.statutory_pdf_parser_enhanced import StatutoryPdfParser
 from Etl.sebi_sid_scraper import SebiSidScraper
+from Etl.scheme_matcher import SchemeMatcher
 from Etl.real_world_amc_parser import (
     PortfolioStatementParser,
     AaumReportParser,
@@ -51,6 +52,9 @@ class Phase3Orchestrator:
         self.aaum_dir = ensure_dir(self.downloads_dir / 'aaum')
         self.ter_dir = ensure_dir(self.downloads_dir / 'ter')
         
+        # Loaded on first match (needs scheme_master_final)
+        self.scheme_matcher: Optional[SchemeMatcher] = None
+        
         logger.info("📁 Phase 3 directories initialized")
     
     def run_step1_amfi_links(self):
@@ -78,10 +82,7 @@ class Phase3Orchestrator:
         logger.info("=" * 70)
         
         try:
-            crawler = AmcWebsiteCrawler(
-                db_url=self.db_url,
-                download_base_dir=self.downloads_dir
-            )
+            crawler = AmcWebsiteCrawler.from_settings(settings, self.db_url, self.downloads_dir)
             crawler.run(limit=limit_amcs)
             logger.info("✅ AMC websites crawled successfully")
         except Exception as e:
@@ -97,8 +98,18 @@ class Phase3Orchestrator:
         logger.info("=" * 70)
         
         try:
-            parser = StatutoryPdfParser(db_url=self.db_url)
-            parser.run(doc_type=doc_type, limit=100)
+            parser = StatutoryPdfParser(
+                db_url=self.db_url,
+                doc_time_budget=settings.get('phase3', {}).get('pdf_parsing', {}).get('timeout_seconds'),
+                cache_dir=settings.get('paths', {}).get('parse_cache_dir'),
+                template_dir=settings.get('paths', {}).get('table_template_dir'),
+                rss_budget_mb=settings.get('phase3', {}).get('pdf_parsing', {}).get('max_rss_mb')
+            )
+            parser.run(
+                doc_type=doc_type,
+                limit=100,
+                workers=settings.get('performance', {}).get('max_workers', 1)
+            )
             logger.info("✅ PDFs parsed successfully")
         except Exception as e:
             logger.error(f"❌ PDF parsing failed: {e}")
@@ -117,17 +128,24 @@ class Phase3Orchestrator:
             portfolio_parser = PortfolioStatementParser(db_url=self.db_url)
             portfolio_files = list(self.portfolio_dir.glob("*.csv")) + list(self.portfolio_dir.glob("*.xlsx"))
             
-            for file in portfolio_files:
-                logger.info(f"📊 Parsing portfolio: {file.name}")
-                try:
-                    result = portfolio_parser.parse_portfolio_csv(file)
-                    if result:
-                        # Match to scheme_id (simplified - production would use fuzzy matching)
-                        scheme_id = self._match_scheme_from_file(file)
-                        if scheme_id:
-                            portfolio_parser.save_to_database(result, scheme_id)
-                except Exception as e:
-                    logger.error(f"Failed to parse {file.name}: {e}")
+            workers = settings.get('performance', {}).get('max_workers', 1)
+            
+            with PortfolioStatementParser.sheet_pool(workers) as sheet_pool:
+                for file in portfolio_files:
+                    logger.info(f"📊 Parsing portfolio: {file.name}")
+                    try:
+                        # One result per scheme sheet of a consolidated workbook
+                        results = portfolio_parser.parse_portfolio_workbook(file, pool=sheet_pool)
+                        for result in results:
+                            # Multi-sheet workbooks match on the sheet name instead of the file name
+                            sheet_name = result['sheet_name'] if len(results) > 1 else None
+                            scheme_id = self._match_scheme_from_file(
+                                file, sheet_name, result['scheme_info'].get('scheme_name')
+                            )
+                            if scheme_id:
+                                portfolio_parser.save_to_database(result, scheme_id)
+                    except Exception as e:
+                        logger.error(f"Failed to parse {file.name}: {e}")
             
             # AAUM CSV files
             aaum_parser = AaumReportParser(db_url=self.db_url)
@@ -161,28 +179,26 @@ class Phase3Orchestrator:
             logger.error(f"❌ CSV parsing failed: {e}")
             raise
     
-    def _match_scheme_from_file(self, file_path: Path) -> Optional[str]:
+    def _match_scheme_from_file(self, file_path: Path, sheet_name: Optional[str] = None,
+                                scheme_name: Optional[str] = None) -> Optional[str]:
         """
-        Match file to scheme_id using filename or content.
-        Production version would use fuzzy matching against scheme_master_final.
+        Match file (or one sheet of a multi-scheme workbook) to scheme_id.
+        Tries the scheme name found in the file, then the sheet / file name,
+        against the in-memory scheme matcher (exact, then trigram fuzzy).
         """
-        # Simplified - extract scheme code from filename
-        filename = file_path.stem
+        # scheme_master_final is loaded once per run
+        if self.scheme_matcher is None:
+            self.scheme_matcher = SchemeMatcher.from_engine(engine)
         
-        # Try to find scheme in database
-        with engine.connect() as conn:
-            result = conn.execute(
-                text("""
-                    SELECT scheme_id FROM scheme_master_final
-                    WHERE canonical_scheme_name ILIKE :pattern
-                    LIMIT 1
-                """),
-                {"pattern": f"%{filename[:20]}%"}
-            ).fetchone()
-            
-            if result:
-                return result[0]
+        for name in (scheme_name, sheet_name or file_path.stem):
+            match = self.scheme_matcher.match(name)
+            if match:
+                logger.info(f"🔗 Matched '{name}' → '{match['scheme_name']}' "
+                            f"({match['method']}, sim={match['score']:.2f})")
+                return match['scheme_id']
         
+        logger.warning(f"⚠️  Could not match scheme for {file_path.name}"
+                       + (f" [{sheet_name}]" if sheet_name else ""))
         return None
     
     def run_step4_sebi_sids(self, limit_amcs: Optional[int] = None):
@@ -196,7 +212,9 @@ class Phase3Orchestrator:
         try:
             scraper = SebiSidScraper(
                 db_url=self.db_url,
-                download_dir=self.sebi_dir
+                download_dir=self.sebi_dir,
+                parse_time_budget=settings.get('phase3', {}).get('pdf_parsing', {}).get('timeout_seconds'),
+                rss_budget_mb=settings.get('phase3', {}).get('pdf_parsing', {}).get('max_rss_mb')
             )
             scraper.run(limit_amcs=limit_amcs)
             logger.info("✅ SEBI SIDs scraped successfully")